@@ -1,8 +1,8 @@
 from django.contrib import admin
 from .models import (
     HashtagModel, MusicModel, PostModel,
-    LikeModel, CommentModel, CommentLikeModel, ReplyModel, ViewModel, NotificationModel, CommentDislikeModel, SaveModel,
-    RepostModel
+    LikeModel, CommentModel, ReplyModel, ReactionModel, ViewModel, NotificationModel, SaveModel,
+    RepostModel, TimelineModel, MediaJobModel
 )
 
 
@@ -53,23 +53,11 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description', 'user__username', 'hashtags__name')
     list_filter = ('created_at', 'hashtags', 'music')
     filter_horizontal = ('hashtags',)
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'likes_count', 'saves_count', 'reposts_count', 'comments_count', 'views_count')
     ordering = ('-created_at',)
     date_hierarchy = 'created_at'
     inlines = [LikeInline, CommentInline, ViewInline]
 
-    def likes_count(self, obj):
-        return obj.likes.count()
-    likes_count.short_description = 'Likes'
-
-    def comments_count(self, obj):
-        return obj.comments.count()
-    comments_count.short_description = 'Comments'
-
-    def views_count(self, obj):
-        return obj.views.count()
-    views_count.short_description = 'Views'
-
 
 @admin.register(LikeModel)
 class LikeAdmin(admin.ModelAdmin):
@@ -80,18 +68,6 @@ class LikeAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
-class CommentLikeInline(admin.TabularInline):
-    model = CommentLikeModel
-    extra = 0
-    readonly_fields = ('user', 'created_at')
-
-
-class CommentDislikeInline(admin.TabularInline):
-    model = CommentDislikeModel
-    extra = 0
-    readonly_fields = ('user', 'created_at')
-
-
 class ReplyInline(admin.TabularInline):
     model = ReplyModel
     extra = 0
@@ -100,37 +76,23 @@ class ReplyInline(admin.TabularInline):
 
 @admin.register(CommentModel)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'post', 'text_preview', 'created_at', 'likes_count')
+    list_display = ('id', 'user', 'post', 'text_preview', 'created_at', 'likes_count', 'dislikes_count')
     search_fields = ('user__username', 'post__title', 'text')
     list_filter = ('created_at',)
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'likes_count', 'dislikes_count')
     ordering = ('-created_at',)
-    inlines = [CommentLikeInline, CommentDislikeInline, ReplyInline]
+    inlines = [ReplyInline]
 
     def text_preview(self, obj):
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
     text_preview.short_description = 'Text Preview'
 
-    def likes_count(self, obj):
-        return obj.likes.count()
-    likes_count.short_description = 'Likes'
-
 
-@admin.register(CommentLikeModel)
-class CommentLikeAdmin(admin.ModelAdmin):
-    list_display = ('user', 'comment', 'created_at')
-    search_fields = ('user__username', 'comment__text')
-    list_filter = ('created_at',)
-    readonly_fields = ('created_at',)
-    ordering = ('-created_at',)
-
-
-
-@admin.register(CommentDislikeModel)
-class CommentDislikeAdmin(admin.ModelAdmin):
-    list_display = ('user', 'comment', 'created_at')
-    search_fields = ('user__username', 'comment__text')
-    list_filter = ('created_at',)
+@admin.register(ReactionModel)
+class ReactionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'target_type', 'target_id', 'value', 'created_at')
+    search_fields = ('user__username',)
+    list_filter = ('target_type', 'value', 'created_at')
     readonly_fields = ('created_at',)
     ordering = ('-created_at',)
 
@@ -160,7 +122,7 @@ class ViewAdmin(admin.ModelAdmin):
 
 @admin.register(NotificationModel)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('receiver', 'sender', 'notif_type', 'post', 'is_read', 'created_at')
+    list_display = ('receiver', 'sender', 'notif_type', 'post', 'actors_count', 'is_read', 'updated_at')
     search_fields = ('receiver__username', 'sender__username', 'notif_type')
     list_filter = ('notif_type', 'is_read', 'created_at')
     readonly_fields = ('created_at',)
@@ -179,3 +141,17 @@ class SaveAdmin(admin.ModelAdmin):
 @admin.register(RepostModel)
 class RepostAdmin(admin.ModelAdmin):
     list_display = ('user', 'post', 'created_at')
+
+
+@admin.register(TimelineModel)
+class TimelineAdmin(admin.ModelAdmin):
+    list_display = ('user', 'post', 'created_at')
+    raw_id_fields = ('user', 'post')
+
+
+@admin.register(MediaJobModel)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'status', 'attempts', 'updated_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('-created_at',)
@@ -0,0 +1,223 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models import Count
+
+from posts.background import start_in_background
+from posts.models import HashtagModel, MusicModel, PostModel
+from users.models import UserModel, Follow
+
+MAX_SUGGESTIONS = 20
+# top-k lists are cached for prefixes up to this length, whose ranges are the widest
+SHORT_PREFIX_LENGTH = 3
+PREFIX_END = '\U0010ffff'
+
+
+class PrefixIndex:
+    """
+    In-memory sorted prefix index: ``(key, id)`` pairs in a sorted list, searched with
+    bisect, with popularity and payloads kept alongside. The top-k of prefixes up to
+    ``SHORT_PREFIX_LENGTH`` characters is computed once and then maintained on insert,
+    so the widest ranges are scanned at most once per build.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._items = {}
+        self._top = {}
+
+    @classmethod
+    def build(cls, entries):
+        """Bulk-load ``(id, keys, popularity, payload)`` entries with a single sort."""
+        index = cls()
+        for item_id, keys, popularity, payload in entries:
+            keys = {key.lower() for key in keys if key}
+            index._items[item_id] = (popularity or 0, payload, keys)
+            index._keys.extend((key, item_id) for key in keys)
+        index._keys.sort()
+        return index
+
+    def add(self, item_id, keys, popularity, payload):
+        if popularity is None:
+            popularity = self._items.get(item_id, (0,))[0]
+        self.remove(item_id)
+        keys = {key.lower() for key in keys if key}
+        self._items[item_id] = (popularity, payload, keys)
+        for key in keys:
+            insort(self._keys, (key, item_id))
+            for length in range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1):
+                self._push_top(key[:length], item_id, popularity)
+
+    def remove(self, item_id):
+        existing = self._items.pop(item_id, None)
+        if existing is None:
+            return
+        for key in existing[2]:
+            position = bisect_left(self._keys, (key, item_id))
+            if position < len(self._keys) and self._keys[position] == (key, item_id):
+                del self._keys[position]
+            for length in range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1):
+                top = self._top.get(key[:length])
+                if top is not None and item_id in {entry_id for _, entry_id in top}:
+                    # rebuild that list from scratch the next time it is needed
+                    del self._top[key[:length]]
+
+    def _push_top(self, prefix, item_id, popularity):
+        top = self._top.get(prefix)
+        if top is None:
+            return
+        if item_id not in {entry_id for _, entry_id in top}:
+            top.append((popularity, item_id))
+            top.sort(key=lambda entry: (-entry[0], entry[1]))
+            del top[MAX_SUGGESTIONS:]
+
+    def _scan(self, prefix, limit):
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + PREFIX_END,))
+        candidates = {item_id for _, item_id in self._keys[lo:hi]}
+        return heapq.nsmallest(
+            limit,
+            ((-self._items[item_id][0], item_id) for item_id in candidates),
+        )
+
+    def search(self, prefix, limit=10):
+        prefix = prefix.lower()
+        limit = min(limit, MAX_SUGGESTIONS)
+        if not prefix:
+            return []
+
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            top = self._top.get(prefix)
+            if top is None:
+                top = [(-negative, item_id) for negative, item_id in self._scan(prefix, MAX_SUGGESTIONS)]
+                self._top[prefix] = top
+            ranked = top[:limit]
+        else:
+            ranked = [(-negative, item_id) for negative, item_id in self._scan(prefix, limit)]
+
+        return [self._items[item_id][1] for _, item_id in ranked]
+
+    def __len__(self):
+        return len(self._items)
+
+
+# ============================
+# 🔹 LOADERS
+# ============================
+
+def _hashtag_entries():
+    popularity = dict(
+        PostModel.hashtags.through.objects.values('hashtagmodel_id')
+        .annotate(n=Count('id')).values_list('hashtagmodel_id', 'n')
+    )
+    for hashtag_id, name in HashtagModel.objects.values_list('id', 'name'):
+        yield hashtag_entry(hashtag_id, name, popularity.get(hashtag_id, 0))
+
+
+def hashtag_entry(hashtag_id, name, popularity=None):
+    return hashtag_id, [name], popularity, {'id': hashtag_id, 'name': name}
+
+
+def _music_entries():
+    popularity = dict(
+        PostModel.objects.filter(music__isnull=False).order_by().values('music_id')
+        .annotate(n=Count('id')).values_list('music_id', 'n')
+    )
+    for music_id, music_name, singer in MusicModel.objects.values_list('id', 'music_name', 'singer'):
+        yield music_entry(music_id, music_name, singer, popularity.get(music_id, 0))
+
+
+def music_entry(music_id, music_name, singer, popularity=None):
+    payload = {'id': music_id, 'music_name': music_name, 'singer': singer}
+    return music_id, [music_name, singer], popularity, payload
+
+
+def _user_entries():
+    popularity = dict(
+        Follow.objects.order_by().values('following_id')
+        .annotate(n=Count('id')).values_list('following_id', 'n')
+    )
+    for user_id, username in UserModel.objects.values_list('id', 'username'):
+        yield user_entry(user_id, username, popularity.get(user_id, 0))
+
+
+def user_entry(user_id, username, popularity=None):
+    return user_id, [username], popularity, {'id': user_id, 'username': username}
+
+
+LOADERS = {
+    'hashtags': _hashtag_entries,
+    'musics': _music_entries,
+    'users': _user_entries,
+}
+EMPTY_INDEXES = {kind: PrefixIndex() for kind in LOADERS}
+
+
+# ============================
+# 🔹 REGISTRY
+# ============================
+
+class Autocomplete:
+    """
+    Per-process set of prefix indexes, built in the background at startup (``warm_up``)
+    and rebuilt every ``AUTOCOMPLETE_REBUILD_INTERVAL`` seconds to pick up popularity
+    changes and rows created in other processes. Requests never wait for a build: they
+    are served the previous index (empty before the first build). Rows created in this
+    process are added immediately through signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._indexes = None
+        self._built_at = 0.0
+
+    def _build(self):
+        try:
+            indexes = {kind: PrefixIndex.build(loader()) for kind, loader in LOADERS.items()}
+            with self._lock:
+                self._indexes = indexes
+                self._built_at = time.monotonic()
+        finally:
+            self._build_lock.release()
+
+    def warm_up(self):
+        """Start a build on a background thread unless one is already running."""
+        if self._build_lock.acquire(blocking=False):
+            try:
+                start_in_background(self._build)
+            except Exception:
+                self._build_lock.release()
+                raise
+
+    def _ready(self):
+        if self._indexes is None or time.monotonic() - self._built_at > settings.AUTOCOMPLETE_REBUILD_INTERVAL:
+            self.warm_up()
+        return self._indexes or EMPTY_INDEXES
+
+    def search(self, prefix, kinds, limit=10):
+        indexes = self._ready()
+        with self._lock:
+            return {kind: indexes[kind].search(prefix, limit) for kind in kinds}
+
+    def add(self, kind, entry):
+        if self._indexes is None:
+            return
+        with self._lock:
+            self._indexes[kind].add(*entry)
+
+    def remove(self, kind, item_id):
+        if self._indexes is None:
+            return
+        with self._lock:
+            self._indexes[kind].remove(item_id)
+
+    def reset(self):
+        with self._lock:
+            self._indexes = None
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,51 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS,
+            thread_name_prefix='posts-background',
+        )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, '__name__', func))
+    finally:
+        close_old_connections()
+
+
+def start_in_background(func, *args, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` on a worker thread right away, for work that does not
+    depend on the current transaction (inline with ``BACKGROUND_TASKS_EAGER``).
+    """
+    if settings.BACKGROUND_TASKS_EAGER:
+        func(*args, **kwargs)
+    else:
+        _get_executor().submit(_run, func, args, kwargs)
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` on a worker thread once the current transaction
+    commits, so the request that scheduled it does not wait for it.
+
+    With ``BACKGROUND_TASKS_EAGER = True`` the task runs inline at commit time instead,
+    which keeps tests deterministic.
+    """
+    transaction.on_commit(lambda: start_in_background(func, *args, **kwargs))
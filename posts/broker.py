@@ -0,0 +1,109 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def post_channel(post_id):
+    return f'post:{post_id}'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class InProcessBroker:
+    """
+    Pub/sub between request/background threads and the live sockets of this process.
+
+    ``subscribe(channel, callback)`` registers ``callback(channel, message)``, which is
+    called on the publishing thread; subscribers hand the message over to their own
+    event loop. To fan out across processes, point ``LIVE_BROKER`` at a class with the
+    same three methods backed by an external broker (e.g. Redis pub/sub).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._subscribers[channel].add(callback)
+
+    def unsubscribe(self, channel, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(channel)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(channel, message)
+            except Exception:
+                logger.exception("Live subscriber failed on %s", channel)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.LIVE_BROKER)()
+    return _broker
+
+
+class CounterPublisher:
+    """
+    Sums post counter deltas in-process and publishes one message per changed post every
+    ``LIVE_TICK_SECONDS``, so a post taking thousands of likes a second costs the
+    broker one message per tick instead of one per like.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def add(self, post_id, deltas):
+        with self._lock:
+            pending = self._pending.setdefault(post_id, {})
+            for name, delta in deltas.items():
+                if delta:
+                    pending[name] = pending.get(name, 0) + delta
+            if self._timer is None:
+                self._timer = threading.Timer(settings.LIVE_TICK_SECONDS, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+
+        broker = get_broker()
+        for post_id, deltas in pending.items():
+            deltas = {name: delta for name, delta in deltas.items() if delta}
+            if deltas:
+                broker.publish(post_channel(post_id), {'type': 'counters', 'post': post_id, 'deltas': deltas})
+
+
+counter_publisher = CounterPublisher()
+atexit.register(counter_publisher.flush)
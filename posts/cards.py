@@ -0,0 +1,214 @@
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from posts.comment_previews import load_comment_previews
+from posts.fieldsets import child_spec, expands, includes
+from posts.media import variant_url
+from posts.models import MusicModel, PostModel
+from posts.profiling import span
+from posts.serializers import CommentPreviewSerializer
+from posts.viewer_state import ViewerState, viewer_flags
+from users.models import UserModel
+
+# columns a card is built from; list endpoints paginate ``queryset.values(*card_columns(spec))``
+CARD_COLUMNS = (
+    'id', 'user_id', 'music_id', 'likes_count', 'saves_count', 'reposts_count', 'comments_count',
+    'views_count', 'media_variants', 'post', 'title', 'description', 'created_at', 'updated_at',
+    'saved', 'genre',
+)
+# card keys (in PostModelSerializer's order) and the column each one reads
+CARD_KEYS = {
+    'id': 'id', 'user': 'user_id', 'music': 'music_id', 'comments_preview': None,
+    'likes_count': 'likes_count', 'liked_by_current_user': None, 'saves_count': 'saves_count',
+    'saved_by_current_user': None, 'hashtags': None, 'reposts_count': 'reposts_count',
+    'comments_count': 'comments_count', 'views_count': 'views_count', 'reposted_by_current_user': None,
+    'poster': 'media_variants', 'post': 'post', 'title': 'title', 'description': 'description',
+    'created_at': 'created_at', 'updated_at': 'updated_at', 'saved': 'saved', 'genre': 'genre',
+}
+USER_COLUMNS = ('id', 'username', 'last_name', 'first_name', 'bio', 'avatar', 'avatar_variants')
+MUSIC_COLUMNS = ('id', 'cover', 'singer', 'music_name', 'file', 'cover_variants')
+
+
+def card_columns(spec=None):
+    """Columns needed for the requested keys; id and created_at always (pagination)."""
+    if spec is None:
+        return CARD_COLUMNS
+    needed = {'id', 'created_at'}
+    needed.update(column for key, column in CARD_KEYS.items() if column and spec.includes(key))
+    return tuple(column for column in CARD_COLUMNS if column in needed)
+
+
+def _format_datetime(value, tz):
+    """DRF's ISO 8601 output (current timezone, ``Z`` for UTC), with the timezone looked up once per page."""
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def rows_in_order(queryset, post_ids):
+    """The rows (instances or ``.values()`` dicts) of ``post_ids`` in that order, skipping missing ones."""
+    rows = {}
+    for row in queryset.filter(id__in=post_ids):
+        rows[row['id'] if isinstance(row, dict) else row.id] = row
+    return [rows[post_id] for post_id in post_ids if post_id in rows]
+
+
+class PostCardRenderer:
+    """
+    Read-only fast path for lists of posts: builds the same JSON as ``PostModelSerializer``
+    straight from ``.values(*card_columns(spec))`` rows, with authors, music and hashtags
+    loaded in one ``IN`` query each and the viewer's flags from a ``ViewerState``. No
+    serializer fields are instantiated per post. With a ``FieldSpec`` only the requested
+    keys are built and only the lookups they need are run.
+    """
+
+    def __init__(self, request=None, viewer_state=None, comments_preview=None, context=None, spec=None):
+        self.request = request
+        self.viewer_state = viewer_state
+        self.comments_preview = comments_preview
+        self.context = context or {'request': request}
+        self.spec = spec
+
+    def _file_url(self, name):
+        if not name:
+            return None
+        url = default_storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+    def _user(self, row):
+        return {
+            'id': row['id'],
+            'username': row['username'],
+            'last_name': row['last_name'],
+            'first_name': row['first_name'],
+            'bio': row['bio'],
+            'avatar': variant_url(row['avatar_variants'], 'thumb', self.request) or self._file_url(row['avatar']),
+        }
+
+    def _music(self, row):
+        return {
+            'id': row['id'],
+            'cover': variant_url(row['cover_variants'], 'thumb', self.request) or self._file_url(row['cover']),
+            'singer': row['singer'],
+            'music_name': row['music_name'],
+            'file': self._file_url(row['file']),
+        }
+
+    def _lookups(self, rows):
+        spec = self.spec
+        post_ids = [row['id'] for row in rows]
+        users = musics = hashtags = None
+
+        if expands(spec, 'user'):
+            user_spec = child_spec(spec, 'user')
+            user_ids = {row['user_id'] for row in rows}
+            users = {row['id']: self._user(row)
+                     for row in UserModel.objects.filter(id__in=user_ids).values(*USER_COLUMNS)}
+            if user_spec is not None:
+                users = {user_id: user_spec.select(user) for user_id, user in users.items()}
+
+        if expands(spec, 'music'):
+            music_spec = child_spec(spec, 'music')
+            music_ids = {row['music_id'] for row in rows if row['music_id'] is not None}
+            musics = {}
+            if music_ids:
+                musics = {row['id']: self._music(row)
+                          for row in MusicModel.objects.filter(id__in=music_ids).values(*MUSIC_COLUMNS)}
+            if music_spec is not None:
+                musics = {music_id: music_spec.select(music) for music_id, music in musics.items()}
+
+        if includes(spec, 'hashtags'):
+            hashtags = {}
+            through = PostModel.hashtags.through.objects.filter(postmodel_id__in=post_ids).order_by('id')
+            if expands(spec, 'hashtags'):
+                hashtag_spec = child_spec(spec, 'hashtags')
+                for post_id, hashtag_id, name in through.values_list('postmodel_id', 'hashtagmodel_id',
+                                                                      'hashtagmodel__name'):
+                    hashtag = {'id': hashtag_id, 'name': name}
+                    if hashtag_spec is not None:
+                        hashtag = hashtag_spec.select(hashtag)
+                    hashtags.setdefault(post_id, []).append(hashtag)
+            else:
+                # ids only: no join
+                for post_id, hashtag_id in through.values_list('postmodel_id', 'hashtagmodel_id'):
+                    hashtags.setdefault(post_id, []).append(hashtag_id)
+        return users, musics, hashtags
+
+    def _comments_preview(self, post_id):
+        if not self.comments_preview:
+            return []
+        return CommentPreviewSerializer(self.comments_preview.get(post_id, []), many=True, context=self.context).data
+
+    def render(self, rows):
+        with span('serialize'):
+            return self._render(list(rows))
+
+    def _render(self, rows):
+        if not rows:
+            return []
+        users, musics, hashtags = self._lookups(rows)
+        state = self.viewer_state or ViewerState()
+        tz = timezone.get_current_timezone()
+        builders = {
+            'id': lambda row: row['id'],
+            'user': (lambda row: users.get(row['user_id'])) if users is not None else (lambda row: row['user_id']),
+            'music': (lambda row: musics.get(row['music_id'])) if musics is not None
+            else (lambda row: row['music_id']),
+            'comments_preview': lambda row: self._comments_preview(row['id']),
+            'likes_count': lambda row: row['likes_count'],
+            'liked_by_current_user': lambda row: row['id'] in state.liked,
+            'saves_count': lambda row: row['saves_count'],
+            'saved_by_current_user': lambda row: row['id'] in state.saved,
+            'hashtags': lambda row: hashtags.get(row['id'], []),
+            'reposts_count': lambda row: row['reposts_count'],
+            'comments_count': lambda row: row['comments_count'],
+            'views_count': lambda row: row['views_count'],
+            'reposted_by_current_user': lambda row: row['id'] in state.reposted,
+            'poster': lambda row: variant_url(row['media_variants'], 'large', self.request),
+            'post': lambda row: self._file_url(row['post']),
+            'title': lambda row: row['title'],
+            'description': lambda row: row['description'],
+            'created_at': lambda row: _format_datetime(row['created_at'], tz),
+            'updated_at': lambda row: _format_datetime(row['updated_at'], tz),
+            'saved': lambda row: row['saved'],
+            'genre': lambda row: row['genre'],
+        }
+        selected = [(key, build) for key, build in builders.items() if includes(self.spec, key)]
+        return [{key: build(row) for key, build in selected} for row in rows]
+
+
+class PostCardMixin:
+    """
+    Lists posts as cards: the page is paginated as ``.values()`` rows and rendered by
+    ``PostCardRenderer`` instead of ``PostModelSerializer(many=True)``. Views that also
+    use ``FieldSpecMixin`` get ``?fields=``/``?expand=`` pruning.
+    """
+
+    def _comments_preview_limit(self):
+        return 0
+
+    def get_card_spec(self):
+        return self.get_field_spec() if hasattr(self, 'get_field_spec') else None
+
+    def card_queryset(self, queryset):
+        # relations come from the renderer's own lookups, never from the queryset
+        return queryset.prefetch_related(None).values(*card_columns(self.get_card_spec()))
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.card_queryset(self.filter_queryset(self.get_queryset())))
+        return self.get_paginated_response(self.render_cards(page))
+
+    def render_cards(self, rows):
+        spec = self.get_card_spec()
+        post_ids = [row['id'] for row in rows]
+        limit = self._comments_preview_limit() if includes(spec, 'comments_preview') else 0
+        previews = load_comment_previews(post_ids, limit) if limit else None
+        renderer = PostCardRenderer(
+            request=self.request,
+            viewer_state=ViewerState.for_posts(self.request.user, post_ids, only=viewer_flags(spec)),
+            comments_preview=previews,
+            context=self.get_serializer_context(),
+            spec=spec,
+        )
+        return renderer.render(rows)
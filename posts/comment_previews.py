@@ -0,0 +1,35 @@
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from posts.models import CommentModel
+
+MAX_COMMENTS_PREVIEW = 5
+
+
+def load_comment_previews(post_ids, limit):
+    """
+    Return ``{post_id: [comment, ...]}`` with the ``limit`` newest comments of each post.
+
+    One windowed query for the whole page instead of the full comment tree per post.
+    """
+    limit = min(limit, MAX_COMMENTS_PREVIEW)
+    previews = defaultdict(list)
+    if not post_ids or limit <= 0:
+        return previews
+
+    comments = (
+        CommentModel.objects.filter(post_id__in=post_ids)
+        .select_related('user')
+        .annotate(row_number=Window(
+            RowNumber(),
+            partition_by=F('post_id'),
+            order_by=(F('created_at').desc(), F('id').desc()),
+        ))
+        .filter(row_number__lte=limit)
+        .order_by('post_id', 'row_number')
+    )
+    for comment in comments:
+        previews[comment.post_id].append(comment)
+    return previews
@@ -0,0 +1,35 @@
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from posts.models import ReplyModel
+
+# replies rendered inline under each comment; the rest are behind ``replies_next``
+REPLIES_PREVIEW = 3
+
+
+def _count(model, fk):
+    rows = (model.objects.filter(**{fk: OuterRef('pk')}).order_by()
+            .values(fk).annotate(c=Count('id')).values('c'))
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def with_comment_tree(queryset, replies_preview=REPLIES_PREVIEW):
+    """
+    Everything ``CommentModelSerializer`` reads, in a constant number of queries:
+    users joined, reply counts annotated (like/dislike counts are stored on the
+    rows), and the first ``replies_preview`` replies of every comment with their
+    users prefetched into ``comment.replies_preview`` by one windowed query.
+    """
+    replies = ReplyModel.objects.select_related('user').order_by('created_at', 'id')[:replies_preview]
+    return queryset.select_related('user').annotate(
+        replies_count=_count(ReplyModel, 'comment'),
+    ).prefetch_related(Prefetch('replies', queryset=replies, to_attr='replies_preview'))
+
+
+def replies_preview(comment):
+    """The inline replies of ``comment``, loading them if the queryset did not prefetch them."""
+    if not hasattr(comment, 'replies_preview'):
+        comment.replies_preview = list(
+            comment.replies.select_related('user').order_by('created_at', 'id')[:REPLIES_PREVIEW]
+        )
+    return comment.replies_preview
@@ -0,0 +1,104 @@
+import functools
+import hashlib
+import time
+
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from posts.models import HashtagModel, MusicModel, PostModel
+from posts.response_cache import get_versions
+from users.models import Follow, UserModel
+
+
+def conditional_get(validators, per_user=False):
+    """
+    Answer ``If-None-Match``/``If-Modified-Since`` with 304 before the view body runs.
+
+    ``validators(view, request, *args, **kwargs)`` returns ``(etag_source, last_modified)``
+    from a cheap query (timestamps, counters, versions) or None to skip the check, e.g.
+    when the object does not exist. The ETag also covers host and query string, and the
+    viewer when the body depends on who asks (``per_user``).
+
+    ``last_modified`` must be None unless that one timestamp moves with every input of the
+    body; counts and versions are only covered by the ETag. ``Last-Modified`` has whole
+    seconds, so it is also left out while the timestamp is in the current second: a second
+    change within that second would otherwise be answered 304 to ``If-Modified-Since``.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            found = validators(view, request, *args, **kwargs) if request.method in ('GET', 'HEAD') else None
+            if found is None:
+                return method(view, request, *args, **kwargs)
+
+            source, last_modified = found
+            parts = [request.get_host(), request.get_full_path(), repr(source)]
+            if per_user:
+                parts.append(str(request.user.pk))
+            etag = '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+            timestamp = None
+            if last_modified is not None and int(last_modified.timestamp()) < int(time.time()):
+                timestamp = int(last_modified.timestamp())
+
+            response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            response['Cache-Control'] = 'private, no-cache' if per_user else 'no-cache'
+            if per_user:
+                patch_vary_headers(response, ('Authorization', 'Cookie'))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# ============================
+# 🔹 VALIDATORS
+# ============================
+
+def post_validators(view, request, *args, **kwargs):
+    """
+    A post changes with its own ``updated_at`` (counters included), its author's and the
+    post/music/hashtag versions; the post version also moves when hashtags are added to
+    or removed from a post, which touches no timestamp. The viewer's flags only move
+    together with a counter. No ``Last-Modified``: the versions have no timestamp.
+    """
+    if request.query_params.get('comments_preview'):
+        return None
+    row = PostModel.objects.filter(pk=kwargs.get('pk')).values('updated_at', 'user__updated_at').first()
+    if row is None:
+        return None
+    source = (row['updated_at'], row['user__updated_at'], get_versions((PostModel, MusicModel, HashtagModel)))
+    return source, None
+
+
+def user_validators(view, request, *args, **kwargs):
+    updated_at = UserModel.objects.filter(pk=kwargs.get('pk')).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return updated_at, updated_at
+
+
+def current_user_validators(view, request, *args, **kwargs):
+    """
+    The profile, its follow counts and the (count, latest change) of the user's posts: two
+    queries, plus the post/music/hashtag versions as for a post. No ``Last-Modified``: a
+    follow or a deleted post moves no timestamp.
+    """
+    user = request.user
+    follows = Follow.objects.filter(Q(follower=user) | Q(following=user)).aggregate(
+        followers=Count('id', filter=Q(following=user)),
+        following=Count('id', filter=Q(follower=user)),
+    )
+    posts = PostModel.objects.filter(user=user).aggregate(count=Count('id'), last=Max('updated_at'))
+    source = (user.updated_at, follows['followers'], follows['following'], posts['count'], posts['last'],
+              get_versions((PostModel, MusicModel, HashtagModel)))
+    return source, None
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+
+from posts.broker import counter_publisher
+from posts.models import PostModel
+
+COUNTER_FIELDS = ('likes_count', 'saves_count', 'reposts_count', 'comments_count', 'views_count')
+
+
+def bump_post_counters(post_id, **deltas):
+    """
+    Atomically apply counter deltas to a single post, e.g.
+    ``bump_post_counters(post.id, likes_count=1)``.
+
+    The update is a single ``UPDATE ... SET x = x + n`` statement, so concurrent
+    requests never lose increments. Call it inside the same transaction as the
+    row insert/delete it accounts for. Live sockets watching the post receive the
+    deltas once the transaction commits.
+    """
+    updates = {}
+    for name, delta in deltas.items():
+        if name not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown post counter: {name}")
+        if delta:
+            updates[name] = Greatest(F(name) + delta, 0)
+
+    if updates:
+        PostModel.objects.filter(pk=post_id).update(updated_at=Now(), **updates)
+        transaction.on_commit(lambda: counter_publisher.add(post_id, deltas))
+
+
+def get_post_counter(post_id, name):
+    return PostModel.objects.filter(pk=post_id).values_list(name, flat=True).first() or 0
+
+
+def bump_post_counter_many(name, deltas):
+    """
+    Apply ``{post_id: delta}`` to one counter with one UPDATE per distinct delta,
+    used by batch writers such as the view buffer flush.
+    """
+    if name not in COUNTER_FIELDS:
+        raise ValueError(f"Unknown post counter: {name}")
+
+    by_delta = {}
+    for post_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(post_id)
+
+    for delta, post_ids in by_delta.items():
+        PostModel.objects.filter(pk__in=post_ids).update(updated_at=Now(), **{name: Greatest(F(name) + delta, 0)})
+
+    def publish():
+        for post_id, delta in deltas.items():
+            counter_publisher.add(post_id, {name: delta})
+
+    if by_delta:
+        transaction.on_commit(publish)
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from posts.background import run_in_background
+from posts.cards import rows_in_order
+from posts.models import PostModel, TimelineModel
+from posts.pagination import PostKeysetPagination, keyset_seek
+from users.models import Follow
+
+CELEBRITY_CACHE_KEY = 'feeds:celebrity_ids'
+CELEBRITY_CACHE_TIMEOUT = 300
+
+
+def celebrity_ids():
+    """Ids of accounts whose posts are merged at read time instead of fanned out."""
+    ids = cache.get(CELEBRITY_CACHE_KEY)
+    if ids is None:
+        ids = set(
+            Follow.objects.order_by().values('following_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=settings.FEED_FANOUT_CELEBRITY_THRESHOLD)
+            .values_list('following_id', flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, ids, CELEBRITY_CACHE_TIMEOUT)
+    return ids
+
+
+# ============================
+# 🔹 WRITE SIDE (fan-out)
+# ============================
+
+def fan_out_post(post):
+    """
+    Push a freshly created post into its author's followers' timelines.
+
+    Celebrities are told apart with the same cached ``celebrity_ids()`` the read side
+    merges, so every post is either fanned out or merged, whatever the live count.
+    """
+    if post.user_id in celebrity_ids():
+        return
+    followers = Follow.objects.filter(following_id=post.user_id).count()
+    if followers == 0:
+        return
+    if followers <= settings.FEED_FANOUT_SYNC_LIMIT:
+        write_timeline_entries(post.id)
+    else:
+        run_in_background(write_timeline_entries, post.id)
+
+
+def write_timeline_entries(post_id):
+    post = PostModel.objects.filter(pk=post_id).only('id', 'user_id', 'created_at').first()
+    if post is None:
+        return
+
+    chunk_size = settings.FEED_FANOUT_CHUNK_SIZE
+    follower_ids = (Follow.objects.filter(following_id=post.user_id)
+                    .values_list('follower_id', flat=True).iterator(chunk_size=chunk_size))
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(TimelineModel(user_id=follower_id, post_id=post.id, created_at=post.created_at))
+        if len(batch) >= chunk_size:
+            TimelineModel.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineModel.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill_timeline(follower_id, following_id):
+    """On follow, copy the followee's most recent posts into the follower's timeline."""
+    if following_id in celebrity_ids():
+        return
+    recent = (PostModel.objects.filter(user_id=following_id)
+              .order_by('-created_at', '-id')
+              .values_list('id', 'created_at')[:settings.FEED_FOLLOW_BACKFILL])
+    TimelineModel.objects.bulk_create(
+        [TimelineModel(user_id=follower_id, post_id=post_id, created_at=created_at)
+         for post_id, created_at in recent],
+        ignore_conflicts=True,
+    )
+
+
+def remove_from_timeline(follower_id, following_id):
+    TimelineModel.objects.filter(user_id=follower_id, post__user_id=following_id).delete()
+
+
+# ============================
+# 🔹 READ SIDE
+# ============================
+
+def following_feed(queryset, user, position, limit):
+    """
+    Up to ``limit`` posts from accounts ``user`` follows, newest first, after ``position``.
+
+    Merges the precomputed timeline with a read-time query over followed celebrity
+    accounts; both sides are keyset reads of ``limit`` rows each.
+    """
+    keys = set(
+        keyset_seek(TimelineModel.objects.filter(user=user), position, tiebreak_field='post_id')
+        .values_list('created_at', 'post_id')[:limit]
+    )
+
+    celebrities = celebrity_ids()
+    if celebrities:
+        followed = Follow.objects.filter(follower=user, following_id__in=celebrities).values('following_id')
+        keys.update(
+            keyset_seek(PostModel.objects.filter(user_id__in=followed), position)
+            .values_list('created_at', 'id')[:limit]
+        )
+
+    post_ids = [post_id for _, post_id in sorted(keys, reverse=True)[:limit]]
+    return rows_in_order(queryset, post_ids)
+
+
+class FollowingFeedPagination(PostKeysetPagination):
+    def fetch(self, queryset, position, limit):
+        return following_feed(queryset, self.request.user, position, limit)
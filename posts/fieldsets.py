@@ -0,0 +1,160 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _tree(param):
+    """``'id,user.username,user.id'`` -> ``{'id': {}, 'user': {'username': {}, 'id': {}}}``"""
+    tree = {}
+    for path in param.split(','):
+        node = tree
+        for name in filter(None, path.strip().split('.')):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class FieldSpec:
+    """
+    What the client asked for with ``?fields=`` and ``?expand=``.
+
+    ``fields=id,poster,user.username`` keeps only those keys, ``user`` reduced to its
+    ``username``. Relations (``user``, ``music``, ``hashtags``, ``post``, ``posts``) are
+    full objects unless ``expand`` is given, in which case only the ones it names
+    (dotted for nested ones: ``expand=post,post.user``) are objects and the rest are ids.
+    Naming sub-fields of a relation in ``fields`` expands it. ``None`` instead of a
+    spec means neither parameter was sent: the full default payload.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        fields = request.query_params.get('fields')
+        expand = request.query_params.get('expand')
+        if not fields and expand is None:
+            return None
+        return cls(_tree(fields) if fields else None, _tree(expand) if expand is not None else None)
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        if not self.includes(name):
+            return False
+        if self.fields is not None and self.fields[name]:
+            return True
+        return self.expand is None or name in self.expand
+
+    def child(self, name):
+        fields = self.fields.get(name) or None if self.fields is not None else None
+        expand = self.expand.get(name, {}) if self.expand is not None else None
+        return FieldSpec(fields, expand)
+
+    def select(self, data):
+        """Drop the keys of an already built dict that were not asked for."""
+        if self.fields is None:
+            return data
+        return {key: value for key, value in data.items() if key in self.fields}
+
+
+def child_spec(spec, name):
+    """The spec of relation ``name`` (None stays None: everything, expanded)."""
+    return None if spec is None else spec.child(name)
+
+
+def expands(spec, name):
+    return spec is None or spec.expands(name)
+
+
+def includes(spec, name):
+    return spec is None or spec.includes(name)
+
+
+class FieldSpecMixin:
+    """Views: parse ``?fields=``/``?expand=`` once and pass it on as the ``field_spec`` context key."""
+
+    def get_field_spec(self):
+        if not hasattr(self, '_field_spec'):
+            self._field_spec = FieldSpec.from_request(self.request)
+        return self._field_spec
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['field_spec'] = self.get_field_spec()
+        return context
+
+
+# ============================
+# 🔹 SERIALIZERS
+# ============================
+
+def _collapsed(field):
+    """A nested serializer replaced by the primary key(s) it would have rendered."""
+    kwargs = {'read_only': True}
+    if field.source is not None:
+        kwargs['source'] = field.source
+    if isinstance(field, serializers.ListSerializer):
+        return serializers.PrimaryKeyRelatedField(many=True, **kwargs)
+    return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer side of ``FieldSpec``: fields that were not asked for are never built or
+    evaluated, and relations in ``expandable_fields`` that are not expanded become ids.
+    The top-level serializer reads the spec from the ``field_spec`` context key; nested
+    ones receive their part of it from their parent.
+    """
+    expandable_fields = ()
+
+    def _field_spec(self):
+        if hasattr(self, 'field_spec'):
+            return self.field_spec
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return self.context.get('field_spec') if parent is None else None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self._field_spec()
+        if spec is None:
+            return fields
+        for name, field in list(fields.items()):
+            if field.write_only:
+                continue
+            if not spec.includes(name):
+                del fields[name]
+            elif name in self.expandable_fields:
+                if spec.expands(name):
+                    getattr(field, 'child', field).field_spec = spec.child(name)
+                else:
+                    fields[name] = _collapsed(field)
+        return fields
+
+
+# ============================
+# 🔹 QUERYSETS
+# ============================
+
+def with_post_relations(queryset, spec, prefix=''):
+    """
+    Join/prefetch only the post relations the spec renders as objects: ``user`` and
+    ``music`` by JOIN, ``hashtags`` by prefetch (or as ids for a collapsed list).
+    """
+    related = [f'{prefix}{name}' for name in ('user', 'music') if expands(spec, name)]
+    if related:
+        queryset = queryset.select_related(*related)
+    if includes(spec, 'hashtags'):
+        queryset = queryset.prefetch_related(Prefetch(f'{prefix}hashtags'))
+    return queryset
+
+
+def with_post_row_relations(queryset, spec):
+    """The same for like/save rows: their ``user`` and ``post``, and the post's own relations."""
+    if expands(spec, 'user'):
+        queryset = queryset.select_related('user')
+    if expands(spec, 'post'):
+        queryset = with_post_relations(queryset.select_related('post'), child_spec(spec, 'post'), prefix='post__')
+    return queryset
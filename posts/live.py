@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.broker import get_broker, post_channel, user_channel
+
+logger = logging.getLogger(__name__)
+
+LIVE_PATH = '/ws/live/'
+
+
+def _user_id(scope):
+    """The user of ``?token=<access token>``, or None for anonymous sockets."""
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+    if not token:
+        return None
+    try:
+        return AccessToken(token[0])[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+
+class LiveConnection:
+    """
+    One WebSocket client. Broker messages arrive on arbitrary threads and are handed to
+    this connection's event loop; counter deltas are summed per post and sent as a
+    single ``counters`` frame every ``LIVE_TICK_SECONDS``, notifications go out as soon
+    as they arrive.
+
+    Client frames: ``{"action": "watch" | "unwatch", "posts": [1, 2]}``.
+    Server frames: ``{"type": "counters", "posts": {"1": {"likes_count": 3}}}`` (deltas
+    since the previous frame, to add to the counts the client shows: three new likes,
+    not three likes in total), ``{"type": "notification", "notification": {...}, "unread": 3}``,
+    ``{"type": "unread", "unread": 0}``.
+    """
+
+    def __init__(self, send, user_id):
+        self.send = send
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.broker = get_broker()
+        self.watched = set()
+        self.pending = {}
+        self.outbox = asyncio.Queue()
+
+    # broker side (any thread)
+    def on_message(self, channel, message):
+        self.loop.call_soon_threadsafe(self._accept, message)
+
+    def _accept(self, message):
+        if message.get('type') == 'counters':
+            pending = self.pending.setdefault(str(message['post']), {})
+            for name, delta in message['deltas'].items():
+                pending[name] = pending.get(name, 0) + delta
+        else:
+            self.outbox.put_nowait(message)
+
+    # client side
+    def watch(self, post_ids):
+        for post_id in post_ids:
+            if len(self.watched) >= settings.LIVE_MAX_WATCHED_POSTS:
+                break
+            if post_id not in self.watched:
+                self.watched.add(post_id)
+                self.broker.subscribe(post_channel(post_id), self.on_message)
+
+    def unwatch(self, post_ids):
+        for post_id in post_ids:
+            if post_id in self.watched:
+                self.watched.discard(post_id)
+                self.broker.unsubscribe(post_channel(post_id), self.on_message)
+                self.pending.pop(str(post_id), None)
+
+    def open(self):
+        if self.user_id is not None:
+            self.broker.subscribe(user_channel(self.user_id), self.on_message)
+
+    def close(self):
+        self.unwatch(list(self.watched))
+        if self.user_id is not None:
+            self.broker.unsubscribe(user_channel(self.user_id), self.on_message)
+
+    async def send_json(self, payload):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(payload)})
+
+    async def ticker(self):
+        while True:
+            await asyncio.sleep(settings.LIVE_TICK_SECONDS)
+            if self.pending:
+                pending, self.pending = self.pending, {}
+                await self.send_json({'type': 'counters', 'posts': pending})
+
+    async def sender(self):
+        while True:
+            await self.send_json(await self.outbox.get())
+
+    def handle(self, text):
+        try:
+            frame = json.loads(text)
+            action = frame['action']
+            post_ids = [int(post_id) for post_id in frame.get('posts', [])]
+        except (ValueError, TypeError, KeyError):
+            return {'type': 'error', 'detail': 'invalid frame'}
+        if action == 'watch':
+            self.watch(post_ids)
+        elif action == 'unwatch':
+            self.unwatch(post_ids)
+        else:
+            return {'type': 'error', 'detail': f'unknown action {action}'}
+        return {'type': 'watching', 'posts': sorted(self.watched)}
+
+
+async def websocket_application(scope, receive, send):
+    """Raw ASGI WebSocket endpoint at ``/ws/live/``; mounted by ``tiktok_app.asgi``."""
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+    if scope['path'] != LIVE_PATH:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    await send({'type': 'websocket.accept'})
+    connection = LiveConnection(send, _user_id(scope))
+    connection.open()
+    tasks = [asyncio.create_task(connection.ticker()), asyncio.create_task(connection.sender())]
+    try:
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                break
+            if event['type'] == 'websocket.receive' and event.get('text'):
+                await connection.send_json(connection.handle(event['text']))
+    finally:
+        connection.close()
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,263 @@
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from posts.management.commands.seed_scale import PowerLaw
+from posts.models import HashtagModel, PostModel
+from posts.view_buffer import view_buffer
+from users.models import Follow, UserModel
+
+# (name, weight, method, path, body): a scrolling-heavy mix. ``{post}``/``{user}`` are drawn
+# power-law from recent posts and their authors, ``{word}`` from hashtag names.
+DEFAULT_MIX = [
+    ('posts:list', 20, 'GET', '/posts/', None),
+    ('posts:for_you', 15, 'GET', '/posts/for_you/', None),
+    ('posts:following', 10, 'GET', '/posts/following/', None),
+    ('posts:detail', 12, 'GET', '/posts/{post}/', None),
+    ('posts:comments', 8, 'GET', '/posts/{post}/comments/', None),
+    ('posts:search', 3, 'GET', '/posts/search/?q={word}', None),
+    ('posts:hashtags_trending', 2, 'GET', '/posts/hashtags/trending/', None),
+    ('posts:notifications', 3, 'GET', '/posts/notifications/', None),
+    ('users:detail', 4, 'GET', '/users/{user}/', None),
+    ('users:posts', 6, 'GET', '/users/{user}/posts/', None),
+    ('users:me', 2, 'GET', '/users/me/', None),
+    ('posts:views', 8, 'POST', '/posts/views/', {'events': [{'post': '{post}'}]}),
+    ('posts:like', 4, 'POST', '/posts/likes/', {'post': '{post}'}),
+    ('posts:comment', 1, 'POST', '/posts/comments/', {'post': '{post}', 'text': 'nice {word}'}),
+    ('users:follow', 1, 'POST', '/users/follow/{user}/', None),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _fill(template, values):
+    if isinstance(template, str):
+        filled = template.format(**values)
+        return int(filled) if template in ('{post}', '{user}') else filled
+    if isinstance(template, dict):
+        return {key: _fill(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [_fill(value, values) for value in template]
+    return template
+
+
+class Command(BaseCommand):
+    help = ("Replay a weighted request mix (reads and writes of the feed, post, comment and profile endpoints) "
+            "against the in-process test client or a running server, and report p50/p95/p99 latency and "
+            "throughput per endpoint as JSON. In-process writes are rolled back so runs stay comparable.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--warmup', type=int, default=50, help="Requests sent first and not measured.")
+        parser.add_argument('--url', help="Base URL of a running server, e.g. http://127.0.0.1:8000 "
+                                          "(default: Django's test client in this process).")
+        parser.add_argument('--concurrency', type=int, default=1, help="Parallel clients (with --url).")
+        parser.add_argument('--user', help="Username to send the requests as (default: the most active follower).")
+        parser.add_argument('--token', help="Bearer token to use with --url instead of minting one.")
+        parser.add_argument('--mix', help="JSON file: a list of {name, weight, method, path, body}.")
+        parser.add_argument('--commit', action='store_true', help="Keep in-process writes instead of rolling back.")
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+        parser.add_argument('--baseline', help="Earlier JSON report to compare p95 and throughput against.")
+
+    def handle(self, *args, **options):
+        if options['url'] is None and options['concurrency'] != 1:
+            raise CommandError("--concurrency needs --url: the test client runs in this process.")
+        self.rng = random.Random(options['random_seed'])
+        self.mix = self._load_mix(options['mix'])
+        self._load_pools(options['user'])
+
+        if options['url']:
+            report = self._run(self._http_sender(options['url'], options['token']), options)
+        elif options['commit']:
+            report = self._run(self._client_sender(), options)
+        else:
+            try:
+                with transaction.atomic():
+                    report = self._run(self._client_sender(), options)
+                    # buffered views would otherwise be flushed by a timer after the rollback
+                    view_buffer.flush()
+                    raise Rollback
+            except Rollback:
+                pass
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            self._compare(report, options['baseline'])
+
+    # ============================
+    # 🔹 SETUP
+    # ============================
+
+    def _load_mix(self, path):
+        if path is None:
+            return DEFAULT_MIX
+        with open(path) as fh:
+            entries = json.load(fh)
+        try:
+            return [(entry['name'], entry['weight'], entry.get('method', 'GET').upper(), entry['path'],
+                     entry.get('body')) for entry in entries]
+        except (KeyError, TypeError) as exc:
+            raise CommandError(f"Invalid mix file: {exc}")
+
+    def _load_pools(self, username):
+        if username:
+            self.user = UserModel.objects.filter(username=username).first()
+        else:
+            follower_id = (Follow.objects.values('follower_id').order_by()
+                           .annotate(n=Count('id')).order_by('-n').values_list('follower_id', flat=True).first())
+            self.user = UserModel.objects.filter(id=follower_id).first() or UserModel.objects.order_by('id').first()
+        if self.user is None:
+            raise CommandError("No users: run seed_scale first.")
+
+        recent = list(PostModel.objects.order_by('-created_at', '-id').values_list('id', 'user_id')[:2000])
+        if not recent:
+            raise CommandError("No posts: run seed_scale first.")
+        self.posts = PowerLaw([post_id for post_id, _ in recent], 1.0, self.rng)
+        self.users = PowerLaw({user_id for _, user_id in recent if user_id != self.user.id} or {self.user.id},
+                              1.0, self.rng)
+        self.words = list(HashtagModel.objects.order_by('id').values_list('name', flat=True)[:200]) or ['dance']
+        self.weights = [entry[1] for entry in self.mix]
+
+    def _next_request(self):
+        name, _, method, path, body = self.rng.choices(self.mix, weights=self.weights)[0]
+        values = {'post': self.posts.one(), 'user': self.users.one(), 'word': self.rng.choice(self.words)}
+        return name, method, _fill(path, values), _fill(body, values)
+
+    # ============================
+    # 🔹 SENDERS
+    # ============================
+
+    def _client_sender(self):
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+        def send(method, path, body):
+            if method == 'GET':
+                response = client.get(path)
+            else:
+                response = client.generic(method, path, json.dumps(body or {}), content_type='application/json')
+            return response.status_code
+
+        return send
+
+    def _http_sender(self, base_url, token):
+        token = token or str(RefreshToken.for_user(self.user).access_token)
+        base_url = base_url.rstrip('/')
+
+        def send(method, path, body):
+            data = json.dumps(body or {}).encode() if method != 'GET' else None
+            request = urllib.request.Request(base_url + path, data=data, method=method, headers={
+                'Authorization': f'Bearer {token}', 'Content-Type': 'application/json',
+            })
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as error:
+                return error.code
+
+        return send
+
+    # ============================
+    # 🔹 RUN & REPORT
+    # ============================
+
+    def _run(self, send, options):
+        for _ in range(options['warmup']):
+            _, method, path, body = self._next_request()
+            send(method, path, body)
+
+        # drawn up front so that runs with the same seed replay the same requests
+        plan = [self._next_request() for _ in range(options['requests'])]
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+
+        def timed(request):
+            name, method, path, body = request
+            started = time.perf_counter()
+            status = send(method, path, body)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                samples[name].append(elapsed)
+                if status >= 400:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        if options['concurrency'] > 1:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                list(pool.map(timed, plan))
+        else:
+            for request in plan:
+                timed(request)
+        duration = time.perf_counter() - started
+
+        endpoints = {name: self._summary(timings, errors[name], duration) for name, timings in sorted(samples.items())}
+        return {
+            'target': options['url'] or 'test-client',
+            'requests': len(plan),
+            'concurrency': options['concurrency'],
+            'duration_s': round(duration, 3),
+            'throughput_rps': round(len(plan) / duration, 1) if duration else None,
+            'overall': self._summary([t for timings in samples.values() for t in timings], sum(errors.values()),
+                                     duration),
+            'endpoints': endpoints,
+        }
+
+    def _summary(self, timings, errors, duration):
+        timings = sorted(timings)
+        return {
+            'count': len(timings),
+            'errors': errors,
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'max_ms': round(timings[-1], 2),
+            'throughput_rps': round(len(timings) / duration, 1) if duration else None,
+        }
+
+    def _compare(self, report, path):
+        with open(path) as fh:
+            baseline = json.load(fh)
+
+        def change(new, old):
+            if not old or new is None:
+                return '     n/a'
+            return f'{(new - old) / old * 100:+7.1f}%'
+
+        rows = [('overall', report['overall'], baseline.get('overall', {}))]
+        rows += [(name, stats, baseline.get('endpoints', {}).get(name, {}))
+                 for name, stats in report['endpoints'].items()]
+        self.stderr.write(f"{'endpoint':28} {'p95 ms':>9} {'vs base':>8} {'rps':>8} {'vs base':>8}")
+        for name, stats, old in rows:
+            self.stderr.write(f"{name:28} {stats['p95_ms']:9.2f} {change(stats['p95_ms'], old.get('p95_ms'))} "
+                              f"{stats['throughput_rps']:8.1f} {change(stats['throughput_rps'], old.get('throughput_rps'))}")
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from posts.cards import CARD_COLUMNS, PostCardRenderer
+from posts.models import HashtagModel, MusicModel, PostModel
+from posts.serializers import PostModelSerializer
+from posts.viewer_state import ViewerState
+from users.models import UserModel
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Time PostModelSerializer(many=True) against the PostCardRenderer fast path, "
+            "reported per 1,000 posts.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5, help="Best of this many runs.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                missing = options['posts'] - PostModel.objects.count()
+                if missing > 0:
+                    self.stdout.write(f"Creating {missing} temporary posts (rolled back afterwards)...")
+                    self._create_posts(missing)
+                self._run(options['posts'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _create_posts(self, count):
+        user, _ = UserModel.objects.get_or_create(username='benchmark_post_cards')
+        music, _ = MusicModel.objects.get_or_create(music_name='benchmark_post_cards', defaults={'singer': 'bench'})
+        hashtags = [HashtagModel.objects.get_or_create(name=f'benchmark{i}')[0] for i in range(3)]
+        posts = PostModel.objects.bulk_create(
+            PostModel(user=user, music=music, title=f'post {i}', description='benchmark',
+                      post=f'posts/benchmark_{i}.mp4')
+            for i in range(count)
+        )
+        through = PostModel.hashtags.through
+        through.objects.bulk_create(
+            through(postmodel_id=post.id, hashtagmodel_id=hashtag.id) for post in posts for hashtag in hashtags
+        )
+
+    def _best(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def _run(self, count, repeat):
+        viewer = UserModel.objects.order_by('id').first()
+        queryset = PostModel.objects.order_by('-created_at', '-id')[:count]
+        instances = list(queryset.select_related('user', 'music').prefetch_related(Prefetch('hashtags')))
+        rows = list(queryset.values(*CARD_COLUMNS))
+        count = len(rows)
+        if not count:
+            self.stdout.write("No posts to render.")
+            return
+        state = ViewerState.for_posts(viewer, [row['id'] for row in rows])
+
+        serializer = self._best(
+            repeat, lambda: PostModelSerializer(instances, many=True, context={'viewer_state': state}).data)
+        # the card path includes its author/music/hashtag lookups; the serializer's are prefetched above
+        cards = self._best(repeat, lambda: PostCardRenderer(viewer_state=state).render(rows))
+
+        scale = 1000 / count
+        self.stdout.write(f"{count} posts, best of {repeat}:")
+        self.stdout.write(f"  PostModelSerializer: {serializer * scale * 1000:8.1f} ms / 1,000 posts")
+        self.stdout.write(f"  PostCardRenderer:    {cards * scale * 1000:8.1f} ms / 1,000 posts")
+        self.stdout.write(self.style.SUCCESS(f"  speed-up: {serializer / cards:.1f}x"))
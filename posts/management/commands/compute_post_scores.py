@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import PostModel, PostScoreModel, LikeModel, ViewModel
+from posts.ranking import build_score_rows, score_window_start, warm_affinity
+
+
+class Command(BaseCommand):
+    help = 'Recompute "For You" candidate scores (run periodically, e.g. every few minutes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--affinities', action='store_true',
+                            help="Also refresh cached affinity vectors of users active in the last day.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        window_start = score_window_start()
+
+        last_id = 0
+        scored = 0
+        while True:
+            posts = list(
+                PostModel.objects.filter(id__gt=last_id, created_at__gte=window_start)
+                .order_by('id').prefetch_related('hashtags')[:batch_size]
+            )
+            if not posts:
+                break
+            last_id = posts[-1].id
+
+            with transaction.atomic():
+                PostScoreModel.objects.bulk_create(
+                    build_score_rows(posts, now),
+                    update_conflicts=True,
+                    unique_fields=['post'],
+                    update_fields=['score', 'genre', 'hashtag_ids', 'updated_at'],
+                )
+            scored += len(posts)
+
+        expired, _ = PostScoreModel.objects.filter(post__created_at__lt=window_start).delete()
+        self.stdout.write(self.style.SUCCESS(f"Scored {scored} posts, dropped {expired} expired candidates."))
+
+        if options['affinities']:
+            since = now - timedelta(days=1)
+            user_ids = set(LikeModel.objects.filter(created_at__gte=since).values_list('user_id', flat=True))
+            user_ids.update(ViewModel.objects.filter(created_at__gte=since).values_list('user_id', flat=True))
+            for user_id in user_ids:
+                warm_affinity(user_id)
+            self.stdout.write(self.style.SUCCESS(f"Refreshed affinity for {len(user_ids)} users."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = "Roll hourly hashtag usage buckets into the 1h/24h/7d trending lists (run every few minutes)."
+
+    def handle(self, *args, **options):
+        summary = compute_trending()
+        for window, count in summary.items():
+            self.stdout.write(self.style.SUCCESS(f"{window}: {count} trending hashtags"))
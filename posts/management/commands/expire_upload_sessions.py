@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned upload sessions and their partial files (run hourly)."
+
+    def handle(self, *args, **options):
+        count = expire_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Expired {count} upload sessions."))
@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.media import claim_jobs, enqueue_missing, run_job
+
+
+def _init_worker():
+    # forked children must not reuse the parent's database connections;
+    # spawned children start without Django configured
+    django.setup()
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Render image variants and poster frames for queued media jobs, using a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Pool size (default MEDIA_WORKERS).")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+        parser.add_argument('--backfill', action='store_true',
+                            help="First queue every existing avatar, cover and post without current variants.")
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or settings.MEDIA_WORKERS
+        done = failed = 0
+        if options['backfill']:
+            self.stdout.write(f"Queued {enqueue_missing()} existing files.")
+
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            while True:
+                job_ids = claim_jobs(options['batch_size'])
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                connections.close_all()
+                for ok in pool.map(run_job, job_ids):
+                    if ok:
+                        done += 1
+                    else:
+                        failed += 1
+                self.stdout.write(f"Processed {len(job_ids)} jobs ({done} done, {failed} failed so far).")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {done + failed} jobs: {done} done, {failed} failed."))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import PostModel, LikeModel, SaveModel, RepostModel, CommentModel, ViewModel, PostViewSketchModel
+
+COUNTER_SOURCES = {
+    'likes_count': LikeModel,
+    'saves_count': SaveModel,
+    'reposts_count': RepostModel,
+    'comments_count': CommentModel,
+    'views_count': ViewModel,
+}
+
+
+class Command(BaseCommand):
+    help = "Recompute PostModel's denormalized counters from the engagement tables, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing it.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fields = list(COUNTER_SOURCES)
+        last_id = 0
+        checked = fixed = 0
+
+        while True:
+            posts = list(
+                PostModel.objects.filter(id__gt=last_id).order_by('id').only('id', *fields)[:batch_size]
+            )
+            if not posts:
+                break
+            last_id = posts[-1].id
+            ids = [post.id for post in posts]
+
+            actual = {}
+            for field, model in COUNTER_SOURCES.items():
+                rows = (model.objects.filter(post_id__in=ids).order_by()
+                        .values('post_id').annotate(c=Count('id')).values_list('post_id', 'c'))
+                actual[field] = dict(rows)
+
+            # anonymous views only exist as HyperLogLog estimates
+            for post_id, estimate in PostViewSketchModel.objects.filter(post_id__in=ids).values_list('post_id', 'estimate'):
+                actual['views_count'][post_id] = actual['views_count'].get(post_id, 0) + estimate
+
+            changed = []
+            for post in posts:
+                dirty = False
+                for field in fields:
+                    value = actual[field].get(post.id, 0)
+                    if getattr(post, field) != value:
+                        setattr(post, field, value)
+                        dirty = True
+                if dirty:
+                    changed.append(post)
+
+            if changed and not options['dry_run']:
+                with transaction.atomic():
+                    PostModel.objects.bulk_update(changed, fields)
+
+            checked += len(posts)
+            fixed += len(changed)
+
+        verb = "would be fixed" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts, {fixed} {verb}."))
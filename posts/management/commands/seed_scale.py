@@ -0,0 +1,296 @@
+import itertools
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import search
+from posts.feeds import celebrity_ids
+from posts.models import PostModel, HashtagModel, MusicModel, LikeModel, CommentModel, ReplyModel, SaveModel, \
+    RepostModel, ViewModel, TimelineModel, HashtagUsageModel
+from posts.trending import BUCKET_RETENTION, current_bucket
+from users.models import Follow, UserModel
+
+WORDS = ('dance', 'funny', 'cat', 'dog', 'food', 'recipe', 'travel', 'music', 'cover', 'prank', 'fitness', 'gym',
+         'makeup', 'outfit', 'car', 'game', 'anime', 'study', 'coding', 'family', 'baby', 'drama', 'vlog', 'tashkent')
+# --scale multiplies every size; the defaults are a laptop-sized world
+SIZES = {
+    'users': 1000, 'follows': 20000, 'musics': 200, 'hashtags': 500, 'posts': 5000, 'likes': 50000,
+    'comments': 10000, 'replies': 5000, 'saves': 5000, 'reposts': 2000, 'views': 100000,
+}
+
+
+class PowerLaw:
+    """Draws ids with Zipf-like weights ``1 / rank ** alpha`` (ranks shuffled, so popularity is not id order)."""
+
+    def __init__(self, ids, alpha, rng):
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.cum_weights = list(itertools.accumulate(1 / (rank ** alpha) for rank in range(1, len(self.ids) + 1)))
+        self.rng = rng
+
+    def sample(self, k=1):
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+    def one(self):
+        return self.sample(1)[0]
+
+
+@contextmanager
+def explicit_created_at(*models):
+    """Let bulk_create keep the ``created_at`` we generate instead of auto_now_add's now()."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = ("Bulk-generate a synthetic dataset (users, power-law follows, posts with music/hashtags/genres, "
+            "likes, comments, replies, saves, reposts, views) for load testing. "
+            "Sizes scale with --scale; --scale 1000 is tens of millions of rows.")
+
+    def add_arguments(self, parser):
+        for name, size in SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=None, help=f"Rows to create (default {size} x scale).")
+        parser.add_argument('--scale', type=float, default=1.0)
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help="Power-law exponent for who gets followed and which posts get engagement.")
+        parser.add_argument('--days', type=int, default=30, help="Spread posts over this many past days.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help="Prefix of generated usernames, hashtags and songs.")
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--password', default='seed', help="Password of every generated user.")
+        parser.add_argument('--skip-timelines', action='store_true',
+                            help="Do not backfill the followers' timelines (the Following feed).")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not recount counters or rebuild scores, trending and the search index.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['random_seed'])
+        self.batch_size = options['batch_size']
+        self.alpha = options['alpha']
+        self.prefix = prefix = options['prefix']
+        self.now = timezone.now()
+        self.start = self.now - timedelta(days=options['days'])
+        sizes = {name: options[name] if options[name] is not None else int(size * options['scale'])
+                 for name, size in SIZES.items()}
+
+        if UserModel.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users named {prefix}_* already exist; pick another --prefix.")
+        if not sizes['users'] or not sizes['posts']:
+            raise CommandError("Need at least one user and one post.")
+
+        # (hashtag_id, bucket) -> [posts, engagement] for the trending roll-up
+        self.usage = defaultdict(lambda: [0, 0])
+        started = time.perf_counter()
+
+        with explicit_created_at(PostModel, LikeModel, CommentModel, ReplyModel, SaveModel, RepostModel, ViewModel):
+            users = self._users(sizes['users'], options['password'])
+            self._follows(users, sizes['follows'])
+            musics = self._create(MusicModel, 'musics', (
+                MusicModel(singer=f'{prefix} singer {i % 50}', music_name=f'{prefix}_song_{i}',
+                           file=f'music/{prefix}_{i}.mp3')
+                for i in range(sizes['musics'])
+            ))
+            hashtags = self._create(HashtagModel, 'hashtags', (
+                HashtagModel(name=f'{prefix}_{self.rng.choice(WORDS)}_{i}') for i in range(sizes['hashtags'])
+            ))
+            posts = self._posts(users, musics, hashtags, sizes['posts'])
+            self._engagement(users, posts, sizes)
+        self._hashtag_usage()
+
+        if not options['skip_timelines']:
+            self._timelines(users)
+        if not options['skip_derived']:
+            self._derived()
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s."))
+
+    # ============================
+    # 🔹 HELPERS
+    # ============================
+
+    def _create(self, model, label, objects, ignore_conflicts=False):
+        """bulk_create ``objects`` (any iterable) in batches; returns the new ids (None with ignore_conflicts)."""
+        started = time.perf_counter()
+        ids = [] if not ignore_conflicts else None
+        created = 0
+        objects = iter(objects)
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                break
+            model.objects.bulk_create(batch, batch_size=self.batch_size, ignore_conflicts=ignore_conflicts)
+            if ids is not None:
+                ids.extend(obj.pk for obj in batch)
+            created += len(batch)
+        elapsed = time.perf_counter() - started
+        rate = created / elapsed if elapsed else 0
+        note = ' (duplicates skipped)' if ignore_conflicts else ''
+        self.stdout.write(f"{label}: {created:,} rows{note} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+        return ids
+
+    def _moment_after(self, moment):
+        return moment + (self.now - moment) * self.rng.random() ** 2
+
+    def _count_usage(self, hashtag_ids, moment, posts=0, engagement=0):
+        if not hashtag_ids or self.now - moment > BUCKET_RETENTION:
+            return
+        bucket = current_bucket(moment)
+        for hashtag_id in hashtag_ids:
+            counts = self.usage[hashtag_id, bucket]
+            counts[0] += posts
+            counts[1] += engagement
+
+    # ============================
+    # 🔹 GENERATORS
+    # ============================
+
+    def _users(self, count, password):
+        password = make_password(password)
+        return self._create(UserModel, 'users', (
+            UserModel(username=f'{self.prefix}_{i}', password=password, first_name=self.rng.choice(WORDS).title(),
+                      bio=' '.join(self.rng.sample(WORDS, 3)))
+            for i in range(count)
+        ))
+
+    def _follows(self, users, count):
+        """Uniformly chosen followers, power-law chosen followees: a few accounts get most of the follows."""
+        if len(users) < 2:
+            return
+        followees = PowerLaw(users, self.alpha, self.rng)
+
+        def rows():
+            for _ in range(count):
+                follower, following = self.rng.choice(users), followees.one()
+                if follower != following:
+                    yield Follow(follower_id=follower, following_id=following)
+
+        self._create(Follow, 'follows', rows(), ignore_conflicts=True)
+
+    def _posts(self, users, musics, hashtags, count):
+        creators = PowerLaw(users, self.alpha, self.rng)
+        tags = PowerLaw(hashtags, self.alpha, self.rng) if hashtags else None
+        songs = PowerLaw(musics, self.alpha, self.rng) if musics else None
+        genres = PostModel.GenreChoice.values
+        post_tags, post_created = [], []
+
+        def rows():
+            for i in range(count):
+                created_at = self.start + (self.now - self.start) * self.rng.random()
+                hashtag_ids = sorted(set(tags.sample(self.rng.randint(0, 3)))) if tags else []
+                post_tags.append(hashtag_ids)
+                post_created.append(created_at)
+                self._count_usage(hashtag_ids, created_at, posts=1)
+                words = self.rng.sample(WORDS, 3)
+                yield PostModel(
+                    user_id=creators.one(), music_id=songs.one() if songs and self.rng.random() < 0.8 else None,
+                    post=f'posts/{self.prefix}_{i}.mp4', title=' '.join(words),
+                    description=' '.join(f'#{word}' for word in words), genre=self.rng.choice(genres),
+                    created_at=created_at,
+                )
+
+        post_ids = self._create(PostModel, 'posts', rows())
+        through = PostModel.hashtags.through
+        self._create(through, 'post hashtags', (
+            through(postmodel_id=post_id, hashtagmodel_id=hashtag_id)
+            for post_id, hashtag_ids in zip(post_ids, post_tags) for hashtag_id in hashtag_ids
+        ))
+        # what the engagement generators need to date events and credit hashtags
+        self.post_created = dict(zip(post_ids, post_created))
+        self.post_tags = dict(zip(post_ids, post_tags))
+        return post_ids
+
+    def _engagement(self, users, posts, sizes):
+        hot = PowerLaw(posts, self.alpha, self.rng)
+
+        def rows(model, count, engagement=True, **extra):
+            for _ in range(count):
+                post_id = hot.one()
+                created_at = self._moment_after(self.post_created[post_id])
+                if engagement:
+                    self._count_usage(self.post_tags[post_id], created_at, engagement=1)
+                yield model(post_id=post_id, user_id=self.rng.choice(users), created_at=created_at,
+                            **{name: value() for name, value in extra.items()})
+
+        def text():
+            return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(1, 8)))
+
+        self._create(LikeModel, 'likes', rows(LikeModel, sizes['likes']), ignore_conflicts=True)
+        self._create(SaveModel, 'saves', rows(SaveModel, sizes['saves']), ignore_conflicts=True)
+        self._create(RepostModel, 'reposts', rows(RepostModel, sizes['reposts']), ignore_conflicts=True)
+        self._create(ViewModel, 'views', rows(ViewModel, sizes['views'], engagement=False), ignore_conflicts=True)
+
+        # replies need the post and date of the comment they answer
+        comment_posts = []
+
+        def comment_rows():
+            for comment in rows(CommentModel, sizes['comments'], text=text):
+                comment_posts.append((comment.post_id, comment.created_at))
+                yield comment
+
+        comments = self._create(CommentModel, 'comments', comment_rows())
+        if not comments:
+            return
+        threads = PowerLaw(range(len(comments)), self.alpha, self.rng)
+
+        def reply_rows():
+            for _ in range(sizes['replies']):
+                index = threads.one()
+                post_id, commented_at = comment_posts[index]
+                yield ReplyModel(post_id=post_id, comment_id=comments[index], user_id=self.rng.choice(users),
+                                 text=text(), created_at=self._moment_after(commented_at))
+
+        self._create(ReplyModel, 'replies', reply_rows())
+
+    def _hashtag_usage(self):
+        self._create(HashtagUsageModel, 'hashtag usage buckets', (
+            HashtagUsageModel(hashtag_id=hashtag_id, bucket=bucket, posts_count=posts, engagement_count=engagement)
+            for (hashtag_id, bucket), (posts, engagement) in self.usage.items()
+        ), ignore_conflicts=True)
+
+    def _timelines(self, users):
+        """What fan-out would have written: each follower gets the followee's latest FEED_FOLLOW_BACKFILL posts."""
+        celebrities = celebrity_ids()
+        limit = settings.FEED_FOLLOW_BACKFILL
+
+        def rows():
+            for start in range(0, len(users), 1000):
+                followees = [user_id for user_id in users[start:start + 1000] if user_id not in celebrities]
+                recent = defaultdict(list)
+                for user_id, post_id, created_at in (
+                        PostModel.objects.filter(user_id__in=followees)
+                        .order_by('user_id', '-created_at', '-id').values_list('user_id', 'id', 'created_at')
+                        .iterator(chunk_size=self.batch_size)):
+                    if len(recent[user_id]) < limit:
+                        recent[user_id].append((post_id, created_at))
+                follows = (Follow.objects.filter(following_id__in=recent.keys())
+                           .values_list('follower_id', 'following_id').iterator(chunk_size=self.batch_size))
+                for follower_id, following_id in follows:
+                    for post_id, created_at in recent[following_id]:
+                        yield TimelineModel(user_id=follower_id, post_id=post_id, created_at=created_at)
+
+        self._create(TimelineModel, 'timeline rows', rows(), ignore_conflicts=True)
+
+    def _derived(self):
+        """Counters, "For You" scores, trending lists and the search index, as the periodic jobs would."""
+        commands = [('recount_post_counters', {'batch_size': self.batch_size}),
+                    ('compute_post_scores', {'batch_size': self.batch_size}),
+                    ('compute_trending_hashtags', {})]
+        if search.is_available():
+            commands.append(('rebuild_search_index', {'batch_size': self.batch_size}))
+        for command, options in commands:
+            self.stdout.write(f"{command}...")
+            call_command(command, stdout=self.stdout, **options)
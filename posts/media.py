@@ -0,0 +1,257 @@
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from posts.models import MediaJobModel, MusicModel, PostModel
+from posts.response_cache import bump_version
+from users.models import UserModel
+
+logger = logging.getLogger(__name__)
+
+MediaSpec = namedtuple('MediaSpec', 'model field variants_field')
+
+SPECS = {
+    MediaJobModel.Kind.Avatar: MediaSpec(UserModel, 'avatar', 'avatar_variants'),
+    MediaJobModel.Kind.MusicCover: MediaSpec(MusicModel, 'cover', 'cover_variants'),
+    MediaJobModel.Kind.Post: MediaSpec(PostModel, 'post', 'media_variants'),
+}
+FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def needs_processing(instance, kind):
+    """True when the stored variants were not made from the file currently on ``instance``."""
+    spec = SPECS[kind]
+    source = getattr(instance, spec.field).name or ''
+    return source != (getattr(instance, spec.variants_field) or {}).get('source', '')
+
+
+def enqueue(kind, object_id):
+    """Queue a job unless one is already waiting; with BACKGROUND_TASKS_EAGER it runs inline."""
+    if settings.BACKGROUND_TASKS_EAGER:
+        job = MediaJobModel.objects.create(kind=kind, object_id=object_id, status=MediaJobModel.Status.Running)
+        process_job(job.pk)
+        return
+    waiting = MediaJobModel.objects.filter(kind=kind, object_id=object_id, status=MediaJobModel.Status.Pending)
+    if not waiting.exists():
+        MediaJobModel.objects.create(kind=kind, object_id=object_id)
+
+
+def enqueue_missing():
+    """Queue every existing row whose variants are missing or stale (for a first run / backfill)."""
+    count = 0
+    for kind, spec in SPECS.items():
+        rows = spec.model.objects.exclude(**{spec.field: ''}).exclude(**{f'{spec.field}__isnull': True}) \
+            .only('pk', spec.field, spec.variants_field)
+        for instance in rows.iterator():
+            if needs_processing(instance, kind):
+                enqueue(kind, instance.pk)
+                count += 1
+    return count
+
+
+# ============================
+# 🔹 RENDERING
+# ============================
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'jpeg':
+        image.convert('RGB').save(buffer, FORMATS[fmt], quality=settings.MEDIA_JPEG_QUALITY, optimize=True,
+                                  progressive=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        image.save(buffer, FORMATS[fmt], quality=settings.MEDIA_WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def render_variants(image, kind, object_id):
+    """Write every size of ``MEDIA_VARIANT_SIZES[kind]`` as WebP and JPEG; returns ``{size: {fmt: name}}``."""
+    image = ImageOps.exif_transpose(image)
+    variants = {}
+    for size_name, size in settings.MEDIA_VARIANT_SIZES[kind].items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[size_name] = {
+            fmt: default_storage.save(f'variants/{kind}/{object_id}/{size_name}.{fmt}',
+                                      ContentFile(_encode(resized, fmt)))
+            for fmt in FORMATS
+        }
+    return variants
+
+
+def _local_copy(field):
+    """A filesystem path for ``field``: its own path on local storage, else a temp copy."""
+    try:
+        return field.path, False
+    except NotImplementedError:
+        suffix = os.path.splitext(field.name)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp, field.open('rb') as source:
+            shutil.copyfileobj(source, tmp)
+        return tmp.name, True
+
+
+def extract_poster(field):
+    """One frame of a video as a PIL image, or None when ffmpeg is not installed or fails."""
+    binary = shutil.which(settings.MEDIA_FFMPEG_BINARY)
+    if binary is None:
+        return None
+    path, is_temp = _local_copy(field)
+    try:
+        result = subprocess.run(
+            [binary, '-v', 'error', '-ss', str(settings.MEDIA_POSTER_OFFSET), '-i', path,
+             '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-'],
+            capture_output=True, timeout=60, check=False,
+        )
+    finally:
+        if is_temp:
+            os.remove(path)
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return Image.open(io.BytesIO(result.stdout))
+
+
+def _open_source(kind, field):
+    try:
+        with field.open('rb') as fh:
+            image = Image.open(fh)
+            image.load()
+            return image
+    except (UnidentifiedImageError, OSError):
+        if kind != MediaJobModel.Kind.Post:
+            raise
+    # post videos: use a poster frame instead
+    return extract_poster(field)
+
+
+def build_variants(kind, instance):
+    spec = SPECS[kind]
+    field = getattr(instance, spec.field)
+    variants = {'source': field.name or ''}
+    if not field:
+        return variants
+    image = _open_source(kind, field)
+    if image is not None:
+        variants.update(render_variants(image, kind, instance.pk))
+    return variants
+
+
+def _variant_names(variants):
+    return {name for key, formats in variants.items() if key != 'source' for name in formats.values()}
+
+
+# ============================
+# 🔹 JOBS
+# ============================
+
+def process_job(job_id):
+    """
+    Render the variants of one queued job and record them on the model. The UPDATE is
+    conditional on the source file name, so a file replaced mid-job is not overwritten
+    with stale variants (its own job will follow).
+    """
+    job = MediaJobModel.objects.get(pk=job_id)
+    spec = SPECS[job.kind]
+    instance = spec.model.objects.filter(pk=job.object_id).first()
+    try:
+        if instance is not None:
+            old = getattr(instance, spec.variants_field) or {}
+            variants = build_variants(job.kind, instance)
+            field_name = getattr(instance, spec.field).name or ''
+            changes = {spec.variants_field: variants}
+            if any(field.name == 'updated_at' for field in spec.model._meta.fields):
+                changes['updated_at'] = timezone.now()
+            with transaction.atomic():
+                updated = spec.model.objects.filter(pk=instance.pk, **{spec.field: field_name}).update(**changes)
+                if updated:
+                    # a queryset update sends no post_save; cached responses still show the old URLs
+                    bump_version(spec.model)
+            stale = _variant_names(old) - _variant_names(variants) if updated else _variant_names(variants)
+            for name in stale:
+                default_storage.delete(name)
+    except Exception as error:
+        job.attempts += 1
+        job.error = f'{type(error).__name__}: {error}'
+        job.status = (MediaJobModel.Status.Failed if job.attempts >= settings.MEDIA_JOB_MAX_ATTEMPTS
+                      else MediaJobModel.Status.Pending)
+        job.save(update_fields=['attempts', 'error', 'status', 'updated_at'])
+        logger.exception("Media job %s failed", job_id)
+        return False
+
+    job.status = MediaJobModel.Status.Done
+    job.error = ''
+    job.save(update_fields=['status', 'error', 'updated_at'])
+    return True
+
+
+def run_job(job_id):
+    """Entry point in the worker processes of the process_media command."""
+    close_old_connections()
+    try:
+        return process_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def reclaim_expired_jobs(now=None):
+    """
+    Jobs RUNNING for longer than ``MEDIA_JOB_LEASE`` seconds belong to a worker that died:
+    count the attempt and queue them again, or fail them after ``MEDIA_JOB_MAX_ATTEMPTS``.
+    """
+    now = now or timezone.now()
+    expired = MediaJobModel.objects.filter(status=MediaJobModel.Status.Running,
+                                           claimed_at__lt=now - timedelta(seconds=settings.MEDIA_JOB_LEASE))
+    changes = {'attempts': F('attempts') + 1, 'error': 'Lease expired: the worker did not finish the job',
+               'claimed_at': None, 'updated_at': now}
+    failed = expired.filter(attempts__gte=settings.MEDIA_JOB_MAX_ATTEMPTS - 1) \
+        .update(status=MediaJobModel.Status.Failed, **changes)
+    return failed + expired.update(status=MediaJobModel.Status.Pending, **changes)
+
+
+def claim_jobs(limit):
+    """
+    Move up to ``limit`` pending jobs to RUNNING (compare-and-set per row) and return their
+    ids; jobs whose lease expired are queued again first.
+    """
+    reclaim_expired_jobs()
+    claimed = []
+    candidates = MediaJobModel.objects.filter(status=MediaJobModel.Status.Pending) \
+        .order_by('created_at').values_list('id', flat=True)[:limit]
+    for job_id in candidates:
+        if MediaJobModel.objects.filter(pk=job_id, status=MediaJobModel.Status.Pending) \
+                .update(status=MediaJobModel.Status.Running, claimed_at=timezone.now()):
+            claimed.append(job_id)
+    return claimed
+
+
+# ============================
+# 🔹 SERIALIZATION
+# ============================
+
+def variant_url(variants, size_name, request=None):
+    """
+    URL of one variant in the format the client asked for (``?image_format=jpeg``)
+    or ``MEDIA_VARIANT_FORMAT``; None until the worker has produced it.
+    """
+    formats = (variants or {}).get(size_name)
+    if not formats:
+        return None
+    fmt = settings.MEDIA_VARIANT_FORMAT
+    requested = getattr(request, 'query_params', {}).get('image_format')
+    if requested in FORMATS:
+        fmt = requested
+    url = default_storage.url(formats[fmt])
+    return request.build_absolute_uri(url) if request is not None else url
@@ -0,0 +1,156 @@
+"""
+Prometheus metrics served at ``/metrics``.
+
+Collectors live in this process. Under a pre-forking server, point the environment
+variable ``PROMETHEUS_MULTIPROC_DIR`` at an empty directory that all workers share
+(wipe it on deploy). Each worker then writes its samples to memory-mapped files there,
+and a scrape of any worker adds up the files of all of them. Call
+``mark_process_dead(pid)`` when a worker exits, e.g. from gunicorn's ``child_exit`` hook.
+"""
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, \
+    generate_latest, multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request, by view, action and method.',
+    ['view', 'action', 'method'], buckets=LATENCY_BUCKETS,
+)
+RESPONSES = Counter(
+    'http_responses', 'Responses sent, by view, action, method and status code.',
+    ['view', 'action', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries run while handling one request, by view and action.',
+    ['view', 'action'], buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'db_query_duration_seconds', 'Time spent in SQL queries, by database alias.',
+    ['alias'], buckets=QUERY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    'response_cache_lookups', 'Response cache lookups, by cached view and result (hit or miss).',
+    ['view', 'result'],
+)
+CREATED = Counter(
+    'tiktok_objects_created', 'Likes, posts, comments and follows created.',
+    ['kind'],
+)
+
+_request_queries = ContextVar('metrics_request_queries', default=None)
+
+
+# ============================
+# 🔹 DATABASE
+# ============================
+
+def _timed_execute(alias):
+    def execute_sql(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            DB_QUERIES.labels(alias).observe(time.perf_counter() - started)
+            counter = _request_queries.get()
+            if counter is not None:
+                counter[0] += 1
+
+    return execute_sql
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Time every query of every connection, request or not (workers, management commands)."""
+    if settings.METRICS_ENABLED and not getattr(connection, '_metrics_wrapped', False):
+        connection.execute_wrappers.append(_timed_execute(connection.alias))
+        connection._metrics_wrapped = True
+
+
+# ============================
+# 🔹 MIDDLEWARE
+# ============================
+
+def _labels(request):
+    """``(view, action)``: the DRF viewset and its action (``list``, ``like``...), else the view name and method."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved', request.method.lower()
+    func = match.func
+    cls = getattr(func, 'cls', None)
+    if cls is None:
+        return match.view_name or func.__name__, request.method.lower()
+    actions = getattr(func, 'actions', None) or {}
+    return cls.__name__, actions.get(request.method.lower(), request.method.lower())
+
+
+class MetricsMiddleware:
+    """Latency histogram, status counter and per-request query count of every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        counter = [0]
+        token = _request_queries.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        elapsed = time.perf_counter() - started
+
+        view, action = _labels(request)
+        if view != 'metrics':
+            REQUEST_LATENCY.labels(view, action, request.method).observe(elapsed)
+            RESPONSES.labels(view, action, request.method, str(response.status_code)).inc()
+            REQUEST_QUERIES.labels(view, action).observe(counter[0])
+        return response
+
+
+# ============================
+# 🔹 BUSINESS COUNTERS & ENDPOINT
+# ============================
+
+def record_created(kind):
+    if settings.METRICS_ENABLED:
+        CREATED.labels(kind).inc()
+
+
+def registry():
+    """The default registry, or one that reads every worker's files in multiprocess mode."""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    collector_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector_registry)
+    return collector_registry
+
+
+def metrics_view(request):
+    """
+    Prometheus text format, for ``Authorization: Bearer <METRICS_TOKEN>``. Without a token
+    the endpoint does not exist, except under DEBUG where it is open.
+    """
+    if not settings.METRICS_ENABLED:
+        return HttpResponseNotFound()
+    if settings.METRICS_TOKEN is None:
+        if not settings.DEBUG:
+            return HttpResponseNotFound()
+    else:
+        sent = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(sent.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()):
+            return HttpResponseForbidden()
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTER_SOURCES = {
+    'likes_count': 'LikeModel',
+    'saves_count': 'SaveModel',
+    'reposts_count': 'RepostModel',
+    'comments_count': 'CommentModel',
+    'views_count': 'ViewModel',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    PostModel = apps.get_model('posts', 'PostModel')
+    updates = {}
+    for field, model_name in COUNTER_SOURCES.items():
+        related = apps.get_model('posts', model_name)
+        counts = (related.objects.filter(post=OuterRef('pk'))
+                  .order_by().values('post').annotate(c=Count('id')).values('c'))
+        updates[field] = Coalesce(Subquery(counts), Value(0))
+    PostModel.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_repostmodel_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postmodel',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postmodel',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postmodel',
+            name='reposts_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postmodel',
+            name='saves_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postmodel',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
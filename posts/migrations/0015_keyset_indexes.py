@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_postmodel_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postmodel',
+            index=models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postmodel',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='post_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repostmodel',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='repost_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repostmodel',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='repost_post_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_timelinemodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScoreModel',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='posts.postmodel')),
+                ('score', models.FloatField()),
+                ('genre', models.CharField(blank=True, max_length=30, null=True)),
+                ('hashtag_ids', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score'], name='post_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:05
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    PostModel = apps.get_model('posts', 'PostModel')
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS posts_postsearch USING fts5("
+        "title, description, hashtags, tokenize='unicode61 remove_diacritics 2')"
+    )
+    rows = [
+        (post.id, post.title, post.description or '', ' '.join(tag.name for tag in post.hashtags.all()))
+        for post in PostModel.objects.prefetch_related('hashtags')
+    ]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO posts_postsearch (rowid, title, description, hashtags) VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS posts_postsearch")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_postviewsketchmodel'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
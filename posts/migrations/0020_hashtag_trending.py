@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_postsearch_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashtagUsageModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('engagement_count', models.PositiveIntegerField(default=0)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='posts.hashtagmodel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='hashtag_usage_bucket_idx')],
+                'unique_together': {('hashtag', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingHashtagModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('1h', '1 hour'), ('24h', '24 hours'), ('7d', '7 days')], max_length=3)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('engagement_count', models.PositiveIntegerField(default=0)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.hashtagmodel')),
+            ],
+            options={
+                'ordering': ['window', 'rank'],
+                'unique_together': {('window', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# (old model, target_type, value, FK column on the old table); likes go first, so a
+# user who somehow has both a like and a dislike on the same target keeps the like
+OLD_TABLES = [
+    ('CommentLikeModel', 'comment', 1, 'comment_id'),
+    ('ReplyCommentLikeModel', 'reply', 1, 'reply_comment_id'),
+    ('CommentDislikeModel', 'comment', -1, 'comment_id'),
+    ('ReplyCommentDislikeModel', 'reply', -1, 'reply_comment_id'),
+]
+TARGETS = [('CommentModel', 'comment'), ('ReplyModel', 'reply')]
+
+
+def copy_reactions(apps, schema_editor):
+    """One INSERT ... SELECT per old table (keeps created_at), then the stored counters."""
+    qn = schema_editor.quote_name
+    ReactionModel = apps.get_model('posts', 'ReactionModel')
+    reactions = qn(ReactionModel._meta.db_table)
+    for model_name, target_type, value, column in OLD_TABLES:
+        old = qn(apps.get_model('posts', model_name)._meta.db_table)
+        schema_editor.execute(
+            f"INSERT INTO {reactions} (user_id, target_type, target_id, value, created_at) "
+            f"SELECT o.user_id, %s, o.{qn(column)}, %s, o.created_at FROM {old} o "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {reactions} r WHERE r.target_type = %s "
+            f"AND r.target_id = o.{qn(column)} AND r.user_id = o.user_id)",
+            [target_type, value, target_type],
+        )
+
+    for model_name, target_type in TARGETS:
+        updates = {}
+        for field, value in (('likes_count', 1), ('dislikes_count', -1)):
+            counts = (ReactionModel.objects.filter(target_type=target_type, target_id=OuterRef('pk'), value=value)
+                      .order_by().values('target_id').annotate(c=Count('id')).values('c'))
+            updates[field] = Coalesce(Subquery(counts), Value(0))
+        apps.get_model('posts', model_name).objects.update(**updates)
+
+
+def restore_reactions(apps, schema_editor):
+    qn = schema_editor.quote_name
+    reactions = qn(apps.get_model('posts', 'ReactionModel')._meta.db_table)
+    for model_name, target_type, value, column in OLD_TABLES:
+        old = qn(apps.get_model('posts', model_name)._meta.db_table)
+        schema_editor.execute(
+            f"INSERT INTO {old} (user_id, {qn(column)}, created_at) "
+            f"SELECT user_id, target_id, created_at FROM {reactions} WHERE target_type = %s AND value = %s",
+            [target_type, value],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_hashtag_trending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commentmodel',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='commentmodel',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='replymodel',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='replymodel',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ReactionModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('comment', 'Comment'), ('reply', 'Reply')], max_length=10)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('value', models.SmallIntegerField(choices=[(1, 'Like'), (-1, 'Dislike')])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'target_type', 'target_id'], name='reaction_user_target_idx')],
+                'unique_together': {('target_type', 'target_id', 'user')},
+            },
+        ),
+        migrations.RunPython(copy_reactions, restore_reactions),
+        migrations.DeleteModel(
+            name='CommentDislikeModel',
+        ),
+        migrations.DeleteModel(
+            name='CommentLikeModel',
+        ),
+        migrations.DeleteModel(
+            name='ReplyCommentDislikeModel',
+        ),
+        migrations.DeleteModel(
+            name='ReplyCommentLikeModel',
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:00
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    apps.get_model('posts', 'NotificationModel').objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_reactionmodel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationmodel',
+            name='actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='notificationmodel',
+            name='actors_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notificationmodel',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notificationmodel',
+            index=models.Index(fields=['receiver', '-updated_at', '-id'], name='notif_receiver_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationmodel',
+            index=models.Index(fields=['receiver', 'notif_type', 'post', 'is_read'], name='notif_group_idx'),
+        ),
+    ]
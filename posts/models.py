@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from users.models import UserModel
 
 
@@ -15,6 +18,8 @@ class MusicModel(models.Model):
     music_name = models.CharField(max_length=100, unique=True)
     file = models.FileField(upload_to='music/')
     created_at = models.DateTimeField(auto_now_add=True)
+    # resized copies written by the process_media worker (posts.media)
+    cover_variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"{self.music_name} - {self.singer} "
@@ -49,8 +54,27 @@ class PostModel(models.Model):
     music = models.ForeignKey(MusicModel, on_delete=models.SET_NULL, null=True, blank=True, related_name="posts")
     hashtags = models.ManyToManyField(HashtagModel, blank=True, related_name="posts")
     created_at = models.DateTimeField(auto_now_add=True)
+    # also moved by counter updates (posts.counters), so it validates conditional GETs
+    updated_at = models.DateTimeField(auto_now=True)
     saved = models.BooleanField(default=False)
     genre = models.CharField(max_length=30, choices=GenreChoice, null=True, blank=True)
+    # poster frame variants written by the process_media worker (posts.media)
+    media_variants = models.JSONField(default=dict, blank=True)
+
+    # Denormalized counters, kept current by posts.counters (F-expression updates)
+    # and repaired by the recount_post_counters management command.
+    likes_count = models.PositiveIntegerField(default=0)
+    saves_count = models.PositiveIntegerField(default=0)
+    reposts_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    views_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # keyset pagination: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.user.username
@@ -74,32 +98,12 @@ class CommentModel(models.Model):
     text = models.CharField(max_length=300)
     created_at = models.DateTimeField(auto_now_add=True)
 
-    def __str__(self):
-        return f"{self.user.username}: {self.text[:20]}"
-
-
-class CommentLikeModel(models.Model):
-    comment = models.ForeignKey(CommentModel, on_delete=models.CASCADE, related_name="likes")
-    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name="comment_likes")
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        unique_together = ("comment", "user",)
-
-    def __str__(self):
-        return f"{self.user.username} liked comment {self.comment.id}"
-
-
-class CommentDislikeModel(models.Model):
-    comment = models.ForeignKey(CommentModel, on_delete=models.CASCADE, related_name="dislikes")
-    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name="comment_dislikes")
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        unique_together = ("comment", "user",)
+    # denormalized from ReactionModel, kept current by posts.reactions.toggle_reaction
+    likes_count = models.PositiveIntegerField(default=0)
+    dislikes_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
-        return f"{self.user.username} disliked comment {self.comment.id}"
+        return f"{self.user.username}: {self.text[:20]}"
 
 
 class ReplyModel(models.Model):
@@ -109,32 +113,42 @@ class ReplyModel(models.Model):
     text = models.CharField(max_length=300)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    likes_count = models.PositiveIntegerField(default=0)
+    dislikes_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"{self.user.username} replied: {self.text[:20]}"
 
 
-class ReplyCommentLikeModel(models.Model):
-    reply_comment = models.ForeignKey(ReplyModel, on_delete=models.CASCADE, related_name="reply_likes")
-    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name="reply_comment_likes")
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        unique_together = ("reply_comment", "user")
-
-    def __str__(self):
-        return f"{self.user.username} liked comment {self.reply_comment.id}"
+class ReactionModel(models.Model):
+    """
+    One like or dislike by a user on a comment or a reply. Replaces the four
+    per-kind like/dislike tables; a user has at most one reaction per target.
+    """
+    class TargetType(models.TextChoices):
+        Comment = 'comment', 'Comment'
+        Reply = 'reply', 'Reply'
 
+    class Value(models.IntegerChoices):
+        Like = 1, 'Like'
+        Dislike = -1, 'Dislike'
 
-class ReplyCommentDislikeModel(models.Model):
-    reply_comment = models.ForeignKey(ReplyModel, on_delete=models.CASCADE, related_name="reply_dislikes")
-    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name="reply_comment_dislikes")
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='reactions')
+    target_type = models.CharField(max_length=10, choices=TargetType.choices)
+    target_id = models.PositiveBigIntegerField()
+    value = models.SmallIntegerField(choices=Value.choices)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ("reply_comment", "user")
+        unique_together = ['target_type', 'target_id', 'user']
+        indexes = [
+            # the viewer's reactions on a page of comments: user = ? AND target_type = ? AND target_id IN (...)
+            models.Index(fields=['user', 'target_type', 'target_id'], name='reaction_user_target_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} disliked comment {self.reply_comment.id}"
+        verb = 'liked' if self.value == self.Value.Like else 'disliked'
+        return f"{self.user.username} {verb} {self.target_type} {self.target_id}"
 
 
 class ViewModel(models.Model):
@@ -149,6 +163,17 @@ class ViewModel(models.Model):
         return f"{self.user.username} viewed {self.post.id}"
 
 
+class PostViewSketchModel(models.Model):
+    """HyperLogLog sketch of anonymous visitors of a post (see posts.hll)."""
+    post = models.OneToOneField(PostModel, on_delete=models.CASCADE, primary_key=True, related_name='view_sketch')
+    registers = models.BinaryField()
+    estimate = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"~{self.estimate} anonymous views of {self.post_id}"
+
+
 class NotificationModel(models.Model):
     class NotifType(models.TextChoices):
         Like = "LIKE", "Like"
@@ -165,6 +190,21 @@ class NotificationModel(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # grouped notifications: ``sender`` is the latest actor, ``actors_count`` how many
+    # acted on the same (receiver, post, type) within NOTIFICATION_GROUP_WINDOW
+    actors_count = models.PositiveIntegerField(default=1)
+    # the distinct actors behind ``actors_count``, so a repeated action is not counted twice
+    actor_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # the receiver's list, newest activity first (keyset pagination)
+            models.Index(fields=['receiver', '-updated_at', '-id'], name='notif_receiver_updated_idx'),
+            # finding the open group an event is folded into
+            models.Index(fields=['receiver', 'notif_type', 'post', 'is_read'], name='notif_group_idx'),
+        ]
+
     def __str__(self):
         return f"Notif {self.notif_type} to {self.receiver.username}"
 
@@ -192,8 +232,149 @@ class RepostModel(models.Model):
     class Meta:
         unique_together = ['user', 'post']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='repost_user_created_id_idx'),
+            models.Index(fields=['post', '-created_at', '-id'], name='repost_post_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} reposted {self.post.title}"
 
 
+class TimelineModel(models.Model):
+    """
+    One row per (follower, post) for the "Following" feed, written when the post is
+    created (fan-out-on-write). ``created_at`` is copied from the post so a user's
+    timeline can be read newest-first straight off the (user, created_at, post) index.
+    """
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='timeline')
+    post = models.ForeignKey(PostModel, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in {self.user_id}'s timeline"
+
+
+class PostScoreModel(models.Model):
+    """
+    Precomputed "For You" candidate row, rebuilt by the compute_post_scores command.
+    Holds everything the ranker needs so serving never touches the engagement tables.
+    """
+    post = models.OneToOneField(PostModel, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    score = models.FloatField()
+    genre = models.CharField(max_length=30, null=True, blank=True)
+    hashtag_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='post_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}: {self.score:.4f}"
+
+
+class HashtagUsageModel(models.Model):
+    """Hourly bucket of how often a hashtag was used and engaged with."""
+    hashtag = models.ForeignKey(HashtagModel, on_delete=models.CASCADE, related_name='usage')
+    bucket = models.DateTimeField()
+    posts_count = models.PositiveIntegerField(default=0)
+    engagement_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['hashtag', 'bucket']
+        indexes = [
+            models.Index(fields=['bucket'], name='hashtag_usage_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.hashtag_id} @ {self.bucket:%Y-%m-%d %H:00}"
+
+
+class TrendingHashtagModel(models.Model):
+    """Precomputed trending list per window, rebuilt by compute_trending_hashtags."""
+    class Window(models.TextChoices):
+        Hour = '1h', '1 hour'
+        Day = '24h', '24 hours'
+        Week = '7d', '7 days'
+
+    window = models.CharField(max_length=3, choices=Window)
+    rank = models.PositiveIntegerField()
+    hashtag = models.ForeignKey(HashtagModel, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    posts_count = models.PositiveIntegerField(default=0)
+    engagement_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['window', 'rank']
+        ordering = ['window', 'rank']
+
+    def __str__(self):
+        return f"{self.window} #{self.rank}: {self.hashtag_id}"
+
+
+class UploadSessionModel(models.Model):
+    """
+    A resumable, chunked video upload (posts.uploads). Bytes are appended to a temporary
+    file under MEDIA_ROOT; ``offset`` is how many of ``size`` bytes have arrived. On
+    finalize the sha256 is checked and the file becomes a new post's ``PostModel.post``.
+    """
+    class Status(models.TextChoices):
+        Uploading = 'UPLOADING', 'Uploading'
+        # claimed by one finalize request, so a retried finalize cannot create a second post
+        Finalizing = 'FINALIZING', 'Finalizing'
+        Complete = 'COMPLETE', 'Complete'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=Status, default=Status.Uploading)
+    post = models.ForeignKey(PostModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class MediaJobModel(models.Model):
+    """Queue of media to resize, consumed by the process_media management command."""
+    class Kind(models.TextChoices):
+        Avatar = 'avatar', 'Avatar'
+        MusicCover = 'music_cover', 'Music cover'
+        Post = 'post', 'Post'
+
+    class Status(models.TextChoices):
+        Pending = 'PENDING', 'Pending'
+        Running = 'RUNNING', 'Running'
+        Done = 'DONE', 'Done'
+        Failed = 'FAILED', 'Failed'
+
+    kind = models.CharField(max_length=20, choices=Kind)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=Status, default=Status.Pending)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # when a worker moved it to RUNNING; past MEDIA_JOB_LEASE the worker is presumed dead
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='media_job_queue_idx'),
+            models.Index(fields=['kind', 'object_id'], name='media_job_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.status}"
@@ -0,0 +1,241 @@
+import atexit
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from posts.broker import get_broker, user_channel
+from posts.models import NotificationModel, PostModel, CommentModel, ReplyModel
+from users.models import UserModel
+
+logger = logging.getLogger(__name__)
+
+VERBS = {
+    NotificationModel.NotifType.Like: 'liked your video',
+    NotificationModel.NotifType.Comment: 'commented on your video',
+    NotificationModel.NotifType.reply: 'replied to your comment',
+    NotificationModel.NotifType.Follow: 'started following you',
+}
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def notify(notif_type, receiver_id, sender_id, post_id=None, comment_id=None, reply_id=None):
+    """
+    Queue a notification event. Nothing is written in the request: the event is handed
+    to ``notification_buffer`` once the current transaction commits, and the buffer
+    folds it into a grouped notification in the background.
+    """
+    if receiver_id is None or receiver_id == sender_id:
+        return
+    event = (notif_type, receiver_id, sender_id, post_id, comment_id, reply_id)
+    transaction.on_commit(lambda: notification_buffer.add(event))
+
+
+def describe(notification):
+    """"alice and 312 others liked your video"."""
+    name = notification.sender.username
+    others = notification.actors_count - 1
+    if others == 1:
+        name = f"{name} and 1 other"
+    elif others > 1:
+        name = f"{name} and {others} others"
+    return f"{name} {VERBS.get(notification.notif_type, notification.notif_type.lower())}"
+
+
+# ============================
+# 🔹 UNREAD COUNT
+# ============================
+
+def unread_count(user_id):
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = NotificationModel.objects.filter(receiver_id=user_id, is_read=False).count()
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def mark_read(user_id, notification_ids=None):
+    notifications = NotificationModel.objects.filter(receiver_id=user_id, is_read=False)
+    if notification_ids is not None:
+        notifications = notifications.filter(id__in=notification_ids)
+    updated = notifications.update(is_read=True)
+    cache.delete(_unread_key(user_id))
+    if updated:
+        get_broker().publish(user_channel(user_id), {'type': 'unread', 'unread': unread_count(user_id)})
+    return updated
+
+
+# ============================
+# 🔹 GROUPING BUFFER
+# ============================
+
+class NotificationBuffer:
+    """
+    In-process buffer of notification events, flushed every
+    ``NOTIFICATION_FLUSH_INTERVAL`` seconds, when ``NOTIFICATION_BUFFER_MAX_EVENTS``
+    are pending, and at interpreter exit (inline with ``BACKGROUND_TASKS_EAGER``).
+
+    A flush groups events by ``(receiver, type, post)`` and folds each group into the
+    receiver's unread notification for that key created within
+    ``NOTIFICATION_GROUP_WINDOW`` seconds, or starts a new one: one SELECT, one
+    bulk insert and one bulk update per flush, however many events arrived.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._events = []
+        self._timer = None
+
+    def add(self, event):
+        with self._lock:
+            self._events.append(event)
+            should_flush = (settings.BACKGROUND_TASKS_EAGER
+                            or len(self._events) >= settings.NOTIFICATION_BUFFER_MAX_EVENTS)
+
+        if should_flush:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def _ensure_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(settings.NOTIFICATION_FLUSH_INTERVAL, self.flush_quietly)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush_quietly(self):
+        close_old_connections()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Notification buffer flush failed")
+        finally:
+            close_old_connections()
+
+    def _drain(self):
+        with self._lock:
+            events, self._events = self._events, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return events
+
+    def flush(self):
+        with self._flush_lock:
+            events = self._drain()
+            if not events:
+                return
+            groups = _group_events(_existing(events))
+            if groups:
+                rows = _write_groups(groups)
+                cache.delete_many([_unread_key(receiver_id) for receiver_id, _, _ in groups])
+                _push(rows)
+
+
+def _existing(events):
+    """Drop events whose users, post, comment or reply were deleted before the flush."""
+    def ids(model, values):
+        values = {value for value in values if value is not None}
+        return set(model.objects.filter(id__in=values).values_list('id', flat=True)) if values else set()
+
+    users = ids(UserModel, [event[1] for event in events] + [event[2] for event in events])
+    posts = ids(PostModel, [event[3] for event in events])
+    comments = ids(CommentModel, [event[4] for event in events])
+    replies = ids(ReplyModel, [event[5] for event in events])
+    return [
+        event for event in events
+        if event[1] in users and event[2] in users
+        and (event[3] is None or event[3] in posts)
+        and (event[4] is None or event[4] in comments)
+        and (event[5] is None or event[5] in replies)
+    ]
+
+
+def _group_events(events):
+    groups = {}
+    for notif_type, receiver_id, sender_id, post_id, comment_id, reply_id in events:
+        group = groups.setdefault((receiver_id, notif_type, post_id), {'senders': {}})
+        # dict as an ordered set: the most recent actor ends up last
+        group['senders'].pop(sender_id, None)
+        group['senders'][sender_id] = True
+        group['comment_id'] = comment_id
+        group['reply_id'] = reply_id
+    return groups
+
+
+def _write_groups(groups):
+    now = timezone.now()
+    since = now - timedelta(seconds=settings.NOTIFICATION_GROUP_WINDOW)
+
+    with transaction.atomic():
+        open_rows = {}
+        rows = NotificationModel.objects.select_for_update().filter(
+            receiver_id__in={receiver_id for receiver_id, _, _ in groups},
+            notif_type__in={notif_type for _, notif_type, _ in groups},
+            is_read=False,
+            created_at__gte=since,
+        ).order_by('created_at', 'id')
+        for row in rows:
+            open_rows[(row.receiver_id, row.notif_type, row.post_id)] = row
+
+        created, updated = [], []
+        for (receiver_id, notif_type, post_id), group in groups.items():
+            senders = list(group['senders'])
+            row = open_rows.get((receiver_id, notif_type, post_id))
+            if row is None:
+                created.append(NotificationModel(
+                    receiver_id=receiver_id, notif_type=notif_type, post_id=post_id,
+                    sender_id=senders[-1], actors_count=len(senders), actor_ids=senders,
+                    comment_id=group['comment_id'], reply_id=group['reply_id'], updated_at=now,
+                ))
+                continue
+
+            # actors already in the group are not counted again (e.g. like, unlike, like again);
+            # rows from before actor_ids was recorded only know their latest actor
+            known = set(row.actor_ids or [row.sender_id])
+            new_senders = [sender_id for sender_id in senders if sender_id not in known]
+            if not new_senders:
+                continue
+            row.actors_count += len(new_senders)
+            row.actor_ids = list(row.actor_ids or [row.sender_id]) + new_senders
+            row.sender_id = senders[-1]
+            row.comment_id = group['comment_id']
+            row.reply_id = group['reply_id']
+            row.updated_at = now
+            updated.append(row)
+
+        NotificationModel.objects.bulk_create(created)
+        if updated:
+            NotificationModel.objects.bulk_update(
+                updated, ['actors_count', 'actor_ids', 'sender', 'comment', 'reply', 'updated_at'])
+    return created + updated
+
+
+def _push(rows):
+    """Send the new/updated notifications and the fresh unread count to live sockets."""
+    from posts.serializers import NotificationModelSerializer
+
+    senders = UserModel.objects.in_bulk({row.sender_id for row in rows})
+    broker = get_broker()
+    for row in rows:
+        row.sender = senders[row.sender_id]
+        broker.publish(user_channel(row.receiver_id), {
+            'type': 'notification',
+            'notification': NotificationModelSerializer(row).data,
+            'unread': unread_count(row.receiver_id),
+        })
+
+
+notification_buffer = NotificationBuffer()
+atexit.register(notification_buffer.flush_quietly)
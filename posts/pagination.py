@@ -0,0 +1,151 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def keyset_seek(queryset, position, ordering_field='created_at', tiebreak_field='id', ascending=False):
+    """
+    Order ``queryset`` by ``(ordering_field, tiebreak_field)`` (newest first unless
+    ``ascending``) and keep only rows strictly after ``position``.
+    """
+    if ascending:
+        queryset = queryset.order_by(ordering_field, tiebreak_field)
+        after, bound, tiebreak = 'gt', 'gte', 'gt'
+    else:
+        queryset = queryset.order_by(f'-{ordering_field}', f'-{tiebreak_field}')
+        after, bound, tiebreak = 'lt', 'lte', 'lt'
+
+    if position is not None:
+        value, pk = position
+        queryset = queryset.filter(**{f'{ordering_field}__{bound}': value}).filter(
+            Q(**{f'{ordering_field}__{after}': value}) | Q(**{f'{tiebreak_field}__{tiebreak}': pk})
+        )
+    return queryset
+
+
+def encode_position(position):
+    value, pk = position
+    raw = json.dumps([value.isoformat(), pk]).encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_position(encoded):
+    """Inverse of ``encode_position``; raises ``ValueError`` on a malformed cursor."""
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        return datetime.fromisoformat(value), int(pk)
+    except TypeError as exc:
+        raise ValueError(str(exc))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination on ``(ordering_field, id)``, newest first.
+
+    Each page is ``WHERE (created_at, id) < (cursor) ORDER BY created_at DESC, id DESC
+    LIMIT n + 1``: no COUNT(*), no OFFSET, and rows inserted while a client scrolls
+    never shift the pages it has not fetched yet. The cursor is an opaque
+    base64 token of the last row's position.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    ordering_field = 'created_at'
+    ascending = False
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.next_position = None
+
+        results = self.fetch(queryset, self.decode_cursor(request), self.page_size + 1)
+        if len(results) > self.page_size:
+            results = results[:self.page_size]
+            last = results[-1]
+            if isinstance(last, dict):
+                # a ``.values()`` page, e.g. the post cards of posts.cards
+                self.next_position = (last[self.ordering_field], last['id'])
+            else:
+                self.next_position = (getattr(last, self.ordering_field), last.id)
+        return results
+
+    def fetch(self, queryset, position, limit):
+        return list(keyset_seek(queryset, position, self.ordering_field, ascending=self.ascending)[:limit])
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            return decode_position(encoded)
+        except ValueError:
+            raise ParseError(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        return encode_position(position)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PostKeysetPagination(KeysetPagination):
+    page_size = 10
+
+
+class CommentCursorPagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class ReplyCursorPagination(KeysetPagination):
+    """Replies read oldest first, continuing from a comment's inline replies."""
+    page_size = 20
+    max_page_size = 100
+    ascending = True
+
+
+class NotificationPagination(KeysetPagination):
+    """Newest activity first: a grouped notification moves up when someone new joins it."""
+    page_size = 20
+    max_page_size = 100
+    ordering_field = 'updated_at'
+
+
+class RankedFeedPagination(LimitOffsetPagination):
+    """Offset pagination over an already ranked list of post ids (the "For You" feed)."""
+    default_limit = 10
+    max_limit = 50
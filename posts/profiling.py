@@ -0,0 +1,260 @@
+import hmac
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+# upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Timings of one sampled request, filled in by the middleware, the SQL wrapper and ``span``."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.spans = defaultdict(float)
+        self._open = defaultdict(int)
+        self.view_done = None
+        self.render_ms = 0.0
+
+    def elapsed_ms(self, since=None):
+        return (time.perf_counter() - (since or self.started)) * 1000
+
+    def execute_sql(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block into the sampled request's ``name`` total (``serialize`` for serializers and
+    post cards). Nested spans of one name count once; unsampled requests pay one ContextVar read.
+    """
+    profile = _current.get()
+    if profile is None or profile._open[name]:
+        yield
+        return
+    profile._open[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._open[name] -= 1
+        profile.spans[name] += (time.perf_counter() - started) * 1000
+
+
+_instrumented = False
+
+
+def instrument_serializers():
+    """Wrap ``Serializer.data``/``ListSerializer.data`` in ``span('serialize')`` (once per process)."""
+    global _instrumented
+    if _instrumented:
+        return
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__['data']
+
+        def data(self, _fget=prop.fget):
+            with span('serialize'):
+                return _fget(self)
+
+        setattr(cls, 'data', property(data))
+    _instrumented = True
+
+
+# ============================
+# 🔹 AGGREGATION
+# ============================
+
+class RouteStats:
+    """Counters and a latency histogram of one route within one minute."""
+    __slots__ = ('count', 'errors', 'buckets', 'total_ms', 'sql_count', 'sql_ms', 'serialize_ms', 'render_ms', 'bytes')
+
+    def __init__(self):
+        self.count = self.errors = self.sql_count = self.bytes = 0
+        self.total_ms = self.sql_ms = self.serialize_ms = self.render_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, other):
+        for name in self.__slots__:
+            if name == 'buckets':
+                self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+def _quantile(buckets, count, fraction):
+    """Upper bound (ms) of the bucket holding the ``fraction`` quantile; None past the last bound."""
+    rank = fraction * count
+    seen = 0
+    for bound, n in zip(LATENCY_BUCKETS + (None,), buckets):
+        seen += n
+        if seen >= rank:
+            return bound
+    return None
+
+
+class ProfilingStats:
+    """
+    Rolling per-route histograms of this process: one ``RouteStats`` per route and minute,
+    minutes older than ``PROFILING_WINDOW_MINUTES`` dropped. Only sampled requests are added.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._minutes = deque()  # (minute, {route: RouteStats})
+
+    def record(self, route, profile, total_ms, status, size):
+        minute = int(time.time() // 60)
+        with self._lock:
+            if not self._minutes or self._minutes[-1][0] != minute:
+                self._minutes.append((minute, defaultdict(RouteStats)))
+                self._trim(minute)
+            stats = self._minutes[-1][1][route]
+            stats.count += 1
+            stats.errors += status >= 500
+            stats.buckets[bisect_left(LATENCY_BUCKETS, total_ms)] += 1
+            stats.total_ms += total_ms
+            stats.sql_count += profile.sql_count
+            stats.sql_ms += profile.sql_ms
+            stats.serialize_ms += profile.spans.get('serialize', 0.0)
+            stats.render_ms += profile.render_ms
+            stats.bytes += size
+
+    def _trim(self, minute):
+        while self._minutes and self._minutes[0][0] <= minute - settings.PROFILING_WINDOW_MINUTES:
+            self._minutes.popleft()
+
+    def snapshot(self):
+        with self._lock:
+            self._trim(int(time.time() // 60))
+            merged = defaultdict(RouteStats)
+            for _, routes in self._minutes:
+                for route, stats in routes.items():
+                    merged[route].add(stats)
+
+        def mean(value, count):
+            return round(value / count, 2) if count else None
+
+        return {
+            route: {
+                'samples': stats.count,
+                'errors': stats.errors,
+                'mean_ms': mean(stats.total_ms, stats.count),
+                'p50_ms': _quantile(stats.buckets, stats.count, 0.50),
+                'p95_ms': _quantile(stats.buckets, stats.count, 0.95),
+                'p99_ms': _quantile(stats.buckets, stats.count, 0.99),
+                'sql_queries': mean(stats.sql_count, stats.count),
+                'sql_ms': mean(stats.sql_ms, stats.count),
+                'serialize_ms': mean(stats.serialize_ms, stats.count),
+                'render_ms': mean(stats.render_ms, stats.count),
+                'bytes': mean(stats.bytes, stats.count),
+                'histogram_ms': {f'le_{bound}': n for bound, n in zip(LATENCY_BUCKETS + ('inf',), stats.buckets)},
+            }
+            for route, stats in sorted(merged.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._minutes.clear()
+
+
+stats = ProfilingStats()
+
+
+# ============================
+# 🔹 MIDDLEWARE
+# ============================
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return f'{request.method} {match.view_name if match else "unresolved"}'
+
+
+def _size(response):
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+def _forced(request):
+    """``X-Profile: <PROFILING_TOKEN>``, or ``X-Profile: 1`` under DEBUG."""
+    sent = request.headers.get('X-Profile')
+    if not sent:
+        return False
+    if settings.DEBUG and sent == '1':
+        return True
+    return settings.PROFILING_TOKEN is not None and hmac.compare_digest(sent.encode(), settings.PROFILING_TOKEN.encode())
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a ``PROFILING_SAMPLE_RATE`` fraction of requests: SQL count and time on every
+    database connection, serializer time, render time and response size, fed into the
+    per-route histograms served by ``ProfilingStatsView``. A request that forces profiling
+    (see ``_forced``) also gets them back in ``Server-Timing``; nobody else sees them.
+    Requests that are not sampled only cost a random() call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_serializers()
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+        forced = _forced(request)
+        if not forced and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.execute_sql))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total_ms = profile.elapsed_ms()
+        size = _size(response)
+        stats.record(_route(request), profile, total_ms, response.status_code, size)
+        if not forced:
+            return response
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={profile.sql_ms:.1f};desc="{profile.sql_count} queries"',
+            f'serialize;dur={profile.spans.get("serialize", 0.0):.1f}',
+            f'render;dur={profile.render_ms:.1f}',
+            f'total;dur={total_ms:.1f};desc="{size} bytes"',
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook: time it with a post-render callback
+        profile = _current.get()
+        if profile is not None:
+            profile.view_done = time.perf_counter()
+
+            def rendered(response):
+                profile.render_ms = profile.elapsed_ms(since=profile.view_done)
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,136 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from posts.models import PostModel, PostScoreModel, LikeModel, ViewModel
+
+ENGAGEMENT_WEIGHTS = {
+    'likes_count': 1.0,
+    'comments_count': 2.0,
+    'saves_count': 3.0,
+    'reposts_count': 4.0,
+    'views_count': 0.1,
+}
+AFFINITY_HISTORY = 200
+VIEW_AFFINITY_WEIGHT = 0.3
+MAX_AFFINITY_HASHTAGS = 50
+
+
+# ============================
+# 🔹 OFFLINE SCORING
+# ============================
+
+def engagement_score(post, now):
+    """Weighted engagement divided by age, so fresh posts with momentum float to the top."""
+    engagement = sum(getattr(post, field) * weight for field, weight in ENGAGEMENT_WEIGHTS.items())
+    age_hours = max((now - post.created_at).total_seconds() / 3600, 0)
+    return (engagement + 1) / (age_hours + 2) ** settings.FOR_YOU_GRAVITY
+
+
+def build_score_rows(posts, now):
+    """``PostScoreModel`` rows for ``posts`` (hashtags must be prefetched)."""
+    return [
+        PostScoreModel(
+            post_id=post.id,
+            score=engagement_score(post, now),
+            genre=post.genre,
+            hashtag_ids=[tag.id for tag in post.hashtags.all()],
+        )
+        for post in posts
+    ]
+
+
+# ============================
+# 🔹 VIEWER AFFINITY
+# ============================
+
+def _affinity_cache_key(user_id):
+    return f'for_you:affinity:{user_id}'
+
+
+def compute_affinity(user_id):
+    """
+    Normalized genre and hashtag weights from the user's recent likes and views.
+    Returns ``{'genres': {genre: w}, 'hashtags': {hashtag_id: w}}``.
+    """
+    liked = list(LikeModel.objects.filter(user_id=user_id).order_by('-created_at')
+                 .values_list('post_id', 'post__genre')[:AFFINITY_HISTORY])
+    viewed = list(ViewModel.objects.filter(user_id=user_id).order_by('-created_at')
+                  .values_list('post_id', 'post__genre')[:AFFINITY_HISTORY])
+
+    genres = Counter()
+    for _, genre in liked:
+        if genre:
+            genres[genre] += 1.0
+    for _, genre in viewed:
+        if genre:
+            genres[genre] += VIEW_AFFINITY_WEIGHT
+
+    hashtags = Counter(
+        PostModel.hashtags.through.objects
+        .filter(postmodel_id__in=[post_id for post_id, _ in liked])
+        .values_list('hashtagmodel_id', flat=True)
+    )
+
+    return {
+        'genres': _normalize(genres),
+        'hashtags': _normalize(Counter(dict(hashtags.most_common(MAX_AFFINITY_HASHTAGS)))),
+    }
+
+
+def _normalize(counter):
+    total = sum(counter.values())
+    if not total:
+        return {}
+    return {key: value / total for key, value in counter.items()}
+
+
+def get_affinity(user):
+    if user is None or not user.is_authenticated:
+        return {'genres': {}, 'hashtags': {}}
+    key = _affinity_cache_key(user.id)
+    affinity = cache.get(key)
+    if affinity is None:
+        affinity = compute_affinity(user.id)
+        cache.set(key, affinity, settings.FOR_YOU_AFFINITY_TIMEOUT)
+    return affinity
+
+
+def warm_affinity(user_id):
+    cache.set(_affinity_cache_key(user_id), compute_affinity(user_id), settings.FOR_YOU_AFFINITY_TIMEOUT)
+
+
+# ============================
+# 🔹 SERVING
+# ============================
+
+def rank_for_you(user):
+    """
+    Post ids for the viewer's "For You" feed, best first.
+
+    One read of the top candidates off the score index, then an in-memory
+    re-rank by the viewer's cached genre/hashtag affinity.
+    """
+    candidates = (PostScoreModel.objects.order_by('-score')
+                  .values_list('post_id', 'score', 'genre', 'hashtag_ids')[:settings.FOR_YOU_CANDIDATES])
+    affinity = get_affinity(user)
+    genre_affinity = affinity['genres']
+    hashtag_affinity = affinity['hashtags']
+
+    ranked = []
+    for post_id, score, genre, hashtag_ids in candidates:
+        boost = 1 + settings.FOR_YOU_GENRE_WEIGHT * genre_affinity.get(genre, 0)
+        if hashtag_affinity and hashtag_ids:
+            overlap = sum(hashtag_affinity.get(tag_id, 0) for tag_id in hashtag_ids)
+            boost *= 1 + settings.FOR_YOU_HASHTAG_WEIGHT * overlap
+        ranked.append((score * boost, post_id))
+
+    ranked.sort(reverse=True)
+    return [post_id for _, post_id in ranked]
+
+
+def score_window_start():
+    return timezone.now() - timedelta(days=settings.FOR_YOU_WINDOW_DAYS)
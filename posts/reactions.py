@@ -0,0 +1,78 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from posts.models import CommentModel, ReplyModel, ReactionModel
+
+TARGET_MODELS = {
+    ReactionModel.TargetType.Comment: CommentModel,
+    ReactionModel.TargetType.Reply: ReplyModel,
+}
+COUNTER_FIELDS = {
+    ReactionModel.Value.Like: 'likes_count',
+    ReactionModel.Value.Dislike: 'dislikes_count',
+}
+
+
+def bump_reaction_counters(target_type, target_id, deltas):
+    """Apply ``{value: delta}`` to the target's like/dislike counters in one UPDATE."""
+    updates = {
+        COUNTER_FIELDS[value]: Greatest(F(COUNTER_FIELDS[value]) + delta, 0)
+        for value, delta in deltas.items() if delta
+    }
+    if updates:
+        TARGET_MODELS[target_type].objects.filter(pk=target_id).update(**updates)
+
+
+def apply_reaction_deltas(target, deltas):
+    """Mirror the deltas of ``toggle_reaction`` on an already loaded comment/reply instance."""
+    for value, delta in deltas.items():
+        field = COUNTER_FIELDS[value]
+        setattr(target, field, max(getattr(target, field) + delta, 0))
+
+
+def toggle_reaction(user, target_type, target_id, value):
+    """
+    Press like (``value=1``) or dislike (``value=-1``) on a comment or reply.
+
+    Pressing the active reaction removes it, pressing the other one switches it.
+    Inside one transaction: the user's current reaction is read (and row-locked
+    where the backend supports it), then exactly one DELETE, UPDATE or INSERT on
+    ``ReactionModel`` and one counter UPDATE on the target (none when a concurrent
+    tap already made the change). Returns the user's
+    reaction afterwards (``1``, ``-1`` or ``None``) and the counter deltas applied.
+    """
+    reactions = ReactionModel.objects.filter(user=user, target_type=target_type, target_id=target_id)
+    with transaction.atomic():
+        current = reactions.select_for_update().values_list('value', flat=True).first()
+        # without row locks (SQLite) a concurrent tap may have changed the row since it was
+        # read: the counters only move when this DELETE/UPDATE actually changed a row
+        if current == value:
+            removed = reactions.filter(value=value).delete()[0]
+            state, deltas = None, {value: -1} if removed else {}
+        elif current is not None:
+            switched = reactions.filter(value=current).update(value=value)
+            state, deltas = value, {value: 1, current: -1} if switched else {}
+        else:
+            try:
+                with transaction.atomic():
+                    ReactionModel.objects.create(user=user, target_type=target_type, target_id=target_id,
+                                                 value=value)
+            except IntegrityError:
+                # a concurrent tap by the same user inserted first and counted it
+                return value, {}
+            state, deltas = value, {value: 1}
+        bump_reaction_counters(target_type, target_id, deltas)
+    return state, deltas
+
+
+def remove_reaction(reaction):
+    """Delete one reaction row and take it off its target's counter."""
+    with transaction.atomic():
+        if ReactionModel.objects.filter(pk=reaction.pk).delete()[0]:
+            bump_reaction_counters(reaction.target_type, reaction.target_id, {reaction.value: -1})
+
+
+def delete_target_reactions(target_type, target_ids):
+    """Drop the reactions of deleted comments/replies; there is no FK to cascade them."""
+    ReactionModel.objects.filter(target_type=target_type, target_id__in=list(target_ids)).delete()
@@ -0,0 +1,139 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from posts.metrics import CACHE_LOOKUPS
+
+# models whose writes invalidate at least one cached view; filled in by @cache_response
+tracked_models = set()
+
+
+def _version_key(model):
+    return f'response-cache:version:{model._meta.label_lower}'
+
+
+# ============================
+# 🔹 VERSIONS
+# ============================
+
+def get_versions(models):
+    """
+    Current version of each model. A missing counter (never bumped, or evicted) starts
+    at the current time in ns rather than 0, so it never lines up with old entries.
+    """
+    keys = {_version_key(model): model for model in models}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return [versions[key] for key in sorted(keys)]
+
+
+def bump_version(model):
+    """O(1) invalidation of every cached response that depends on ``model``, once the transaction commits."""
+    key = _version_key(model)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+# ============================
+# 🔹 METRICS
+# ============================
+
+class ResponseCacheMetrics:
+    """Per-view hit/miss counters of this process (also exported to Prometheus as ``response_cache_lookups``)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def record(self, name, hit):
+        with self._lock:
+            self._counts[name]['hits' if hit else 'misses'] += 1
+        CACHE_LOOKUPS.labels(name, 'hit' if hit else 'miss').inc()
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+metrics = ResponseCacheMetrics()
+
+
+# ============================
+# 🔹 DECORATOR
+# ============================
+
+def _cache_key(name, request, versions, per_user):
+    params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    parts = [name, request.get_host(), request.path, repr(params), repr(versions)]
+    if per_user:
+        parts.append(str(request.user.pk))
+    return 'response-cache:' + hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def cache_response(*models, timeout=None, per_user=False, merge=None, unless=None):
+    """
+    Cache the ``data`` of a view method's 200 responses, keyed by view, host, path,
+    query parameters and the version of every model in ``models``.
+
+    Saving or deleting an instance of any of them bumps its version (posts.signals),
+    so stale entries are never read again and simply expire. ``merge(view, request,
+    data, *args, **kwargs)`` runs after the lookup on hits and misses alike, for fields
+    that depend on the viewer or change too often to cache; ``unless(view, request)``
+    skips the cache for a request.
+
+        @cache_response(MusicModel)
+        def list(self, request, *args, **kwargs):
+            return super().list(request, *args, **kwargs)
+    """
+    tracked_models.update(models)
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED or request.method != 'GET' or \
+                    (unless is not None and unless(view, request)):
+                return method(view, request, *args, **kwargs)
+
+            name = f'{type(view).__name__}.{method.__name__}'
+            key = _cache_key(name, request, get_versions(models), per_user)
+            data = cache.get(key)
+            metrics.record(name, hit=data is not None)
+            if data is not None:
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+            else:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data,
+                          settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout)
+                response['X-Cache'] = 'MISS'
+
+            if merge is not None:
+                merged = merge(view, request, response.data, *args, **kwargs)
+                if isinstance(merged, Response):
+                    return merged
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,119 @@
+import re
+
+from django.db import connection
+from rest_framework.filters import SearchFilter
+
+from posts.models import PostModel
+
+SEARCH_TABLE = 'posts_postsearch'
+# bm25() column weights: title, description, hashtags
+BM25_WEIGHTS = (10.0, 2.0, 5.0)
+# matches returned per query, best rank first: ?search= and /posts/search/ list at most this many posts
+MAX_RESULTS = 500
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available():
+    """The index is an SQLite FTS5 virtual table; other backends fall back to LIKE search."""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 query: every word becomes a quoted prefix term,
+    all of them required. ``#cats`` and ``cats`` match the same way.
+    """
+    tokens = TOKEN_RE.findall(text.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+# ============================
+# 🔹 INDEX MAINTENANCE
+# ============================
+
+def _rows(posts):
+    return [
+        (post.id, post.title, post.description or '', ' '.join(tag.name for tag in post.hashtags.all()))
+        for post in posts
+    ]
+
+
+def index_posts(post_ids):
+    if not is_available() or not post_ids:
+        return
+    post_ids = list(post_ids)
+    posts = PostModel.objects.filter(id__in=post_ids).only('id', 'title', 'description').prefetch_related('hashtags')
+    rows = _rows(posts)
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', post_ids)
+        if rows:
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, description, hashtags) VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+
+def remove_posts(post_ids):
+    if not is_available() or not post_ids:
+        return
+    post_ids = list(post_ids)
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', post_ids)
+
+
+def rebuild_index(batch_size=1000):
+    """Drop every indexed row and re-index all posts in id order. Returns the number indexed."""
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    indexed = 0
+    last_id = 0
+    while True:
+        post_ids = list(PostModel.objects.filter(id__gt=last_id).order_by('id')
+                        .values_list('id', flat=True)[:batch_size])
+        if not post_ids:
+            break
+        index_posts(post_ids)
+        indexed += len(post_ids)
+        last_id = post_ids[-1]
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+# ============================
+# 🔹 QUERYING
+# ============================
+
+def search_post_ids(text, limit=MAX_RESULTS):
+    """Post ids matching ``text``, best BM25 rank first."""
+    match = build_match_query(text)
+    if not match:
+        return []
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+            f'ORDER BY bm25({SEARCH_TABLE}, {weights}) LIMIT %s',
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    ``?search=`` on posts through the FTS index instead of ``LIKE '%q%'`` over the hashtag join.
+    Only the ``MAX_RESULTS`` best-ranked matches are listed (in the view's own order), so a
+    broad term stops after that many posts; ``/posts/search/`` has the same cap, best first.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text or not is_available():
+            return super().filter_queryset(request, queryset, view)
+        return queryset.filter(id__in=search_post_ids(text))
@@ -1,3 +1,7 @@
+import os
+
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
 from posts.models import (
     PostModel,
@@ -5,14 +9,16 @@ from posts.models import (
     MusicModel,
     LikeModel,
     CommentModel,
-    CommentLikeModel,
-    CommentDislikeModel,
     ReplyModel,
-    ReplyCommentLikeModel,
-    ReplyCommentDislikeModel,
+    ReactionModel,
     ViewModel,
-    NotificationModel, SaveModel, RepostModel,
+    NotificationModel, SaveModel, RepostModel, UploadSessionModel,
 )
+from posts.comment_tree import replies_preview
+from posts.fieldsets import SparseFieldsetMixin
+from posts.media import variant_url
+from posts.notifications import describe
+from posts.pagination import encode_position
 from users.serializers import  UserModelSerializer
 
 
@@ -20,16 +26,23 @@ from users.serializers import  UserModelSerializer
 # 🔹 HASHTAG & MUSIC SERIALIZERS
 # ============================
 
-class HashtagModelSerializer(serializers.ModelSerializer):
+class HashtagModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = HashtagModel
         fields = "__all__"
 
 
-class MusicModelSerializer(serializers.ModelSerializer):
+class MusicModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = MusicModel
-        exclude = ("created_at",)
+        exclude = ("created_at", "cover_variants")
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        thumb = variant_url(instance.cover_variants, 'thumb', self.context.get('request'))
+        if thumb and 'cover' in data:
+            data['cover'] = thumb
+        return data
 
 
 # ============================
@@ -38,12 +51,18 @@ class MusicModelSerializer(serializers.ModelSerializer):
 # ============================
 # 🔹 COMMENT SERIALIZERS
 # ============================
+def _reacted(obj, user, target_type, value):
+    return ReactionModel.objects.filter(target_type=target_type, target_id=obj.id, user=user, value=value).exists()
+
+
 class CommentModelSerializer(serializers.ModelSerializer):
     user = UserModelSerializer(read_only=True)
     replies = serializers.SerializerMethodField()
+    replies_count = serializers.SerializerMethodField()
+    replies_next = serializers.SerializerMethodField()
 
-    likes_count = serializers.SerializerMethodField()
-    dislikes_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
+    dislikes_count = serializers.IntegerField(read_only=True)
     liked_by_current_user = serializers.SerializerMethodField()
     disliked_by_current_user = serializers.SerializerMethodField()
 
@@ -56,6 +75,8 @@ class CommentModelSerializer(serializers.ModelSerializer):
             "text",
             "created_at",
             "replies",
+            "replies_count",
+            "replies_next",
             "likes_count",
             "dislikes_count",
             "liked_by_current_user",
@@ -65,29 +86,53 @@ class CommentModelSerializer(serializers.ModelSerializer):
 
     def get_replies(self, obj):
         from posts.serializers import ReplyModelSerializer
-        replies = obj.replies.all().order_by("created_at")
-        return ReplyModelSerializer(replies, many=True, context=self.context).data
-
-    def get_likes_count(self, obj):
-        # CommentLikeModel import topida mavjud
-        return CommentLikeModel.objects.filter(comment=obj).count()
-
-    def get_dislikes_count(self, obj):
-        return CommentDislikeModel.objects.filter(comment=obj).count()
+        # only the first REPLIES_PREVIEW replies; the rest are paged through ``replies_next``
+        return ReplyModelSerializer(replies_preview(obj), many=True, context=self.context).data
+
+    def get_replies_count(self, obj):
+        if not hasattr(obj, 'replies_count'):
+            # not annotated (a single comment): count once, replies_next reads it again
+            obj.replies_count = obj.replies.count()
+        return obj.replies_count
+
+    def get_replies_next(self, obj):
+        preview = replies_preview(obj)
+        if not preview or self.get_replies_count(obj) <= len(preview):
+            return None
+        last = preview[-1]
+        url = reverse('comments-replies', args=[obj.id])
+        request = self.context.get('request')
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        return f"{url}?cursor={encode_position((last.created_at, last.id))}"
 
     def get_liked_by_current_user(self, obj):
+        viewer_state = self.context.get('comment_viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state.liked_comments
         request = self.context.get("request", None)
         if request and request.user and request.user.is_authenticated:
-            return CommentLikeModel.objects.filter(comment=obj, user=request.user).exists()
+            return _reacted(obj, request.user, ReactionModel.TargetType.Comment, ReactionModel.Value.Like)
         return False
 
     def get_disliked_by_current_user(self, obj):
+        viewer_state = self.context.get('comment_viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state.disliked_comments
         request = self.context.get("request", None)
         if request and request.user and request.user.is_authenticated:
-            return CommentDislikeModel.objects.filter(comment=obj, user=request.user).exists()
+            return _reacted(obj, request.user, ReactionModel.TargetType.Comment, ReactionModel.Value.Dislike)
         return False
 
 
+class CommentPreviewSerializer(serializers.ModelSerializer):
+    user = UserModelSerializer(read_only=True)
+
+    class Meta:
+        model = CommentModel
+        fields = ["id", "user", "text", "created_at"]
+
+
 # ============================
 # 🔹 REPLY SERIALIZER
 # ============================
@@ -95,8 +140,8 @@ class ReplyModelSerializer(serializers.ModelSerializer):
     user = UserModelSerializer(read_only=True)
 
     # 🔹 Dynamic fields
-    likes_count = serializers.SerializerMethodField()
-    dislikes_count = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
+    dislikes_count = serializers.IntegerField(read_only=True)
     liked_by_current_user = serializers.SerializerMethodField()
     disliked_by_current_user = serializers.SerializerMethodField()
 
@@ -116,56 +161,52 @@ class ReplyModelSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'user', 'created_at']
 
-    def get_likes_count(self, obj):
-        return ReplyCommentLikeModel.objects.filter(reply_comment=obj).count()
-
-    def get_dislikes_count(self, obj):
-        return ReplyCommentDislikeModel.objects.filter(reply_comment=obj).count()
-
     def get_liked_by_current_user(self, obj):
+        viewer_state = self.context.get('comment_viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state.liked_replies
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
-            return ReplyCommentLikeModel.objects.filter(
-                reply_comment=obj, user=request.user
-            ).exists()
+            return _reacted(obj, request.user, ReactionModel.TargetType.Reply, ReactionModel.Value.Like)
         return False
 
     def get_disliked_by_current_user(self, obj):
+        viewer_state = self.context.get('comment_viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state.disliked_replies
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
-            return ReplyCommentDislikeModel.objects.filter(
-                reply_comment=obj, user=request.user
-            ).exists()
+            return _reacted(obj, request.user, ReactionModel.TargetType.Reply, ReactionModel.Value.Dislike)
         return False
 
 
 class CommentLikeSerializer(serializers.ModelSerializer):
+    """A comment reaction row, shaped like the former comment like/dislike tables."""
     user = UserModelSerializer(read_only=True)
+    comment = serializers.IntegerField(source='target_id', read_only=True)
 
     class Meta:
-        model = CommentLikeModel
-        fields = "__all__"
+        model = ReactionModel
+        fields = ['id', 'comment', 'user', 'created_at']
 
 
-class CommentDislikeSerializer(serializers.ModelSerializer):
-    user = UserModelSerializer(read_only=True)
-
-    class Meta:
-        model = CommentDislikeModel
-        fields = "__all__"
+class CommentDislikeSerializer(CommentLikeSerializer):
+    pass
 
 
 # ============================
 # 🔹 POST SERIALIZER
 # ============================
 
-class PostModelSerializer(serializers.ModelSerializer):
+class PostModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = ('user', 'music', 'hashtags')
+
     user = UserModelSerializer(read_only=True)
     music = MusicModelSerializer(read_only=True)
-    comments = CommentModelSerializer(many=True, read_only=True)
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
+    comments_preview = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
     liked_by_current_user = serializers.SerializerMethodField()
-    saves_count = serializers.IntegerField(source='saves.count', read_only=True)
+    saves_count = serializers.IntegerField(read_only=True)
     saved_by_current_user = serializers.SerializerMethodField()
     music_id = serializers.PrimaryKeyRelatedField(
         queryset=MusicModel.objects.all(),
@@ -183,23 +224,44 @@ class PostModelSerializer(serializers.ModelSerializer):
         source="hashtags",
         required=False
     )
-    reposts_count = serializers.IntegerField(source='reposts.count', read_only=True)
+    reposts_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
+    views_count = serializers.IntegerField(read_only=True)
     reposted_by_current_user = serializers.SerializerMethodField()
+    poster = serializers.SerializerMethodField()
+
 
+    def get_poster(self, obj):
+        return variant_url(obj.media_variants, 'large', self.context.get('request'))
+
+    def get_comments_preview(self, obj):
+        previews = self.context.get('comments_preview')
+        if not previews:
+            return []
+        return CommentPreviewSerializer(previews.get(obj.id, []), many=True, context=self.context).data
 
     def get_liked_by_current_user(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state.liked
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
             return obj.likes.filter(user=request.user).exists()
         return False
 
     def get_reposted_by_current_user(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state.reposted
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
             return obj.reposts.filter(user=request.user).exists()
         return False
 
     def get_saved_by_current_user(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return obj.id in viewer_state.saved
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
             return obj.saves.filter(user=request.user).exists()
@@ -207,7 +269,7 @@ class PostModelSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PostModel
-        fields = "__all__"
+        exclude = ("media_variants",)
         
 
 
@@ -216,7 +278,9 @@ class PostModelSerializer(serializers.ModelSerializer):
 # 🔹 LIKE SERIALIZER
 # ============================
 
-class LikeModelSerializer(serializers.ModelSerializer):
+class LikeModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = ('user', 'post')
+
     user = UserModelSerializer(read_only=True)
     post = PostModelSerializer(read_only=True)
 
@@ -228,19 +292,17 @@ class LikeModelSerializer(serializers.ModelSerializer):
 
 
 class ReplyCommentLikeModelSerializer(serializers.ModelSerializer):
+    """A reply reaction row, shaped like the former reply like/dislike tables."""
     user = UserModelSerializer(read_only=True)
+    reply_comment = serializers.IntegerField(source='target_id', read_only=True)
 
     class Meta:
-        model = ReplyCommentLikeModel
-        fields = "__all__"
-
+        model = ReactionModel
+        fields = ['id', 'reply_comment', 'user', 'created_at']
 
-class ReplyCommentDislikeModelSerializer(serializers.ModelSerializer):
-    user = UserModelSerializer(read_only=True)
 
-    class Meta:
-        model = ReplyCommentDislikeModel
-        fields = "__all__"
+class ReplyCommentDislikeModelSerializer(ReplyCommentLikeModelSerializer):
+    pass
 
 
 # ============================
@@ -253,9 +315,34 @@ class ViewModelSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class NotificationModelSerializer(serializers.ModelSerializer):
+    sender = UserModelSerializer(read_only=True)
+    message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NotificationModel
+        fields = [
+            'id',
+            'notif_type',
+            'sender',
+            'actors_count',
+            'message',
+            'post',
+            'comment',
+            'reply',
+            'is_read',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
+
+    def get_message(self, obj):
+        return describe(obj)
 
 
-class SaveModelSerializer(serializers.ModelSerializer):
+class SaveModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = ('user', 'post')
+
     user = UserModelSerializer(read_only=True)
     post = PostModelSerializer(read_only=True)
 
@@ -279,4 +366,29 @@ class RepostModelSerializer(serializers.ModelSerializer):
             'text',
             'created_at'
         ]
-        read_only_fields = ['id', 'user', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'user', 'created_at']
+
+
+# ============================
+# 🔹 UPLOAD SESSION SERIALIZER
+# ============================
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSessionModel
+        fields = ['id', 'filename', 'size', 'sha256', 'offset', 'status', 'post', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'offset', 'status', 'post', 'created_at', 'updated_at']
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes")
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if len(value) != 64 or any(char not in '0123456789abcdef' for char in value):
+            raise serializers.ValidationError("sha256 must be 64 hex characters")
+        return value
+
+    def validate_filename(self, value):
+        return os.path.basename(value)
@@ -0,0 +1,142 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+READ_BLOCK = 256 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def media_path(path):
+    """Absolute path of a file under MEDIA_ROOT; unfinished upload chunks are never served."""
+    path = posixpath.normpath(path).lstrip('/')
+    temp_dir = settings.UPLOAD_TEMP_DIR.strip('/')
+    if path == temp_dir or path.startswith(temp_dir + '/'):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def file_etag(stat):
+    """
+    Strong validator from inode, size and mtime (the nginx scheme). Uploaded files and
+    variants get a fresh storage name on every write, so a name never changes content.
+    """
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    ``Range: bytes=a-b`` / ``bytes=a-`` / ``bytes=-n`` -> (start, end) inclusive, or None
+    to send the whole file (no header, a multi-range or a malformed one).
+    """
+    match = RANGE_RE.match((header or '').replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the last n bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _file_slice(path, start, length):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while length > 0:
+            block = fh.read(min(READ_BLOCK, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _cache_headers(response, etag, stat):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _offloaded(path, content_type):
+    """Let the front proxy stream the file (it handles Range itself)."""
+    response = HttpResponse(content_type=content_type)
+    relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    if settings.MEDIA_ACCEL_MODE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(relative)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file under MEDIA_URL (post videos, music files, images and their variants)
+    with single byte-range support, a strong ETag answered by ``If-None-Match``/``If-Range``
+    and a long immutable Cache-Control. With ``MEDIA_ACCEL_MODE`` set the bytes are left
+    to nginx (``X-Accel-Redirect``) or Apache/lighttpd (``X-Sendfile``).
+    """
+    full_path = media_path(path)
+    stat = os.stat(full_path)
+    etag = file_etag(stat)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    if_none_match = request.headers.get('If-None-Match')
+    # weak comparison: a proxy that compressed the body sends the tag back as W/"..."
+    if if_none_match and (if_none_match.strip() == '*' or
+                          etag in {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}):
+        return _cache_headers(HttpResponseNotModified(), etag, stat)
+
+    if settings.MEDIA_ACCEL_MODE:
+        return _cache_headers(_offloaded(full_path, content_type), etag, stat)
+
+    size = stat.st_size
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return _cache_headers(response, etag, stat)
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_file_slice(full_path, start, end - start + 1),
+                                         status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return _cache_headers(response, etag, stat)
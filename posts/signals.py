@@ -0,0 +1,182 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from posts import search
+from posts.autocomplete import autocomplete, hashtag_entry, music_entry, user_entry
+from posts.background import run_in_background
+from posts.models import PostModel, HashtagModel, MusicModel, LikeModel, SaveModel, RepostModel, CommentModel, \
+    ReplyModel, ReactionModel, MediaJobModel
+from posts.media import enqueue as enqueue_media, needs_processing
+from posts.metrics import record_created
+from posts.reactions import delete_target_reactions
+from posts.response_cache import bump_version, tracked_models
+from posts.trending import engagement_buffer, record_hashtag_usage
+from users.models import UserModel, Follow
+
+
+# ============================
+# 🔹 FULL-TEXT SEARCH INDEX
+# ============================
+
+@receiver(post_save, sender=PostModel)
+def index_saved_post(sender, instance, **kwargs):
+    search.index_posts([instance.id])
+
+
+@receiver(post_delete, sender=PostModel)
+def unindex_deleted_post(sender, instance, **kwargs):
+    search.remove_posts([instance.id])
+
+
+@receiver(m2m_changed, sender=PostModel.hashtags.through)
+def reindex_post_hashtags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            search.index_posts([instance.id])
+    # hashtag.posts.add(...): instance is the hashtag, pk_set the posts
+    elif action in ('post_add', 'post_remove'):
+        search.index_posts(pk_set)
+    elif action == 'pre_clear':
+        post_ids = list(instance.posts.values_list('id', flat=True))
+        transaction.on_commit(lambda: search.index_posts(post_ids))
+
+
+@receiver(post_save, sender=HashtagModel)
+def reindex_renamed_hashtag(sender, instance, created, **kwargs):
+    if created:
+        return
+    post_ids = list(instance.posts.values_list('id', flat=True))
+    if post_ids:
+        run_in_background(search.index_posts, post_ids)
+
+
+@receiver(pre_delete, sender=HashtagModel)
+def reindex_deleted_hashtag(sender, instance, **kwargs):
+    # the through rows are gone after the delete: collect the posts first
+    post_ids = list(instance.posts.values_list('id', flat=True))
+    if post_ids:
+        transaction.on_commit(lambda: search.index_posts(post_ids))
+
+
+# ============================
+# 🔹 TRENDING HASHTAG BUCKETS
+# ============================
+
+@receiver(m2m_changed, sender=PostModel.hashtags.through)
+def count_hashtag_usage(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        record_hashtag_usage([instance.id], posts=len(pk_set))
+    else:
+        record_hashtag_usage(pk_set, posts=1)
+
+
+@receiver(post_save, sender=LikeModel)
+@receiver(post_save, sender=SaveModel)
+@receiver(post_save, sender=RepostModel)
+@receiver(post_save, sender=CommentModel)
+def count_hashtag_engagement(sender, instance, created, **kwargs):
+    if created:
+        post_id = instance.post_id
+        transaction.on_commit(lambda: engagement_buffer.add(post_id))
+
+
+# ============================
+# 🔹 AUTOCOMPLETE INDEX
+# ============================
+
+@receiver(post_save, sender=HashtagModel)
+def autocomplete_hashtag(sender, instance, **kwargs):
+    autocomplete.add('hashtags', hashtag_entry(instance.id, instance.name))
+
+
+@receiver(post_save, sender=MusicModel)
+def autocomplete_music(sender, instance, **kwargs):
+    autocomplete.add('musics', music_entry(instance.id, instance.music_name, instance.singer))
+
+
+@receiver(post_save, sender=UserModel)
+def autocomplete_user(sender, instance, update_fields=None, **kwargs):
+    # skip saves that cannot change the username (e.g. last_login on every login)
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    autocomplete.add('users', user_entry(instance.id, instance.username))
+
+
+@receiver(post_delete, sender=HashtagModel)
+@receiver(post_delete, sender=MusicModel)
+@receiver(post_delete, sender=UserModel)
+def autocomplete_remove(sender, instance, **kwargs):
+    kind = {HashtagModel: 'hashtags', MusicModel: 'musics', UserModel: 'users'}[sender]
+    autocomplete.remove(kind, instance.id)
+
+
+# ============================
+# 🔹 REACTIONS
+# ============================
+
+@receiver(post_delete, sender=CommentModel)
+@receiver(post_delete, sender=ReplyModel)
+def delete_reactions(sender, instance, **kwargs):
+    target_type = ReactionModel.TargetType.Comment if sender is CommentModel else ReactionModel.TargetType.Reply
+    delete_target_reactions(target_type, [instance.id])
+
+
+# ============================
+# 🔹 MEDIA VARIANTS
+# ============================
+
+MEDIA_KINDS = {
+    UserModel: MediaJobModel.Kind.Avatar,
+    MusicModel: MediaJobModel.Kind.MusicCover,
+    PostModel: MediaJobModel.Kind.Post,
+}
+
+
+@receiver(post_save, sender=UserModel)
+@receiver(post_save, sender=MusicModel)
+@receiver(post_save, sender=PostModel)
+def queue_media_variants(sender, instance, **kwargs):
+    kind = MEDIA_KINDS[sender]
+    if needs_processing(instance, kind):
+        transaction.on_commit(lambda: enqueue_media(kind, instance.pk))
+
+
+# ============================
+# 🔹 RESPONSE CACHE VERSIONS
+# ============================
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_response_cache(sender, update_fields=None, **kwargs):
+    if sender not in tracked_models:
+        return
+    # last_login is written on every login and is never part of a cached response
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=PostModel.hashtags.through)
+def bump_response_cache_hashtags(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(PostModel)
+
+
+# ============================
+# 🔹 METRICS
+# ============================
+
+CREATED_KINDS = {PostModel: 'post', LikeModel: 'like', CommentModel: 'comment', Follow: 'follow'}
+
+
+@receiver(post_save, sender=PostModel)
+@receiver(post_save, sender=LikeModel)
+@receiver(post_save, sender=CommentModel)
+@receiver(post_save, sender=Follow)
+def count_created(sender, created, **kwargs):
+    if created:
+        kind = CREATED_KINDS[sender]
+        transaction.on_commit(lambda: record_created(kind))
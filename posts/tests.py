@@ -1,3 +1,1848 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from posts.autocomplete import autocomplete
+from posts.broker import counter_publisher, get_broker, post_channel, user_channel
+from posts.cards import PostCardRenderer, card_columns
+from posts.comment_tree import REPLIES_PREVIEW
+from posts.counters import bump_post_counters
+from posts.feeds import celebrity_ids, fan_out_post
+from posts.fieldsets import FieldSpec
+from posts.live import LIVE_PATH, websocket_application
+from posts.management.commands.benchmark_load import percentile
+from posts.media import claim_jobs
+from posts.models import PostModel, HashtagModel, MusicModel, LikeModel, SaveModel, RepostModel, CommentModel, \
+    ReplyModel, ReactionModel, NotificationModel, TimelineModel, ViewModel, PostViewSketchModel, HashtagUsageModel, \
+    TrendingHashtagModel, UploadSessionModel, MediaJobModel, PostScoreModel
+from posts.notifications import notification_buffer, notify
+from posts.profiling import stats as profiling_stats
+from posts.ranking import build_score_rows, rank_for_you
+from posts.reactions import toggle_reaction
+from posts.search import index_posts, search_post_ids
+from posts.serializers import PostModelSerializer
+from posts.serving import RangeNotSatisfiable, parse_range
+from posts.trending import compute_trending, current_bucket, engagement_buffer
+from posts.uploads import temp_path
+from posts.view_buffer import view_buffer
+from posts.viewer_state import ViewerState
+from users.models import Follow, UserModel
+
+
+# ============================
+# 🔹 COUNTERS
+# ============================
+
+class PostCounterTests(TestCase):
+    ENDPOINTS = (
+        ('likes', 'likes_count', LikeModel),
+        ('saves', 'saves_count', SaveModel),
+        ('reposts', 'reposts_count', RepostModel),
+    )
+
+    def setUp(self):
+        self.author = UserModel.objects.create_user('author')
+        self.viewer = UserModel.objects.create_user('viewer')
+        self.post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def counter(self, name):
+        return PostModel.objects.values_list(name, flat=True).get(pk=self.post.pk)
+
+    def test_toggle_and_delete(self):
+        for endpoint, field, model in self.ENDPOINTS:
+            with self.subTest(endpoint):
+                url = f'/posts/{endpoint}/'
+                self.assertEqual(self.client.post(url, {'post': self.post.id}).status_code, 201)
+                self.assertEqual(self.counter(field), 1)
+                self.assertEqual(self.client.post(url, {'post': self.post.id}).status_code, 200)
+                self.assertEqual(self.counter(field), 0)
+
+                self.client.post(url, {'post': self.post.id})
+                row = model.objects.get(user=self.viewer)
+                self.assertEqual(self.client.put(f'{url}{row.id}/', {'post': self.post.id}).status_code, 405)
+                self.assertEqual(self.client.delete(f'{url}{row.id}/').status_code, 204)
+                self.assertEqual(self.counter(field), 0)
+                self.assertFalse(model.objects.exists())
+
+    def test_rows_of_other_users_are_out_of_reach(self):
+        for endpoint, field, model in self.ENDPOINTS:
+            with self.subTest(endpoint):
+                url = f'/posts/{endpoint}/'
+                self.client.force_authenticate(self.author)
+                self.client.post(url, {'post': self.post.id})
+                row = model.objects.get(user=self.author)
+
+                self.client.force_authenticate(self.viewer)
+                self.assertEqual(self.client.get(f'{url}{row.id}/').status_code, 404)
+                self.assertEqual(self.client.delete(f'{url}{row.id}/').status_code, 404)
+                self.assertEqual(self.counter(field), 1)
+
+
+class RecountPostCountersTests(TestCase):
+    def setUp(self):
+        author = UserModel.objects.create_user('author')
+        self.post = PostModel.objects.create(user=author, post='posts/clip.mp4', title='clip')
+        # rows written behind the counters' back, e.g. by a script or an old deploy
+        LikeModel.objects.create(user=author, post=self.post)
+        SaveModel.objects.create(user=author, post=self.post)
+        CommentModel.objects.create(user=author, post=self.post, text='first')
+        PostModel.objects.filter(pk=self.post.pk).update(likes_count=5, reposts_count=2)
+
+    def counters(self):
+        return PostModel.objects.values_list('likes_count', 'saves_count', 'reposts_count', 'comments_count') \
+            .get(pk=self.post.pk)
+
+    def test_dry_run_only_reports(self):
+        out = StringIO()
+        call_command('recount_post_counters', '--dry-run', stdout=out)
+        self.assertIn('1 would be fixed', out.getvalue())
+        self.assertEqual(self.counters(), (5, 0, 2, 0))
+
+    def test_recount(self):
+        out = StringIO()
+        call_command('recount_post_counters', '--batch-size', '1', stdout=out)
+        self.assertIn('Checked 1 posts, 1 fixed', out.getvalue())
+        self.assertEqual(self.counters(), (1, 1, 0, 1))
+
+
+# ============================
+# 🔹 VIEWER STATE
+# ============================
+
+class ViewerStateTests(TestCase):
+    def setUp(self):
+        author = UserModel.objects.create_user('author')
+        self.viewer = UserModel.objects.create_user('viewer')
+        self.posts = [PostModel.objects.create(user=author, post='posts/clip.mp4', title=f'clip {i}') for i in range(3)]
+        LikeModel.objects.create(user=self.viewer, post=self.posts[0])
+        SaveModel.objects.create(user=self.viewer, post=self.posts[1])
+        RepostModel.objects.create(user=self.viewer, post=self.posts[0])
+        LikeModel.objects.create(user=author, post=self.posts[2])
+
+    def test_three_queries_for_a_page(self):
+        with self.assertNumQueries(3):
+            state = ViewerState.for_posts(self.viewer, [post.id for post in self.posts])
+        self.assertEqual(state.liked, {self.posts[0].id})
+        self.assertEqual(state.saved, {self.posts[1].id})
+        self.assertEqual(state.reposted, {self.posts[0].id})
+
+    def test_anonymous(self):
+        with self.assertNumQueries(0):
+            state = ViewerState.for_posts(AnonymousUser(), [post.id for post in self.posts])
+        self.assertEqual((state.liked, state.saved, state.reposted), (set(), set(), set()))
+
+    def test_post_payload_flags(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        response = client.get(f'/posts/{self.posts[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        flags = {name: response.data[name]
+                 for name in ('liked_by_current_user', 'saved_by_current_user', 'reposted_by_current_user')}
+        self.assertEqual(flags, {'liked_by_current_user': True, 'saved_by_current_user': False,
+                                 'reposted_by_current_user': True})
+
+
+# ============================
+# 🔹 COMMENTS
+# ============================
+
+class CommentPreviewTests(TestCase):
+    def setUp(self):
+        self.author = UserModel.objects.create_user('author')
+        self.post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        self.comments = [CommentModel.objects.create(user=self.author, post=self.post, text=f'comment {i}')
+                         for i in range(7)]
+        ReplyModel.objects.create(user=self.author, post=self.post, comment=self.comments[0], text='reply')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def test_no_preview_by_default(self):
+        data = self.client.get(f'/posts/{self.post.id}/').data
+        self.assertNotIn('comments', data)
+        self.assertEqual(data['comments_preview'], [])
+
+    def test_preview_is_newest_first_and_capped(self):
+        preview = self.client.get(f'/posts/{self.post.id}/?comments_preview=2').data['comments_preview']
+        self.assertEqual([comment['text'] for comment in preview], ['comment 6', 'comment 5'])
+        preview = self.client.get(f'/posts/{self.post.id}/?comments_preview=50').data['comments_preview']
+        self.assertEqual(len(preview), 5)
+
+    def test_comments_endpoint_pages(self):
+        response = self.client.get(f'/posts/{self.post.id}/comments/?page_size=4')
+        self.assertEqual([comment['text'] for comment in response.data['results']],
+                         ['comment 6', 'comment 5', 'comment 4', 'comment 3'])
+        rest = self.client.get(response.data['next']).data['results']
+        self.assertEqual([comment['text'] for comment in rest], ['comment 2', 'comment 1', 'comment 0'])
+        self.assertEqual(rest[-1]['replies_count'], 1)
+
+
+# ============================
+# 🔹 KEYSET PAGINATION
+# ============================
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        author = UserModel.objects.create_user('author')
+        posts = [PostModel.objects.create(user=author, post='posts/clip.mp4', title=f'clip {i}') for i in range(7)]
+        # three pairs of posts share a timestamp, so pages have to break ties on the id
+        now = timezone.now()
+        for i, post in enumerate(posts):
+            PostModel.objects.filter(pk=post.pk).update(created_at=now - timedelta(minutes=i // 2))
+        self.expected = list(PostModel.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_round_trip_with_tied_timestamps(self):
+        for size in (1, 2, 3, 7):
+            with self.subTest(page_size=size):
+                ids, pages = self.walk(f'/posts/?page_size={size}')
+                self.assertEqual(ids, self.expected)
+                self.assertEqual(pages, -(-len(self.expected) // size))
+
+    def test_new_posts_do_not_shift_pages(self):
+        first = self.client.get('/posts/?page_size=3').data
+        PostModel.objects.create(user=UserModel.objects.get(), post='posts/clip.mp4', title='fresh')
+        ids, _ = self.walk(first['next'])
+        self.assertEqual([post['id'] for post in first['results']] + ids, self.expected)
+
+    def test_malformed_cursor(self):
+        for cursor in ('garbage', 'W10=', 'WyJub3QgYSBkYXRlIiwgMV0='):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/posts/?cursor={cursor}').status_code, 400)
+
+
+# ============================
+# 🔹 FOLLOWING FEED
+# ============================
+
+@override_settings(FEED_FANOUT_SYNC_LIMIT=1, FEED_FANOUT_CELEBRITY_THRESHOLD=2, BACKGROUND_TASKS_EAGER=True)
+class FollowingFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer, self.author, self.star, *self.fans = (
+            UserModel.objects.create_user(name) for name in ('viewer', 'author', 'star', 'fan1', 'fan2')
+        )
+        Follow.objects.bulk_create([Follow(follower=user, following=self.star) for user in [self.viewer] + self.fans])
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def publish(self, user, title):
+        post = PostModel.objects.create(user=user, post='posts/clip.mp4', title=title)
+        with self.captureOnCommitCallbacks(execute=True):
+            fan_out_post(post)
+        return post
+
+    def feed(self):
+        return [post['id'] for post in self.client.get('/posts/following/').data['results']]
+
+    def test_fan_out(self):
+        Follow.objects.create(follower=self.viewer, following=self.author)
+        inline = self.publish(self.author, 'one follower')
+        self.assertTrue(TimelineModel.objects.filter(user=self.viewer, post=inline).exists())
+
+        # above FEED_FANOUT_SYNC_LIMIT the rows are written by a background task
+        Follow.objects.create(follower=self.fans[0], following=self.author)
+        background = self.publish(self.author, 'two followers')
+        self.assertEqual(set(TimelineModel.objects.filter(post=background).values_list('user_id', flat=True)),
+                         {self.viewer.id, self.fans[0].id})
+
+    def test_celebrity_posts_are_merged_at_read_time(self):
+        Follow.objects.create(follower=self.viewer, following=self.author)
+        older = self.publish(self.author, 'older')
+        star_post = self.publish(self.star, 'star')
+        newer = self.publish(self.author, 'newer')
+
+        self.assertFalse(TimelineModel.objects.filter(post=star_post).exists())
+        self.assertEqual(self.feed(), [newer.id, star_post.id, older.id])
+
+    def test_celebrity_decision_matches_the_read_side(self):
+        Follow.objects.filter(follower=self.fans[1], following=self.star).delete()
+        self.assertNotIn(self.star.id, celebrity_ids())
+        # the star crosses the threshold while the cached set still says otherwise
+        Follow.objects.create(follower=self.fans[1], following=self.star)
+        star_post = self.publish(self.star, 'star')
+        self.assertEqual(self.feed(), [star_post.id])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        posts = [self.publish(self.author, f'clip {i}') for i in range(3)]
+        self.assertEqual(self.client.post(f'/users/follow/{self.author.id}/').status_code, 201)
+        self.assertEqual(self.feed(), [post.id for post in reversed(posts)])
+
+        self.assertEqual(self.client.post(f'/users/follow/{self.author.id}/').status_code, 204)
+        self.assertFalse(TimelineModel.objects.filter(user=self.viewer).exists())
+        self.assertEqual(self.feed(), [])
+
+
+# ============================
+# 🔹 FOR YOU
+# ============================
+
+@override_settings(FOR_YOU_GENRE_WEIGHT=1.0, FOR_YOU_HASHTAG_WEIGHT=0.5)
+class ForYouRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = UserModel.objects.create_user('author')
+        self.viewer = UserModel.objects.create_user('viewer')
+        self.dance = HashtagModel.objects.create(name='dance')
+
+    def post(self, title, genre=None, hashtags=(), age=timedelta(0), **counters):
+        post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title=title, genre=genre, **counters)
+        post.hashtags.set(hashtags)
+        PostModel.objects.filter(pk=post.pk).update(created_at=timezone.now() - age)
+        return post
+
+    def score(self):
+        call_command('compute_post_scores', stdout=StringIO())
+
+    def test_engagement_over_age(self):
+        quiet = self.post('quiet', likes_count=1)
+        stale = self.post('stale', likes_count=10, age=timedelta(days=2))
+        fresh = self.post('fresh', likes_count=10)
+        self.post('expired', likes_count=100, age=timedelta(days=60))
+        self.score()
+        self.assertEqual(rank_for_you(AnonymousUser()), [fresh.id, quiet.id, stale.id])
+
+    def test_viewer_affinity_reranks_candidates(self):
+        liked = self.post('liked', genre=PostModel.GenreChoice.Comedy, hashtags=[self.dance], age=timedelta(days=3))
+        LikeModel.objects.create(user=self.viewer, post=liked)
+        comedy = self.post('comedy', genre=PostModel.GenreChoice.Comedy, hashtags=[self.dance])
+        sports = self.post('sports', genre=PostModel.GenreChoice.Sports, likes_count=1)
+        self.score()
+
+        self.assertEqual(rank_for_you(AnonymousUser())[:2], [sports.id, comedy.id])
+        self.assertEqual(rank_for_you(self.viewer)[:2], [comedy.id, sports.id])
+
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        results = client.get('/posts/for_you/').data['results']
+        self.assertEqual([post['id'] for post in results], [comedy.id, sports.id, liked.id])
+
+
+# ============================
+# 🔹 VIEW INGESTION
+# ============================
+
+@override_settings(VIEW_BUFFER_MAX_EVENTS=1000, VIEW_BUFFER_FLUSH_INTERVAL=3600, VIEW_EVENTS_ANON_RATE='100/min')
+class ViewIngestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = UserModel.objects.create_user('viewer')
+        author = UserModel.objects.create_user('author')
+        self.posts = [PostModel.objects.create(user=author, post='posts/clip.mp4', title=f'clip {i}') for i in range(2)]
+        self.addCleanup(view_buffer._drain)
+
+    def send(self, post_ids, client=None, ip='10.0.0.1', **data):
+        return (client or self.client).post('/posts/views/', {'events': [{'post': i} for i in post_ids], **data},
+                                            content_type='application/json', REMOTE_ADDR=ip)
+
+    def views(self, post):
+        return PostModel.objects.values_list('views_count', flat=True).get(pk=post.pk)
+
+    def test_user_views_are_unique_per_user(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        post = self.posts[0]
+        self.assertEqual(self.send([post.id, post.id, 999999], client, device_id='a').data, {'accepted': 3})
+        # a made-up device id does not turn a signed-in user into a new viewer
+        self.send([post.id], client, device_id='b')
+        view_buffer.flush()
+        self.send([post.id], client, device_id='c')
+        view_buffer.flush()
+
+        self.assertEqual(self.views(post), 1)
+        self.assertEqual(list(ViewModel.objects.values_list('post_id', 'user_id')), [(post.id, self.viewer.id)])
+
+    def test_anonymous_views_are_counted_once_per_ip_and_device(self):
+        post = self.posts[0]
+        for ip, device in (('10.0.0.1', 'a'), ('10.0.0.1', 'a'), ('10.0.0.1', 'b'), ('10.0.0.2', 'a')):
+            self.send([post.id], ip=ip, device_id=device)
+        view_buffer.flush()
+        self.assertEqual(self.views(post), 3)
+
+        # a later flush only adds the sketch's growth
+        self.send([post.id], ip='10.0.0.1', device_id='a')
+        self.send([post.id], ip='10.0.0.3', device_id='a')
+        view_buffer.flush()
+        self.assertEqual(self.views(post), 4)
+        self.assertEqual(PostViewSketchModel.objects.get(post=post).estimate, 4)
+        self.assertFalse(ViewModel.objects.exists())
+
+    @override_settings(VIEW_BUFFER_MAX_EVENTS=3)
+    def test_buffer_flushes_when_full(self):
+        self.send([post.id for post in self.posts], device_id='a')
+        self.assertEqual(self.views(self.posts[0]), 0)
+        self.send([self.posts[0].id], device_id='b')
+        self.assertEqual([self.views(post) for post in self.posts], [2, 1])
+
+    @override_settings(VIEW_EVENTS_ANON_RATE='2/min')
+    def test_anonymous_batches_are_rate_limited_per_ip(self):
+        post = self.posts[0]
+        statuses = [self.send([post.id], device_id=str(i)).status_code for i in range(3)]
+        self.assertEqual(statuses, [202, 202, 429])
+        self.assertEqual(self.send([post.id], ip='10.0.0.2', device_id='x').status_code, 202)
+
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        self.assertEqual(self.send([post.id], client).status_code, 202)
+
+
+# ============================
+# 🔹 SEARCH
+# ============================
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.author = UserModel.objects.create_user('author')
+
+    def post(self, title, description=''):
+        return PostModel.objects.create(user=self.author, post='posts/clip.mp4', title=title, description=description)
+
+    def test_title_matches_rank_first(self):
+        in_description = self.post('clip', 'my cat at home')
+        in_title = self.post('cats at home')
+        self.post('dogs', 'no match here')
+        self.assertEqual(search_post_ids('cat'), [in_title.id, in_description.id])
+        self.assertEqual(search_post_ids('cat home'), [in_title.id, in_description.id])
+        self.assertEqual(search_post_ids('"); DROP'), [])
+
+        response = self.client.get('/posts/search/?q=cat')
+        self.assertEqual([post['id'] for post in response.data['results']], [in_title.id, in_description.id])
+
+    def test_deleted_hashtag_is_unindexed(self):
+        post = self.post('clip')
+        hashtag = HashtagModel.objects.create(name='ephemeral')
+        with self.captureOnCommitCallbacks(execute=True):
+            post.hashtags.add(hashtag)
+        self.assertEqual(search_post_ids('ephemeral'), [post.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hashtag.delete()
+        self.assertEqual(search_post_ids('ephemeral'), [])
+
+
+# ============================
+# 🔹 TRENDING
+# ============================
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = UserModel.objects.create_user('author')
+        self.dance, self.fun = HashtagModel.objects.create(name='dance'), HashtagModel.objects.create(name='fun')
+        self.addCleanup(engagement_buffer._drain)
+
+    def test_engagement_is_written_in_batches(self):
+        both = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='both')
+        both.hashtags.set([self.dance, self.fun])
+        dance = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='dance')
+        dance.hashtags.set([self.dance])
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(3):
+            LikeModel.objects.create(user=self.author, post=both)
+            SaveModel.objects.create(user=self.author, post=both)
+            CommentModel.objects.create(user=self.author, post=dance, text='nice')
+        self.assertEqual(HashtagUsageModel.objects.filter(engagement_count__gt=0).count(), 0)
+
+        engagement_buffer.flush()
+        usage = dict(HashtagUsageModel.objects.values_list('hashtag__name', 'engagement_count'))
+        self.assertEqual(usage, {'dance': 3, 'fun': 2})
+
+    def test_trending_list(self):
+        bucket = current_bucket()
+        HashtagUsageModel.objects.create(hashtag=self.dance, bucket=bucket, posts_count=1, engagement_count=1)
+        HashtagUsageModel.objects.create(hashtag=self.fun, bucket=bucket, posts_count=1, engagement_count=5)
+        compute_trending()
+        response = self.client.get('/posts/hashtags/trending/?window=1h')
+        self.assertEqual([row['name'] for row in response.data['results']], ['fun', 'dance'])
+        self.assertEqual(self.client.get('/posts/hashtags/trending/?window=2h').status_code, 400)
+
+    def test_windows_do_not_exceed_their_span(self):
+        now = timezone.now().replace(minute=30)
+        HashtagUsageModel.objects.bulk_create([
+            HashtagUsageModel(hashtag=self.dance, bucket=current_bucket(now) - timedelta(hours=hours_ago), posts_count=1)
+            for hours_ago in (0, 1, 23, 24)
+        ])
+        compute_trending(now)
+        totals = dict(TrendingHashtagModel.objects.values_list('window', 'posts_count'))
+        self.assertEqual(totals[TrendingHashtagModel.Window.Hour], 1)
+        self.assertEqual(totals[TrendingHashtagModel.Window.Day], 3)
+        self.assertEqual(totals[TrendingHashtagModel.Window.Week], 4)
+
+
+# ============================
+# 🔹 AUTOCOMPLETE
+# ============================
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        autocomplete.reset()
+        self.addCleanup(autocomplete.reset)
+        self.author = UserModel.objects.create_user('catherine')
+        cats, catalog = HashtagModel.objects.create(name='cats'), HashtagModel.objects.create(name='catalog')
+        HashtagModel.objects.create(name='dogs')
+        for i in range(2):
+            PostModel.objects.create(user=self.author, post='posts/clip.mp4', title=f'clip {i}').hashtags.set([cats])
+        MusicModel.objects.create(music_name='song', singer='Cat Power', file='music/song.mp3')
+
+    def suggest(self, query, kinds='hashtags,musics,users'):
+        return self.client.get('/posts/autocomplete/', {'q': query, 'type': kinds}).data
+
+    def test_prefix_matches_by_popularity(self):
+        autocomplete.warm_up()
+        self.assertEqual([tag['name'] for tag in self.suggest('#ca', 'hashtags')['hashtags']], ['cats', 'catalog'])
+        result = self.suggest('cat')
+        self.assertEqual([music['singer'] for music in result['musics']], ['Cat Power'])
+        self.assertEqual([user['username'] for user in result['users']], ['catherine'])
+
+    def test_signals_keep_the_index_current(self):
+        autocomplete.warm_up()
+        cave = HashtagModel.objects.create(name='cave')
+        self.assertIn('cave', [tag['name'] for tag in self.suggest('cav', 'hashtags')['hashtags']])
+        cave.delete()
+        self.assertEqual(self.suggest('cav', 'hashtags')['hashtags'], [])
+
+    @override_settings(BACKGROUND_TASKS_EAGER=False)
+    def test_requests_do_not_wait_for_a_build(self):
+        with mock.patch('posts.autocomplete.start_in_background') as start, self.assertNumQueries(0):
+            self.assertEqual(autocomplete.search('ca', ['hashtags']), {'hashtags': []})
+            # a second request while the build is in flight does not start another one
+            autocomplete.search('ca', ['hashtags'])
+        start.assert_called_once()
+
+        build = start.call_args.args[0]
+        build()
+        self.assertEqual([h['name'] for h in autocomplete.search('ca', ['hashtags'])['hashtags']], ['cats', 'catalog'])
+
+
+# ============================
+# 🔹 COMMENT TREE
+# ============================
+
+class CommentTreeTests(TestCase):
+    def setUp(self):
+        self.author = UserModel.objects.create_user('author')
+        self.post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def add_comments(self, count, replies):
+        for i in range(count):
+            commenter = UserModel.objects.create_user(f'commenter-{CommentModel.objects.count()}')
+            comment = CommentModel.objects.create(user=commenter, post=self.post, text=f'comment {i}')
+            toggle_reaction(self.author, ReactionModel.TargetType.Comment, comment.id, ReactionModel.Value.Like)
+            for j in range(replies):
+                ReplyModel.objects.create(user=commenter, post=self.post, comment=comment, text=f'reply {j}')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_page_queries_do_not_grow_with_comments_or_replies(self):
+        url = f'/posts/{self.post.id}/comments/'
+        self.add_comments(1, 1)
+        small = self.count_queries(url)
+        self.add_comments(6, REPLIES_PREVIEW + 2)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_replies_are_previewed_and_paged(self):
+        self.add_comments(1, REPLIES_PREVIEW + 2)
+        comment = self.client.get(f'/posts/{self.post.id}/comments/').data['results'][0]
+        self.assertEqual(comment['replies_count'], REPLIES_PREVIEW + 2)
+        self.assertEqual(comment['likes_count'], 1)
+        self.assertTrue(comment['liked_by_current_user'])
+        self.assertEqual([reply['text'] for reply in comment['replies']],
+                         [f'reply {j}' for j in range(REPLIES_PREVIEW)])
+
+        rest = self.client.get(comment['replies_next']).data['results']
+        self.assertEqual([reply['text'] for reply in rest],
+                         [f'reply {j}' for j in range(REPLIES_PREVIEW, REPLIES_PREVIEW + 2)])
+
+    def test_no_replies_next_when_everything_is_inline(self):
+        self.add_comments(1, REPLIES_PREVIEW)
+        comment = self.client.get(f'/posts/{self.post.id}/comments/').data['results'][0]
+        self.assertIsNone(comment['replies_next'])
+
+
+# ============================
+# 🔹 REACTIONS
+# ============================
+
+class ReactionToggleTests(TestCase):
+    def setUp(self):
+        self.author = UserModel.objects.create_user('author')
+        self.fan = UserModel.objects.create_user('fan')
+        post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        self.comment = CommentModel.objects.create(user=self.author, post=post, text='comment')
+        self.reply = ReplyModel.objects.create(user=self.author, post=post, comment=self.comment, text='reply')
+        self.client = APIClient()
+        self.client.force_authenticate(self.fan)
+
+    def press(self, endpoint, **data):
+        response = self.client.post(f'/posts/{endpoint}/', data)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_like_switch_and_remove(self):
+        data = self.press('comment_likes', comment=self.comment.id)
+        self.assertEqual((data['likes_count'], data['dislikes_count'], data['liked_by_current_user']), (1, 0, True))
+        data = self.press('comment_dislikes', comment=self.comment.id)
+        self.assertEqual((data['likes_count'], data['dislikes_count'], data['disliked_by_current_user']), (0, 1, True))
+        data = self.press('comment_dislikes', comment=self.comment.id)
+        self.assertEqual((data['likes_count'], data['dislikes_count'], data['disliked_by_current_user']), (0, 0, False))
+
+        self.comment.refresh_from_db()
+        self.assertEqual((self.comment.likes_count, self.comment.dislikes_count), (0, 0))
+        self.assertFalse(ReactionModel.objects.exists())
+
+    def test_reply_reactions_are_separate_from_comment_reactions(self):
+        self.press('comment_likes', comment=self.comment.id)
+        data = self.press('reply_comment_likes', reply_comment=self.reply.id)
+        self.assertEqual(data['likes_count'], 1)
+        self.assertEqual(ReactionModel.objects.filter(user=self.fan).count(), 2)
+
+    def test_delete_takes_the_reaction_off_the_counter(self):
+        self.press('comment_likes', comment=self.comment.id)
+        reaction = ReactionModel.objects.get()
+        self.assertEqual(self.client.delete(f'/posts/comment_likes/{reaction.id}/').status_code, 204)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.likes_count, 0)
+
+    def test_deleting_a_comment_drops_its_reactions(self):
+        self.press('comment_likes', comment=self.comment.id)
+        self.comment.delete()
+        self.assertFalse(ReactionModel.objects.exists())
+
+
+class ReactionMigrationTests(TransactionTestCase):
+    before = [('posts', '0020_hashtag_trending')]
+    after = [('posts', '0021_reactionmodel')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        # only posts moves; every other app stays at its latest migration
+        targets = targets + [node for node in executor.loader.graph.leaf_nodes() if node[0] != 'posts']
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_old_like_tables_are_copied_with_counters(self):
+        apps = self.migrate(self.before)
+        users = [apps.get_model('users', 'UserModel').objects.create(username=f'user-{i}') for i in range(3)]
+        post = apps.get_model('posts', 'PostModel').objects.create(user=users[0], post='posts/clip.mp4', title='clip')
+        comment = apps.get_model('posts', 'CommentModel').objects.create(user=users[0], post=post, text='comment')
+        reply = apps.get_model('posts', 'ReplyModel').objects.create(user=users[0], post=post, comment=comment,
+                                                                     text='reply')
+        for user in users:
+            apps.get_model('posts', 'CommentLikeModel').objects.create(user=user, comment=comment)
+        # a user with both a like and a dislike keeps the like
+        apps.get_model('posts', 'CommentDislikeModel').objects.create(user=users[0], comment=comment)
+        apps.get_model('posts', 'ReplyCommentDislikeModel').objects.create(user=users[1], reply_comment=reply)
+
+        apps = self.migrate(self.after)
+        reactions = apps.get_model('posts', 'ReactionModel').objects
+        self.assertEqual(sorted(reactions.values_list('target_type', 'user_id', 'value')),
+                         sorted([('comment', user.id, 1) for user in users] + [('reply', users[1].id, -1)]))
+        comment = apps.get_model('posts', 'CommentModel').objects.get()
+        reply = apps.get_model('posts', 'ReplyModel').objects.get()
+        self.assertEqual((comment.likes_count, comment.dislikes_count), (3, 0))
+        self.assertEqual((reply.likes_count, reply.dislikes_count), (0, 1))
+
+
+# ============================
+# 🔹 NOTIFICATIONS
+# ============================
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class NotificationGroupingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author, self.alice, self.bob = (UserModel.objects.create_user(name) for name in ('author', 'alice', 'bob'))
+        self.post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def like(self, sender):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(NotificationModel.NotifType.Like, self.author.id, sender.id, post_id=self.post.id)
+        notification_buffer.flush()
+
+    def test_likes_on_a_post_fold_into_one_notification(self):
+        self.like(self.alice)
+        self.like(self.bob)
+        self.like(self.author)  # own post: no notification
+
+        results = self.client.get('/posts/notifications/').data['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['actors_count'], 2)
+        self.assertEqual(results[0]['message'], 'bob and 1 other liked your video')
+
+    def test_repeated_actor_is_counted_once(self):
+        for sender in (self.alice, self.bob, self.alice):
+            self.like(sender)
+
+        notification = NotificationModel.objects.get()
+        self.assertEqual(notification.actors_count, 2)
+        self.assertEqual(sorted(notification.actor_ids), [self.alice.id, self.bob.id])
+
+    def test_unread_count_and_mark_read(self):
+        self.like(self.alice)
+        self.assertEqual(self.client.get('/posts/notifications/unread_count/').data['unread'], 1)
+        data = self.client.post('/posts/notifications/read/', {}, format='json').data
+        self.assertEqual((data['updated'], data['unread']), (1, 0))
+
+        # a like after the group was read starts a new unread notification
+        self.like(self.bob)
+        self.assertEqual(NotificationModel.objects.count(), 2)
+        self.assertEqual(self.client.get('/posts/notifications/unread_count/').data['unread'], 1)
+
+
+# ============================
+# 🔹 LIVE PUSH
+# ============================
+
+class FakeSocket:
+    """Both ends of one ASGI WebSocket connection to ``websocket_application``."""
+
+    def __init__(self, path=LIVE_PATH, token=None):
+        self.incoming = asyncio.Queue()
+        self.sent = asyncio.Queue()
+        query_string = f'token={token}'.encode() if token else b''
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+        self.app = asyncio.create_task(websocket_application(
+            {'type': 'websocket', 'path': path, 'query_string': query_string}, self.incoming.get, self.sent.put))
+
+    async def message(self):
+        return await asyncio.wait_for(self.sent.get(), 1)
+
+    async def frame(self):
+        return json.loads((await self.message())['text'])
+
+    async def send_frame(self, frame):
+        await self.incoming.put({'type': 'websocket.receive', 'text': json.dumps(frame)})
+        return await self.frame()
+
+    async def disconnect(self):
+        await self.incoming.put({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(self.app, 1)
+
+
+@override_settings(LIVE_TICK_SECONDS=0.05)
+class LiveSocketTests(SimpleTestCase):
+    async def test_watched_post_gets_one_summed_counters_frame(self):
+        socket = FakeSocket()
+        self.assertEqual(await socket.message(), {'type': 'websocket.accept'})
+        self.assertEqual(await socket.send_frame({'action': 'watch', 'posts': [7]}), {'type': 'watching', 'posts': [7]})
+
+        for _ in range(3):
+            get_broker().publish(post_channel(7), {'type': 'counters', 'post': 7, 'deltas': {'likes_count': 1}})
+        get_broker().publish(post_channel(8), {'type': 'counters', 'post': 8, 'deltas': {'likes_count': 1}})
+        self.assertEqual(await socket.frame(), {'type': 'counters', 'posts': {'7': {'likes_count': 3}}})
+        await socket.disconnect()
+
+    async def test_notifications_reach_the_signed_in_user(self):
+        token = AccessToken()
+        token['user_id'] = 42
+        socket = FakeSocket(token=str(token))
+        await socket.message()
+
+        get_broker().publish(user_channel(41), {'type': 'unread', 'unread': 9})
+        get_broker().publish(user_channel(42), {'type': 'unread', 'unread': 1})
+        self.assertEqual(await socket.frame(), {'type': 'unread', 'unread': 1})
+        await socket.disconnect()
+
+    async def test_bad_frames_and_paths(self):
+        socket = FakeSocket()
+        await socket.message()
+        self.assertEqual(await socket.send_frame({'action': 'shout'}), {'type': 'error', 'detail': 'unknown action shout'})
+        await socket.disconnect()
+
+        socket = FakeSocket(path='/ws/other/')
+        self.assertEqual(await socket.message(), {'type': 'websocket.close', 'code': 4404})
+
+
+class LivePublishTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        counter_publisher.flush()  # deltas left over from earlier tests
+        self.author = UserModel.objects.create_user('author')
+        self.post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        self.messages = []
+        self.subscribe(post_channel(self.post.id))
+
+    def subscribe(self, channel):
+        def collect(channel, message):
+            self.messages.append(message)
+        get_broker().subscribe(channel, collect)
+        self.addCleanup(get_broker().unsubscribe, channel, collect)
+
+    def test_counter_deltas_are_published_once_per_tick_after_commit(self):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                bump_post_counters(self.post.id, likes_count=1, saves_count=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_post_counters(self.post.id, saves_count=-1)
+        counter_publisher.flush()
+        self.assertEqual(self.messages, [
+            {'type': 'counters', 'post': self.post.id, 'deltas': {'likes_count': 2, 'saves_count': 1}},
+        ])
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_flushed_notifications_are_pushed_to_the_receiver(self):
+        fan = UserModel.objects.create_user('fan')
+        self.subscribe(user_channel(self.author.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(NotificationModel.NotifType.Like, self.author.id, fan.id, post_id=self.post.id)
+
+        message, = self.messages
+        self.assertEqual(message['type'], 'notification')
+        self.assertEqual(message['notification']['message'], 'fan liked your video')
+        self.assertEqual(message['unread'], 1)
+
+
+# ============================
+# 🔹 UPLOADS
+# ============================
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class UploadFinalizeTests(TestCase):
+    BLOB = b'\x00\x00\x00\x18ftypmp42' * 10
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(UserModel.objects.create_user('uploader'))
+        response = self.client.post('/posts/uploads/', {
+            'filename': 'clip.mp4', 'size': len(self.BLOB), 'sha256': hashlib.sha256(self.BLOB).hexdigest(),
+        }, format='json')
+        self.session = UploadSessionModel.objects.get(pk=response.data['id'])
+
+    def put_chunk(self, chunk, start=0, **headers):
+        return self.client.generic('PUT', f'/posts/uploads/{self.session.pk}/chunk/', chunk,
+                                   content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(chunk) - 1}/{len(self.BLOB)}',
+                                   **headers)
+
+    def finalize(self, data=None):
+        return self.client.post(f'/posts/uploads/{self.session.pk}/finalize/', data or {'title': 'clip'},
+                                format='json')
+
+    def test_chunks_resume_from_the_stored_offset(self):
+        half = len(self.BLOB) // 2
+        self.assertEqual(self.put_chunk(self.BLOB[:half]).data['offset'], half)
+        response = self.put_chunk(self.BLOB[:half])
+        self.assertEqual((response.status_code, response.data['offset']), (409, half))
+        self.assertEqual(self.put_chunk(self.BLOB[half:], start=half).data['offset'], len(self.BLOB))
+
+    def test_malformed_content_length_is_a_client_error(self):
+        response = self.put_chunk(self.BLOB, CONTENT_LENGTH='lots')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'Content-Length must be a number')
+
+    def test_retried_finalize_returns_the_same_post(self):
+        self.put_chunk(self.BLOB)
+        first = self.finalize()
+        self.assertEqual(first.status_code, 201, first.data)
+        retry = self.finalize()
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(PostModel.objects.count(), 1)
+
+    def test_finalize_in_flight(self):
+        self.put_chunk(self.BLOB)
+        UploadSessionModel.objects.filter(pk=self.session.pk).update(status=UploadSessionModel.Status.Finalizing)
+        self.assertEqual(self.finalize().status_code, 409)
+        self.assertEqual(self.client.delete(f'/posts/uploads/{self.session.pk}/').status_code, 409)
+        self.assertFalse(PostModel.objects.exists())
+
+    def test_invalid_fields_release_the_claim(self):
+        self.put_chunk(self.BLOB)
+        self.assertEqual(self.finalize({'title': 'clip', 'genre': 'nope'}).status_code, 400)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, UploadSessionModel.Status.Uploading)
+        self.assertEqual(self.finalize().status_code, 201)
+
+
+# ============================
+# 🔹 MEDIA JOBS
+# ============================
+
+def png(color, size=(400, 300)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class MediaVariantTests(TestCase):
+    def upload_avatar(self, user, color):
+        user.avatar = png(color)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        user.refresh_from_db()
+        return user.avatar_variants
+
+    def test_avatar_variants_are_rendered_and_replaced(self):
+        user = UserModel.objects.create_user('painter')
+        variants = self.upload_avatar(user, 'red')
+        self.assertEqual(variants['source'], user.avatar.name)
+        self.assertEqual(set(variants) - {'source'}, {'thumb', 'medium'})
+        with default_storage.open(variants['thumb']['webp']) as thumb:
+            self.assertEqual(max(Image.open(thumb).size), 96)
+
+        replaced = self.upload_avatar(user, 'blue')
+        self.assertTrue(default_storage.exists(replaced['medium']['jpeg']))
+        self.assertFalse(default_storage.exists(variants['medium']['jpeg']))
+        self.assertEqual(MediaJobModel.objects.filter(status=MediaJobModel.Status.Done).count(), 2)
+
+    def test_unchanged_file_is_not_processed_again(self):
+        user = UserModel.objects.create_user('painter')
+        self.upload_avatar(user, 'red')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(MediaJobModel.objects.count(), 1)
+
+
+@override_settings(MEDIA_JOB_MAX_ATTEMPTS=2, MEDIA_JOB_LEASE=60)
+class MediaJobLeaseTests(TestCase):
+    def job(self, claimed_ago, attempts=0):
+        return MediaJobModel.objects.create(kind=MediaJobModel.Kind.Avatar, object_id=1, attempts=attempts,
+                                            status=MediaJobModel.Status.Running,
+                                            claimed_at=timezone.now() - timedelta(seconds=claimed_ago))
+
+    def test_expired_jobs_are_claimed_again(self):
+        expired, running = self.job(claimed_ago=120), self.job(claimed_ago=10)
+        self.assertEqual(claim_jobs(10), [expired.id])
+        expired.refresh_from_db()
+        self.assertEqual((expired.status, expired.attempts), (MediaJobModel.Status.Running, 1))
+        running.refresh_from_db()
+        self.assertEqual((running.status, running.attempts), (MediaJobModel.Status.Running, 0))
+
+    def test_last_attempt_fails(self):
+        job = self.job(claimed_ago=120, attempts=1)
+        self.assertEqual(claim_jobs(10), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (MediaJobModel.Status.Failed, 2))
+
+
+# ============================
+# 🔹 MEDIA SERVING
+# ============================
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+        self.assertEqual(parse_range('bytes=990-5000', 1000), (990, 999))
+
+    def test_whole_file(self):
+        for header in (None, '', 'bytes=-', 'bytes=0-1,5-6', 'items=0-1', 'bytes=50-10'):
+            self.assertIsNone(parse_range(header, 1000), header)
+
+    def test_not_satisfiable(self):
+        for header in ('bytes=1000-', 'bytes=2000-3000', 'bytes=-0'):
+            with self.assertRaises(RangeNotSatisfiable, msg=header):
+                parse_range(header, 1000)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), MEDIA_ACCEL_MODE=None)
+class ServeMediaTests(TestCase):
+    BODY = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.write('posts/clip.mp4', self.BODY)
+        self.etag = self.client.get('/media/posts/clip.mp4')['ETag']
+
+    def write(self, name, body):
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(body)
+
+    def get(self, **headers):
+        return self.client.get('/media/posts/clip.mp4', **headers)
+
+    def test_suffix_range(self):
+        response = self.get(HTTP_RANGE='bytes=-24')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 1000-1023/1024')
+        self.assertEqual(b''.join(response.streaming_content), self.BODY[-24:])
+
+    def test_open_ended_range(self):
+        response = self.get(HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.BODY[1000:])
+
+    def test_not_satisfiable(self):
+        response = self.get(HTTP_RANGE='bytes=4096-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_if_range(self):
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=self.etag).status_code, 206)
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.BODY)
+
+    def test_if_none_match(self):
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=self.etag).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=f'W/{self.etag}').status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_long_lived_cache_headers(self):
+        response = self.get()
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    @override_settings(MEDIA_ACCEL_MODE='x-accel-redirect')
+    def test_proxy_offload(self):
+        response = self.get(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/posts/clip.mp4')
+        self.assertEqual(response.content, b'')
+
+    def test_path_traversal(self):
+        self.write('../outside.txt', b'secret')
+        self.addCleanup(os.remove, os.path.join(settings.MEDIA_ROOT, '../outside.txt'))
+        for path in ('/media/../outside.txt', '/media/%2e%2e/outside.txt', '/media/posts/../../outside.txt'):
+            self.assertEqual(self.client.get(path).status_code, 404, path)
+
+    def test_upload_chunks_are_not_served(self):
+        self.write(f'{settings.UPLOAD_TEMP_DIR}/abc.part', b'partial')
+        self.assertEqual(self.client.get(f'/media/{settings.UPLOAD_TEMP_DIR}/abc.part').status_code, 404)
+        self.assertEqual(self.client.get(f'/media/posts/../{settings.UPLOAD_TEMP_DIR}/abc.part').status_code, 404)
+
+
+# ============================
+# 🔹 RESPONSE CACHE
+# ============================
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(engagement_buffer._drain)
+        self.author = UserModel.objects.create_user('author')
+        self.post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        MusicModel.objects.create(music_name='first', singer='A', file='music/first.mp3')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def write(self, fn, *args, **kwargs):
+        # versions are bumped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return fn(*args, **kwargs)
+
+    def test_writes_invalidate_cached_lists(self):
+        self.assertEqual(self.client.get('/posts/musics/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/posts/musics/')['X-Cache'], 'HIT')
+
+        self.write(MusicModel.objects.create, music_name='second', singer='B', file='music/second.mp3')
+        response = self.client.get('/posts/musics/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('second', [music['music_name'] for music in response.data['results']])
+
+    def test_cached_post_gets_live_counters_and_viewer_flags(self):
+        self.client.get(f'/posts/{self.post.id}/')
+        self.write(LikeModel.objects.create, user=self.author, post=self.post)
+        self.write(bump_post_counters, self.post.id, likes_count=1)
+
+        response = self.client.get(f'/posts/{self.post.id}/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertTrue(response.data['liked_by_current_user'])
+
+    def test_post_edits_and_hashtag_changes_invalidate_the_post(self):
+        self.client.get(f'/posts/{self.post.id}/')
+        self.post.title = 'renamed'
+        self.write(self.post.save)
+        response = self.client.get(f'/posts/{self.post.id}/')
+        self.assertEqual((response['X-Cache'], response.data['title']), ('MISS', 'renamed'))
+
+        tag = self.write(HashtagModel.objects.create, name='cats')
+        self.client.get(f'/posts/{self.post.id}/')
+        self.write(self.post.hashtags.add, tag)
+        self.assertEqual(self.client.get(f'/posts/{self.post.id}/')['X-Cache'], 'MISS')
+
+
+# ============================
+# 🔹 CONDITIONAL GET
+# ============================
+
+class PostConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = UserModel.objects.create_user('author')
+        self.post = PostModel.objects.create(user=self.author, post='posts/clip.mp4', title='clip')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.addCleanup(engagement_buffer._drain)
+
+    def get(self, **headers):
+        return self.client.get(f'/posts/{self.post.id}/', **headers)
+
+    def assertETagChanges(self, change):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_counter_change(self):
+        response = self.assertETagChanges(lambda: bump_post_counters(self.post.id, likes_count=1))
+        self.assertEqual(response.data['likes_count'], 1)
+
+    def test_hashtag_change(self):
+        tag = HashtagModel.objects.create(name='cats')
+        response = self.assertETagChanges(lambda: self.post.hashtags.add(tag))
+        self.assertEqual([hashtag['name'] for hashtag in response.data['hashtags']], ['cats'])
+
+    def test_missing_post_is_not_conditional(self):
+        response = self.client.get('/posts/999999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+
+# ============================
+# 🔹 POST CARDS
+# ============================
+
+class PostCardRendererTests(TestCase):
+    """The card fast path must build exactly what ``PostModelSerializer`` builds."""
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = UserModel.objects.create_user('viewer')
+        author = UserModel.objects.create_user('author', bio='posting', avatar='avatars/a.png',
+                                               avatar_variants={'thumb': {'webp': 'variants/a_thumb.webp'}})
+        music = MusicModel.objects.create(music_name='song', singer='singer', cover='covers/c.png',
+                                          cover_variants={'thumb': {'webp': 'variants/c_thumb.webp'}})
+        self.post = PostModel.objects.create(
+            user=author, music=music, post='posts/clip.mp4', title='clip', description='#dance',
+            genre=PostModel.GenreChoice.Comedy, likes_count=2, comments_count=1,
+            media_variants={'source': 'posts/clip.mp4', 'large': {'webp': 'variants/p_large.webp'}},
+        )
+        self.post.hashtags.set([HashtagModel.objects.create(name='dance'), HashtagModel.objects.create(name='fun')])
+        LikeModel.objects.create(user=self.viewer, post=self.post)
+        SaveModel.objects.create(user=self.viewer, post=self.post)
+        self.addCleanup(engagement_buffer._drain)
+
+    def assertSameAsSerializer(self, url):
+        request = Request(APIRequestFactory().get(url))
+        request.user = self.viewer
+        spec = FieldSpec.from_request(request)
+        state = ViewerState.for_posts(self.viewer, [self.post.id])
+        expected = PostModelSerializer(self.post, context={'request': request, 'viewer_state': state,
+                                                           'field_spec': spec}).data
+        rows = PostModel.objects.filter(id=self.post.id).values(*card_columns(spec))
+        card = PostCardRenderer(request=request, viewer_state=state, spec=spec).render(rows)[0]
+        self.assertEqual(list(card), list(expected))
+        self.assertEqual(json.loads(JSONRenderer().render(card)), json.loads(JSONRenderer().render(expected)))
+
+    def test_same_as_serializer(self):
+        self.assertSameAsSerializer('/posts/')
+
+    def test_sparse_card_same_as_serializer(self):
+        self.assertSameAsSerializer('/posts/?fields=id,user.username,music,hashtags,liked_by_current_user,poster'
+                                    '&expand=user')
+
+    def test_list_matches_retrieve(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        card = client.get('/posts/').data['results'][0]
+        self.assertEqual(json.loads(JSONRenderer().render(card)),
+                         json.loads(JSONRenderer().render(client.get(f'/posts/{self.post.id}/').data)))
+
+
+# ============================
+# 🔹 SPARSE FIELDSETS
+# ============================
+
+class FieldSpecTests(SimpleTestCase):
+    def spec(self, query):
+        return FieldSpec.from_request(Request(APIRequestFactory().get(f'/posts/?{query}')))
+
+    def test_no_parameters_means_everything(self):
+        self.assertIsNone(self.spec(''))
+
+    def test_fields_and_expand(self):
+        spec = self.spec('fields=id,user.username,music&expand=')
+        self.assertTrue(spec.includes('id'))
+        self.assertFalse(spec.includes('title'))
+        # naming sub-fields expands a relation even with an empty expand
+        self.assertTrue(spec.expands('user'))
+        self.assertFalse(spec.expands('music'))
+        self.assertEqual(spec.child('user').fields, {'username': {}})
+
+    def test_nested_expand(self):
+        spec = self.spec('expand=post,post.user')
+        self.assertTrue(spec.expands('post'))
+        self.assertTrue(spec.child('post').expands('user'))
+        self.assertFalse(spec.child('post').expands('music'))
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = UserModel.objects.create_user('author')
+        music = MusicModel.objects.create(music_name='song', singer='singer', file='music/song.mp3')
+        self.post = PostModel.objects.create(user=self.author, music=music, post='posts/clip.mp4', title='clip')
+        self.tag = HashtagModel.objects.create(name='dance')
+        self.post.hashtags.set([self.tag])
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def test_fields_keep_only_the_requested_keys(self):
+        card = self.client.get('/posts/?fields=id,title,user.username').data['results'][0]
+        self.assertEqual(card, {'id': self.post.id, 'title': 'clip', 'user': {'username': 'author'}})
+        data = self.client.get(f'/posts/{self.post.id}/?fields=id,title,user.username').data
+        self.assertEqual(data, card)
+
+    def test_unexpanded_relations_are_ids(self):
+        card = self.client.get('/posts/?fields=id,user,music,hashtags&expand=').data['results'][0]
+        self.assertEqual(card, {'id': self.post.id, 'user': self.author.id, 'music': self.post.music_id,
+                                'hashtags': [self.tag.id]})
+
+    def test_excluded_fields_skip_their_queries(self):
+        with CaptureQueriesContext(connection) as full:
+            self.client.get('/users/me/')
+        with CaptureQueriesContext(connection) as sparse:
+            data = self.client.get('/users/me/?fields=id,username').data
+        self.assertEqual(data, {'id': self.author.id, 'username': 'author'})
+        self.assertLess(len(sparse), len(full))
+
+    def test_no_parameters_keep_the_full_payload(self):
+        card = self.client.get('/posts/').data['results'][0]
+        self.assertEqual(card['user']['username'], 'author')
+        self.assertEqual(card['hashtags'], [{'id': self.tag.id, 'name': 'dance'}])
+        self.assertIn('liked_by_current_user', card)
+
+
+# ============================
+# 🔹 SEED DATA
+# ============================
+
+class SeedData:
+    """
+    A viewer in a small but realistic world: authors they follow, posts with music and
+    hashtags, comments with replies, likes/saves/reposts, reactions, notifications,
+    timeline rows and "For You" scores. ``grow(n)`` adds ``n`` more units of all of
+    it, including ``n`` times more comments on ``post`` and replies on ``comment``,
+    so a test can compare an endpoint before and after a 10x increase.
+    """
+    AUTHORS = 3
+    POSTS_PER_AUTHOR = 2
+    COMMENTS = 4
+    REPLIES = 5
+
+    def __init__(self):
+        self.viewer = UserModel.objects.create_user('viewer', bio='watching')
+        self.units = 0
+        self.post = self.comment = self.reply = None
+        self.grow(1)
+
+    def _post(self, user, music, title):
+        return PostModel(user=user, music=music, post='posts/seed.mp4', title=title,
+                         description=f'{title} #dance', genre=PostModel.GenreChoice.Comedy)
+
+    def grow(self, units=1):
+        for _ in range(units):
+            self._unit(self.units)
+            self.units += 1
+
+    def _unit(self, n):
+        viewer = self.viewer
+        authors = UserModel.objects.bulk_create([
+            UserModel(username=f'author{n}_{i}', first_name='Author', bio='posting') for i in range(self.AUTHORS)
+        ])
+        Follow.objects.bulk_create([Follow(follower=viewer, following=author) for author in authors])
+        Follow.objects.bulk_create([Follow(follower=authors[0], following=viewer)])
+
+        musics = MusicModel.objects.bulk_create([
+            MusicModel(singer=f'singer{n}', music_name=f'song{n}_{i}', file='music/seed.mp3') for i in range(2)
+        ])
+        hashtags = HashtagModel.objects.bulk_create([HashtagModel(name=f'tag{n}_{i}') for i in range(3)])
+
+        posts = PostModel.objects.bulk_create(
+            [self._post(author, musics[i % 2], f'dance {n}.{i}')
+             for author in authors for i in range(self.POSTS_PER_AUTHOR)]
+            + [self._post(viewer, musics[0], f'my dance {n}')]
+        )
+        Through = PostModel.hashtags.through
+        Through.objects.bulk_create([
+            Through(postmodel_id=post.id, hashtagmodel_id=hashtag.id)
+            for i, post in enumerate(posts) for hashtag in hashtags[:1 + i % 3]
+        ])
+        if self.post is None:
+            self.post = posts[0]
+        own_post = posts[-1]
+
+        # engagement: the viewer on every other post, the authors on each other's
+        LikeModel.objects.bulk_create(
+            [LikeModel(user=viewer, post=post) for post in posts[::2]]
+            + [LikeModel(user=author, post=post) for author in authors for post in posts if post.user_id != author.id]
+        )
+        SaveModel.objects.bulk_create([SaveModel(user=viewer, post=post) for post in posts[::2]])
+        RepostModel.objects.bulk_create(
+            [RepostModel(user=viewer, post=post, text='look') for post in posts[1::2]]
+            + [RepostModel(user=author, post=self.post) for author in authors]
+        )
+        TimelineModel.objects.bulk_create([
+            TimelineModel(user=viewer, post=post, created_at=post.created_at)
+            for post in posts if post.user_id != viewer.id
+        ])
+
+        # comments: ``COMMENTS`` more on the focus post, one on every other post
+        commenters = authors * self.COMMENTS
+        comments = CommentModel.objects.bulk_create(
+            [CommentModel(post=self.post, user=user, text=f'nice {n}') for user in commenters[:self.COMMENTS]]
+            + [CommentModel(post=post, user=authors[0], text='ok') for post in posts[1:]]
+        )
+        if self.comment is None:
+            self.comment = comments[0]
+        replies = ReplyModel.objects.bulk_create(
+            [ReplyModel(post=self.post, comment=self.comment, user=user, text=f'agreed {n}')
+             for user in (authors * self.REPLIES)[:self.REPLIES]]
+            + [ReplyModel(post=self.post, comment=comment, user=viewer, text='thanks')
+               for comment in comments[1:self.COMMENTS]]
+        )
+        if self.reply is None:
+            self.reply = replies[0]
+        ReactionModel.objects.bulk_create(
+            [ReactionModel(user=viewer, target_type=ReactionModel.TargetType.Comment, target_id=comment.id,
+                           value=ReactionModel.Value.Like if i % 2 else ReactionModel.Value.Dislike)
+             for i, comment in enumerate(comments[1:])]
+            + [ReactionModel(user=viewer, target_type=ReactionModel.TargetType.Reply, target_id=reply.id,
+                             value=ReactionModel.Value.Like)
+               for reply in replies[1:]]
+            + [ReactionModel(user=author, target_type=ReactionModel.TargetType.Comment, target_id=self.comment.id,
+                             value=ReactionModel.Value.Like) for author in authors]
+            + [ReactionModel(user=author, target_type=ReactionModel.TargetType.Reply, target_id=self.reply.id,
+                             value=ReactionModel.Value.Dislike) for author in authors]
+        )
+        TrendingHashtagModel.objects.bulk_create([
+            TrendingHashtagModel(window=TrendingHashtagModel.Window.Day, rank=n * len(hashtags) + i, hashtag=hashtag,
+                                 score=1.0 / (n + 1), posts_count=len(posts))
+            for i, hashtag in enumerate(hashtags)
+        ])
+
+        now = timezone.now()
+        NotificationModel.objects.bulk_create(
+            [NotificationModel(receiver=viewer, sender=authors[0], notif_type=NotificationModel.NotifType.Follow,
+                               updated_at=now)]
+            + [NotificationModel(receiver=viewer, sender=author, notif_type=NotificationModel.NotifType.Like,
+                                 post=own_post, actors_count=2, updated_at=now) for author in authors]
+            + [NotificationModel(receiver=viewer, sender=authors[1], notif_type=NotificationModel.NotifType.Comment,
+                                 post=comments[-1].post, comment=comments[-1], updated_at=now)]
+        )
+
+        posts = PostModel.objects.filter(id__in=[post.id for post in posts]).prefetch_related('hashtags')
+        PostScoreModel.objects.bulk_create(build_score_rows(posts, now))
+        index_posts([post.id for post in posts])
+
+
+# ============================
+# 🔹 QUERY BUDGETS
+# ============================
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(\.\d+)?\b'), '?'),
+    (re.compile(r'\((?:\s*(?:%s|\?)\s*,?)+\)'), '(...)'),
+]
+
+
+def normalize_sql(sql):
+    """The shape of a statement: literals and IN lists replaced, so repeats of one query group together."""
+    for pattern, replacement in _LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def describe_queries(queries):
+    """Every statement, with the ones run more than once (the usual N+1 suspects) listed first."""
+    shapes = Counter(normalize_sql(query['sql']) for query in queries)
+    repeated = [f'  {count}x {sql}' for sql, count in shapes.most_common() if count > 1]
+    lines = ['Repeated statements:'] + (repeated or ['  (none)']) + ['All statements:']
+    lines += [f'  {i}. {query["sql"]}' for i, query in enumerate(queries, 1)]
+    return '\n'.join(lines)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), RESPONSE_CACHE_ENABLED=False, BACKGROUND_TASKS_EAGER=True)
+class QueryBudgetTestCase(TestCase):
+    """
+    Base class of the per-endpoint budget tests. ``assertQueryBudget`` runs a request
+    against the seeded data, grows the data 10x (and the page size, when the endpoint
+    takes one) and requires the same number of queries each time, at most ``budget``.
+    On-commit work (notifications, counter publishing) is executed and counted.
+    """
+    GROWTH = 10
+
+    def setUp(self):
+        self.data = SeedData()
+        self.client = APIClient()
+        self.client.force_authenticate(self.data.viewer)
+
+    def count_queries(self, method, url, data=None, format='json', status=None, content_type=None, headers=None):
+        # every run starts cold: cached counts and the autocomplete index are rebuilt
+        cache.clear()
+        autocomplete.reset()
+        # a raw body (e.g. an upload chunk) is sent as is with its content type
+        options = {'content_type': content_type} if content_type else {'format': format}
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = getattr(self.client, method)(url, data, **options, **(headers or {}))
+        message = f'{method.upper()} {url}: {response.status_code} {response.data}'
+        if status is None:
+            self.assertLess(response.status_code, 400, message)
+        else:
+            self.assertEqual(response.status_code, status, message)
+        return queries.captured_queries
+
+    def assertQueryBudget(self, budget, url, method='get', data=None, page_size=None, setup=None, format='json',
+                          status=None, content_type=None, headers=None):
+        """
+        ``url``/``data``/``headers`` may be callables of the seed data. ``page_size=(param,
+        small)`` also grows that query parameter 10x. ``setup(data)`` runs before every
+        request, so that writes always take the same path (e.g. like, never unlike).
+        ``status`` is the expected response status when it is not a success.
+        """
+        runs = []
+        for step in ('seeded', 'data x10', 'page size x10'):
+            if step == 'data x10':
+                self.data.grow(self.GROWTH - 1)
+            if step == 'page size x10' and page_size is None:
+                continue
+            if setup is not None:
+                setup(self.data)
+            target = url(self.data) if callable(url) else url
+            if page_size is not None:
+                param, size = page_size
+                size = size * self.GROWTH if step == 'page size x10' else size
+                target += ('&' if '?' in target else '?') + f'{param}={size}'
+            payload = data(self.data) if callable(data) else data
+            extra = headers(self.data) if callable(headers) else headers
+            queries = self.count_queries(method, target, payload, format, status, content_type, extra)
+            runs.append((step, target, queries))
+
+        counts = [len(queries) for _, _, queries in runs]
+        for step, target, queries in runs:
+            if len(queries) != counts[0] or len(queries) > budget:
+                self.fail(
+                    f'{method.upper()} {target} ({step}) ran {len(queries)} queries; budget {budget}, '
+                    f'counts per run {counts}.\n{describe_queries(queries)}'
+                )
+
+
+# ============================
+# 🔹 POSTS
+# ============================
+
+def _new_video():
+    return SimpleUploadedFile('clip.mp4', b'\x00\x00\x00\x18ftypmp42', content_type='video/mp4')
+
+
+class PostQueryBudgetTests(QueryBudgetTestCase):
+    def test_post_list(self):
+        self.assertQueryBudget(7, '/posts/', page_size=('page_size', 5))
+
+    def test_post_list_sparse(self):
+        self.assertQueryBudget(1, '/posts/?fields=id,title,poster', page_size=('page_size', 5))
+
+    def test_post_list_comments_preview(self):
+        self.assertQueryBudget(8, '/posts/?comments_preview=2', page_size=('page_size', 5))
+
+    def test_post_detail(self):
+        self.assertQueryBudget(6, lambda data: f'/posts/{data.post.id}/')
+
+    def test_following_feed(self):
+        self.assertQueryBudget(9, '/posts/following/', page_size=('page_size', 5))
+
+    def test_for_you_feed(self):
+        self.assertQueryBudget(11, '/posts/for_you/', page_size=('limit', 5))
+
+    def test_search(self):
+        self.assertQueryBudget(8, '/posts/search/?q=dance', page_size=('limit', 5))
+
+    def test_post_comments(self):
+        self.assertQueryBudget(4, lambda data: f'/posts/{data.post.id}/comments/', page_size=('page_size', 5))
+
+    def test_post_reposts(self):
+        self.assertQueryBudget(2, lambda data: f'/posts/{data.post.id}/reposts/', page_size=('page_size', 5))
+
+    def test_post_create(self):
+        self.assertQueryBudget(22, '/posts/', method='post', format='multipart',
+                               data=lambda data: {'title': 'new', 'post': _new_video()})
+
+    def test_post_update(self):
+        self.assertQueryBudget(10, lambda data: f'/posts/{data.post.id}/', method='patch',
+                               data={'title': 'renamed'}, setup=self._own_focus_post)
+
+    def _own_focus_post(self, data):
+        # already processed, so the edit does not queue a media job
+        PostModel.objects.filter(id=data.post.id).update(user=data.viewer, media_variants={'source': 'posts/seed.mp4'})
+
+    def test_post_destroy(self):
+        def doomed(data):
+            # a fresh copy of the focus post, engaged with like it
+            post = PostModel.objects.create(user=data.viewer, music=data.post.music, post='posts/seed.mp4',
+                                            title='doomed', media_variants={'source': 'posts/seed.mp4'})
+            post.hashtags.set(data.post.hashtags.all())
+            LikeModel.objects.create(user=data.post.user, post=post)
+            comment = CommentModel.objects.create(user=data.post.user, post=post, text='bye')
+            ReplyModel.objects.create(user=data.viewer, comment=comment, post=post, text='bye')
+            data.doomed = post
+
+        self.assertQueryBudget(25, lambda data: f'/posts/{data.doomed.id}/', method='delete', setup=doomed)
+
+
+class UploadQueryBudgetTests(QueryBudgetTestCase):
+    BLOB = b'\x00\x00\x00\x18ftypmp42' * 10
+
+    def _session(self, data, complete=False):
+        session = UploadSessionModel.objects.create(
+            user=data.viewer, filename='clip.mp4', size=len(self.BLOB), sha256=hashlib.sha256(self.BLOB).hexdigest(),
+            offset=len(self.BLOB) if complete else 0,
+        )
+        if complete:
+            os.makedirs(os.path.dirname(temp_path(session)), exist_ok=True)
+            with open(temp_path(session), 'wb') as fh:
+                fh.write(self.BLOB)
+        data.upload = session
+
+    def test_upload_create(self):
+        self.assertQueryBudget(1, '/posts/uploads/', method='post',
+                               data={'filename': 'clip.mp4', 'size': 100, 'sha256': '0' * 64})
+
+    def test_upload_detail(self):
+        self.assertQueryBudget(1, lambda data: f'/posts/uploads/{data.upload.id}/', setup=self._session)
+
+    def test_upload_chunk(self):
+        self.assertQueryBudget(2, lambda data: f'/posts/uploads/{data.upload.id}/chunk/', method='put',
+                               data=self.BLOB, content_type='application/octet-stream',
+                               headers={'HTTP_CONTENT_RANGE': f'bytes 0-{len(self.BLOB) - 1}/{len(self.BLOB)}'},
+                               setup=self._session)
+
+    def test_upload_finalize(self):
+        self.assertQueryBudget(26, lambda data: f'/posts/uploads/{data.upload.id}/finalize/', method='post',
+                               data={'title': 'uploaded'},
+                               setup=lambda data: self._session(data, complete=True))
+
+    def test_upload_destroy(self):
+        self.assertQueryBudget(2, lambda data: f'/posts/uploads/{data.upload.id}/', method='delete',
+                               setup=self._session)
+
+
+class EngagementQueryBudgetTests(QueryBudgetTestCase):
+    @staticmethod
+    def _untouched(model):
+        """Before each toggle: the viewer has not engaged with the post and nobody was notified yet."""
+        def setup(data):
+            model.objects.filter(user=data.viewer, post=data.post).delete()
+            NotificationModel.objects.filter(post=data.post).delete()
+        return setup
+
+    def test_likes(self):
+        self.assertQueryBudget(6, '/posts/likes/')
+
+    def test_likes_sparse(self):
+        self.assertQueryBudget(2, '/posts/likes/?expand=')
+
+    def test_like_toggle(self):
+        self.assertQueryBudget(14, '/posts/likes/', method='post', data=lambda data: {'post': data.post.id},
+                               setup=self._untouched(LikeModel))
+
+    def test_saves(self):
+        self.assertQueryBudget(6, '/posts/saves/')
+
+    def test_save_toggle(self):
+        self.assertQueryBudget(7, '/posts/saves/', method='post', data=lambda data: {'post': data.post.id},
+                               setup=self._untouched(SaveModel))
+
+    def test_reposts(self):
+        self.assertQueryBudget(2, '/posts/reposts/')
+
+    def test_repost_toggle(self):
+        self.assertQueryBudget(7, '/posts/reposts/', method='post', data=lambda data: {'post': data.post.id},
+                               setup=self._untouched(RepostModel))
+
+    @override_settings(VIEW_BUFFER_MAX_EVENTS=1)
+    def test_views(self):
+        self.assertQueryBudget(6, '/posts/views/', method='post',
+                               data=lambda data: {'events': [{'post': data.post.id}]},
+                               setup=self._untouched(ViewModel))
+
+
+class CommentQueryBudgetTests(QueryBudgetTestCase):
+    @staticmethod
+    def _unnotified(data):
+        NotificationModel.objects.filter(post=data.post).delete()
+
+    @staticmethod
+    def _unreacted(data):
+        ReactionModel.objects.filter(user=data.viewer, target_id__in=(data.comment.id, data.reply.id)).delete()
+
+    def test_comments(self):
+        self.assertQueryBudget(3, lambda data: f'/posts/comments/?post={data.post.id}', page_size=('page_size', 5))
+
+    def test_comment_detail(self):
+        self.assertQueryBudget(3, lambda data: f'/posts/comments/{data.comment.id}/')
+
+    def test_comment_replies(self):
+        self.assertQueryBudget(3, lambda data: f'/posts/comments/{data.comment.id}/replies/',
+                               page_size=('page_size', 5))
+
+    def test_comment_create(self):
+        self.assertQueryBudget(17, '/posts/comments/', method='post',
+                               data=lambda data: {'post': data.post.id, 'text': 'wow'}, setup=self._unnotified)
+
+    def test_reply_comments(self):
+        self.assertQueryBudget(3, '/posts/reply_comments/')
+
+    def test_reply_create(self):
+        self.assertQueryBudget(14, '/posts/reply_comments/', method='post',
+                               data=lambda data: {'post': data.post.id, 'comment': data.comment.id, 'text': 'yes'},
+                               setup=self._unnotified)
+
+    def test_comment_likes(self):
+        self.assertQueryBudget(2, '/posts/comment_likes/')
+
+    def test_comment_dislikes(self):
+        self.assertQueryBudget(2, '/posts/comment_dislikes/')
+
+    def test_comment_like_toggle(self):
+        self.assertQueryBudget(11, '/posts/comment_likes/', method='post',
+                               data=lambda data: {'comment': data.comment.id}, setup=self._unreacted)
+
+    def test_reply_comment_likes(self):
+        self.assertQueryBudget(2, '/posts/reply_comment_likes/')
+
+    def test_reply_comment_dislikes(self):
+        self.assertQueryBudget(2, '/posts/reply_comment_dislikes/')
+
+    def test_reply_comment_like_toggle(self):
+        self.assertQueryBudget(9, '/posts/reply_comment_likes/', method='post',
+                               data=lambda data: {'reply_comment': data.reply.id}, setup=self._unreacted)
+
+
+class CatalogQueryBudgetTests(QueryBudgetTestCase):
+    def test_hashtags(self):
+        self.assertQueryBudget(2, '/posts/hashtags/')
+
+    def test_trending_hashtags(self):
+        self.assertQueryBudget(1, '/posts/hashtags/trending/')
+
+    def test_musics(self):
+        self.assertQueryBudget(2, '/posts/musics/')
+
+    def test_music_detail(self):
+        self.assertQueryBudget(1, lambda data: f'/posts/musics/{data.post.music_id}/')
+
+    def test_genres(self):
+        self.assertQueryBudget(0, '/posts/genres/')
+
+    def test_autocomplete(self):
+        # a cold index: one read per kind (hashtags, musics, users) and their popularity
+        self.assertQueryBudget(6, '/posts/autocomplete/?q=tag')
+
+
+class NotificationQueryBudgetTests(QueryBudgetTestCase):
+    def test_notifications(self):
+        self.assertQueryBudget(1, '/posts/notifications/', page_size=('page_size', 2))
+
+    def test_unread_count(self):
+        self.assertQueryBudget(1, '/posts/notifications/unread_count/')
+
+    def test_mark_read(self):
+        self.assertQueryBudget(2, '/posts/notifications/read/', method='post')
+
+
+class StatsQueryBudgetTests(QueryBudgetTestCase):
+    def test_stats(self):
+        self.data.viewer.is_staff = True
+        self.assertQueryBudget(0, '/posts/stats/')
+
+
+# ============================
+# 🔹 BENCHMARKS
+# ============================
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        self.assertEqual(percentile([1, 2, 3, 4, 5, 6], 0.50), 3)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 0.50), 3)
+        self.assertEqual(percentile(list(range(1, 101)), 0.95), 95)
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.50))
+
+
+class SeedScaleTests(TestCase):
+    def setUp(self):
+        self.addCleanup(engagement_buffer._drain)
+        self.addCleanup(view_buffer.flush)
+
+    def seed(self, **sizes):
+        options = dict(users=20, follows=60, musics=3, hashtags=5, posts=30, likes=100, comments=40, replies=20,
+                       saves=20, reposts=10, views=200)
+        options.update(sizes)
+        call_command('seed_scale', stdout=StringIO(), **options)
+
+    def test_creates_requested_rows_and_derived_data(self):
+        self.seed()
+        self.assertEqual(UserModel.objects.filter(username__startswith='seed_').count(), 20)
+        self.assertEqual(PostModel.objects.count(), 30)
+        self.assertEqual(sum(PostModel.objects.values_list('likes_count', flat=True)), LikeModel.objects.count())
+        self.assertTrue(TimelineModel.objects.exists())
+        self.assertEqual(PostScoreModel.objects.count(), 30)
+
+    def test_existing_prefix_is_rejected(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+    def test_benchmark_rolls_back_writes(self):
+        self.seed()
+        likes = LikeModel.objects.count()
+        out = StringIO()
+        call_command('benchmark_load', requests=40, warmup=0, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['requests'], 40)
+        self.assertEqual(report['overall']['count'], 40)
+        self.assertEqual(report['overall']['errors'], 0)
+        self.assertEqual(LikeModel.objects.count(), likes)
+
+
+# ============================
+# 🔹 PROFILING
+# ============================
+
+@override_settings(PROFILING_SAMPLE_RATE=0, PROFILING_TOKEN='s3cret')
+class ProfilingTests(TestCase):
+    def test_anonymous_override_is_ignored(self):
+        response = self.client.get('/posts/', HTTP_X_PROFILE='1')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_token_override(self):
+        response = self.client.get('/posts/', HTTP_X_PROFILE='s3cret')
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests_get_no_header(self):
+        self.assertNotIn('Server-Timing', self.client.get('/posts/'))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests_feed_staff_stats(self):
+        self.addCleanup(profiling_stats.reset)
+        profiling_stats.reset()
+        self.client.get('/posts/')
+        self.client.get('/posts/')
+        client = APIClient()
+        client.force_authenticate(UserModel.objects.create_user('viewer'))
+        self.assertEqual(client.get('/posts/stats/').status_code, 403)
+        client.force_authenticate(UserModel.objects.create_user('staff', is_staff=True))
+        routes = client.get('/posts/stats/').data['routes']
+        self.assertEqual(routes['GET posts-list']['samples'], 2)
+        self.assertEqual(sum(routes['GET posts-list']['histogram_ms'].values()), 2)
+
+
+# ============================
+# 🔹 METRICS
+# ============================
+
+@override_settings(METRICS_TOKEN='s3cret')
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.addCleanup(engagement_buffer._drain)
+
+    def scrape(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def sample(self, text, name, **labels):
+        """Value of one sample, labels in any order; 0 when it was never recorded."""
+        wanted = {f'{key}="{value}"' for key, value in labels.items()}
+        for line in text.splitlines():
+            metric, _, value = line.rpartition(' ')
+            if metric.split('{')[0] == name and wanted <= set(metric.partition('{')[2].rstrip('}').split(',')):
+                return float(value)
+        return 0.0
+
+    def test_viewset_request_is_labelled_by_action(self):
+        before = self.scrape()
+        self.client.get('/posts/')
+        self.client.get('/posts/0/')
+        after = self.scrape()
+
+        def delta(name, **labels):
+            return self.sample(after, name, **labels) - self.sample(before, name, **labels)
+
+        list_labels = {'view': 'PostViewSet', 'action': 'list', 'method': 'GET'}
+        self.assertEqual(delta('http_request_duration_seconds_count', **list_labels), 1)
+        self.assertEqual(delta('http_responses_total', status='200', **list_labels), 1)
+        self.assertEqual(delta('http_responses_total', view='PostViewSet', action='retrieve', status='404'), 1)
+        self.assertGreater(delta('http_request_db_queries_count', view='PostViewSet', action='list'), 0)
+        self.assertGreater(delta('db_query_duration_seconds_count', alias='default'), 0)
+        self.assertNotIn('view="metrics"', after)
+
+    def test_created_objects_are_counted_on_commit(self):
+        author = UserModel.objects.create_user('author')
+        before = self.scrape()
+        with self.captureOnCommitCallbacks(execute=True):
+            post = PostModel.objects.create(user=author, post='posts/clip.mp4', title='clip')
+            LikeModel.objects.create(user=author, post=post)
+        with self.captureOnCommitCallbacks(execute=False):
+            Follow.objects.create(follower=UserModel.objects.create_user('fan'), following=author)
+        after = self.scrape()
+        for kind, created in (('post', 1), ('like', 1), ('follow', 0)):
+            self.assertEqual(self.sample(after, 'tiktok_objects_created_total', kind=kind)
+                             - self.sample(before, 'tiktok_objects_created_total', kind=kind), created)
+
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_hidden_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
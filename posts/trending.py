@@ -0,0 +1,215 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from posts.models import PostModel, HashtagUsageModel, TrendingHashtagModel
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = {
+    TrendingHashtagModel.Window.Hour: timedelta(hours=1),
+    TrendingHashtagModel.Window.Day: timedelta(hours=24),
+    TrendingHashtagModel.Window.Week: timedelta(days=7),
+}
+# a post tagged with the hashtag counts as much as this many likes/comments/saves/reposts
+POST_WEIGHT = 3
+TRENDING_SIZE = 50
+BUCKET_RETENTION = timedelta(days=8)
+CACHE_TIMEOUT = 15 * 60
+# engagement events are tallied in-process and written this often, or at this many
+ENGAGEMENT_FLUSH_INTERVAL = 10
+ENGAGEMENT_BUFFER_MAX_EVENTS = 1000
+
+
+def _cache_key(window):
+    return f'trending:hashtags:{window}'
+
+
+def current_bucket(now=None):
+    now = now or timezone.now()
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+# ============================
+# 🔹 RECORDING
+# ============================
+
+def record_hashtag_usage(hashtag_ids, posts=0, engagement=0):
+    """Add to the current hourly bucket of each hashtag: an insert-if-missing and one UPDATE."""
+    hashtag_ids = list(hashtag_ids)
+    if not hashtag_ids or not (posts or engagement):
+        return
+
+    bucket = current_bucket()
+    HashtagUsageModel.objects.bulk_create(
+        [HashtagUsageModel(hashtag_id=hashtag_id, bucket=bucket) for hashtag_id in hashtag_ids],
+        ignore_conflicts=True,
+    )
+    updates = {}
+    if posts:
+        updates['posts_count'] = F('posts_count') + posts
+    if engagement:
+        updates['engagement_count'] = F('engagement_count') + engagement
+    HashtagUsageModel.objects.filter(hashtag_id__in=hashtag_ids, bucket=bucket).update(**updates)
+
+
+def record_post_engagement(amounts):
+    """
+    Add ``{post_id: amount}`` to the current bucket of each post's hashtags: one read of
+    the hashtags, then one ``record_hashtag_usage`` per distinct total.
+    """
+    totals = Counter()
+    rows = PostModel.hashtags.through.objects.filter(postmodel_id__in=list(amounts))
+    for post_id, hashtag_id in rows.values_list('postmodel_id', 'hashtagmodel_id'):
+        totals[hashtag_id] += amounts[post_id]
+
+    by_amount = defaultdict(list)
+    for hashtag_id, amount in totals.items():
+        by_amount[amount].append(hashtag_id)
+    for amount, hashtag_ids in by_amount.items():
+        record_hashtag_usage(hashtag_ids, engagement=amount)
+
+
+class EngagementBuffer:
+    """
+    In-process tally of likes, saves, reposts and comments per post, so the write
+    requests themselves never touch the buckets. Flushed through
+    ``record_post_engagement`` when ``ENGAGEMENT_BUFFER_MAX_EVENTS`` are pending, every
+    ``ENGAGEMENT_FLUSH_INTERVAL`` seconds, and at interpreter exit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._amounts = Counter()
+        self._events = 0
+        self._timer = None
+
+    def add(self, post_id, amount=1):
+        with self._lock:
+            self._amounts[post_id] += amount
+            self._events += 1
+            should_flush = self._events >= ENGAGEMENT_BUFFER_MAX_EVENTS
+
+        if should_flush:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def _ensure_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(ENGAGEMENT_FLUSH_INTERVAL, self.flush_quietly)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush_quietly(self):
+        close_old_connections()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Hashtag engagement flush failed")
+        finally:
+            close_old_connections()
+
+    def _drain(self):
+        with self._lock:
+            amounts, self._amounts, self._events = self._amounts, Counter(), 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return amounts
+
+    def flush(self):
+        with self._flush_lock:
+            amounts = self._drain()
+            if amounts:
+                record_post_engagement(amounts)
+
+
+engagement_buffer = EngagementBuffer()
+atexit.register(engagement_buffer.flush_quietly)
+
+
+# ============================
+# 🔹 ROLL-UP (periodic)
+# ============================
+
+def compute_trending(now=None):
+    """
+    Rebuild the trending list of every window from the hourly buckets and refresh the cache.
+    Only reads ``HashtagUsageModel``; returns ``{window: number_of_rows}``.
+
+    A window is its span's worth of hourly buckets, the current (partial) one included,
+    so it never reaches further back than the span: "1h" is the current hour so far.
+    """
+    now = now or timezone.now()
+    summary = {}
+    for window, span in WINDOWS.items():
+        totals = (
+            HashtagUsageModel.objects.filter(bucket__gte=current_bucket(now) - span + timedelta(hours=1))
+            .values('hashtag_id')
+            .annotate(posts=Sum('posts_count'), engagement=Sum('engagement_count'))
+        )
+        ranked = sorted(
+            ((row['posts'] * POST_WEIGHT + row['engagement'], row) for row in totals),
+            key=lambda item: item[0],
+            reverse=True,
+        )[:TRENDING_SIZE]
+
+        rows = [
+            TrendingHashtagModel(
+                window=window,
+                rank=rank,
+                hashtag_id=row['hashtag_id'],
+                score=score,
+                posts_count=row['posts'],
+                engagement_count=row['engagement'],
+            )
+            for rank, (score, row) in enumerate(ranked, start=1)
+        ]
+        with transaction.atomic():
+            TrendingHashtagModel.objects.filter(window=window).delete()
+            TrendingHashtagModel.objects.bulk_create(rows)
+
+        cache.set(_cache_key(window), _load_trending(window), CACHE_TIMEOUT)
+        summary[window] = len(rows)
+
+    HashtagUsageModel.objects.filter(bucket__lt=current_bucket(now - BUCKET_RETENTION)).delete()
+    return summary
+
+
+# ============================
+# 🔹 SERVING
+# ============================
+
+def _load_trending(window):
+    return [
+        {
+            'id': row.hashtag_id,
+            'name': row.hashtag.name,
+            'rank': row.rank,
+            'score': row.score,
+            'posts_count': row.posts_count,
+            'engagement_count': row.engagement_count,
+        }
+        for row in TrendingHashtagModel.objects.filter(window=window).select_related('hashtag')
+    ]
+
+
+def get_trending(window):
+    """The precomputed list for ``window``: from cache, or one indexed read on a miss."""
+    key = _cache_key(window)
+    trending = cache.get(key)
+    if trending is None:
+        trending = _load_trending(window)
+        cache.set(key, trending, CACHE_TIMEOUT)
+    return trending
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from posts.models import UploadSessionModel
+
+READ_BLOCK = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class ChunkError(Exception):
+    def __init__(self, detail, status):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def temp_path(session):
+    return os.path.join(settings.MEDIA_ROOT, settings.UPLOAD_TEMP_DIR, f'{session.id}.part')
+
+
+def parse_content_range(header, size):
+    """``Content-Range: bytes <start>-<end>/<total>`` -> (start, length)."""
+    match = CONTENT_RANGE_RE.match(header or '')
+    if match is None:
+        raise ChunkError('Content-Range must look like "bytes <start>-<end>/<total>"', 400)
+    start, end, total = (int(group) for group in match.groups())
+    if total != size or end < start or end >= size:
+        raise ChunkError('Content-Range does not fit the upload', 416)
+    return start, end - start + 1
+
+
+def write_chunk(session, stream, start, length):
+    """
+    Copy ``length`` bytes from ``stream`` to the session's temp file at ``start``, 64 KiB
+    at a time, so a chunk is never held in memory. Only the chunk that continues at the
+    current ``offset`` is accepted; the offset then moves with a compare-and-set UPDATE,
+    so a concurrent or replayed chunk cannot move it twice. Returns the new offset.
+    """
+    if start != session.offset:
+        raise ChunkError(f'Expected a chunk starting at {session.offset}', 409)
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise ChunkError(f'Chunks are limited to {settings.UPLOAD_CHUNK_MAX_SIZE} bytes', 413)
+
+    path = temp_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as fh:
+        fh.seek(start)
+        while written < length:
+            block = stream.read(min(READ_BLOCK, length - written))
+            if not block:
+                break
+            fh.write(block)
+            written += len(block)
+        fh.truncate(start + written)
+    if written != length:
+        raise ChunkError(f'Chunk ended after {written} of {length} bytes', 400)
+
+    moved = UploadSessionModel.objects.filter(pk=session.pk, offset=start).update(
+        offset=start + written, updated_at=timezone.now())
+    if not moved:
+        raise ChunkError('Another chunk was written concurrently', 409)
+    session.offset = start + written
+    return session.offset
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(READ_BLOCK * 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discard(session):
+    try:
+        os.remove(temp_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def expire_sessions(now=None):
+    """
+    Delete unfinished sessions idle for longer than ``UPLOAD_SESSION_TTL`` seconds, with their
+    files; also those left finalizing by a worker that died mid-finalize.
+    """
+    now = now or timezone.now()
+    stale = UploadSessionModel.objects.filter(
+        status__in=(UploadSessionModel.Status.Uploading, UploadSessionModel.Status.Finalizing),
+        updated_at__lt=now - timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+    )
+    count = 0
+    for session in stale.iterator():
+        discard(session)
+        session.delete()
+        count += 1
+    return count
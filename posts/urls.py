@@ -6,7 +6,12 @@ router.register(r'genres', views.GenreListViewSet, basename='genres')
 router.register(r'likes', views.LikeViewSet, basename='likes')
 router.register(r'reposts', views.RepostViewSet, basename='repost')
 router.register(r'hashtags', views.HashtagListView, basename='hashtags')
+router.register(r'autocomplete', views.AutocompleteViewSet, basename='autocomplete')
 router.register(r'saves', views.SaveViewSet, basename='save')
+router.register(r'views', views.ViewEventViewSet, basename='views')
+router.register(r'notifications', views.NotificationViewSet, basename='notifications')
+router.register(r'uploads', views.UploadSessionViewSet, basename='uploads')
+router.register(r'stats', views.ProfilingStatsViewSet, basename='stats')
 router.register(r'musics', views.MusicListView, basename='musics')
 router.register(r'comment_likes', views.CommentLikeViewSet, basename='comment_likes')
 router.register(r'comment_dislikes', views.CommentDislikeViewSet, basename='comment_dislikes')
@@ -0,0 +1,137 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from posts.counters import bump_post_counter_many
+from posts.hll import HyperLogLog
+from posts.models import PostModel, ViewModel, PostViewSketchModel
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """
+    In-process buffer for post view events.
+
+    Authenticated views are collected as ``(post_id, user_id)`` pairs and written with
+    one ``bulk_create(ignore_conflicts=True)``; anonymous views only update a per-post
+    HyperLogLog sketch. A flush happens when ``VIEW_BUFFER_MAX_EVENTS`` events are
+    pending, every ``VIEW_BUFFER_FLUSH_INTERVAL`` seconds, and at interpreter exit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pairs = set()
+        self._sketches = {}
+        self._events = 0
+        self._timer = None
+
+    def add(self, post_id, user_id=None, visitor=None):
+        with self._lock:
+            if user_id is not None:
+                self._pairs.add((post_id, user_id))
+            elif visitor is not None:
+                sketch = self._sketches.get(post_id)
+                if sketch is None:
+                    sketch = self._sketches[post_id] = HyperLogLog()
+                sketch.add(visitor)
+            else:
+                return
+            self._events += 1
+            should_flush = self._events >= settings.VIEW_BUFFER_MAX_EVENTS
+
+        if should_flush:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def _ensure_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(settings.VIEW_BUFFER_FLUSH_INTERVAL, self.flush_quietly)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush_quietly(self):
+        close_old_connections()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("View buffer flush failed")
+        finally:
+            close_old_connections()
+
+    def _drain(self):
+        with self._lock:
+            pairs, sketches = self._pairs, self._sketches
+            self._pairs, self._sketches, self._events = set(), {}, 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return pairs, sketches
+
+    def flush(self):
+        with self._flush_lock:
+            pairs, sketches = self._drain()
+            if not pairs and not sketches:
+                return
+
+            post_ids = {post_id for post_id, _ in pairs} | set(sketches)
+            existing_posts = set(PostModel.objects.filter(id__in=post_ids).values_list('id', flat=True))
+            pairs = {pair for pair in pairs if pair[0] in existing_posts}
+            sketches = {post_id: sketch for post_id, sketch in sketches.items() if post_id in existing_posts}
+
+            with transaction.atomic():
+                if pairs:
+                    self._write_user_views(pairs)
+                if sketches:
+                    self._write_sketches(sketches)
+
+    def _write_user_views(self, pairs):
+        seen = set(
+            ViewModel.objects.filter(
+                post_id__in={post_id for post_id, _ in pairs},
+                user_id__in={user_id for _, user_id in pairs},
+            ).values_list('post_id', 'user_id')
+        )
+        new_pairs = pairs - seen
+        ViewModel.objects.bulk_create(
+            [ViewModel(post_id=post_id, user_id=user_id) for post_id, user_id in new_pairs],
+            ignore_conflicts=True,
+        )
+        bump_post_counter_many('views_count', Counter(post_id for post_id, _ in new_pairs))
+
+    def _write_sketches(self, sketches):
+        stored = PostViewSketchModel.objects.select_for_update().in_bulk(list(sketches))
+        created, updated, deltas = [], [], {}
+        now = timezone.now()
+
+        for post_id, sketch in sketches.items():
+            row = stored.get(post_id)
+            if row is None:
+                row = PostViewSketchModel(post_id=post_id, estimate=0)
+                created.append(row)
+            else:
+                sketch.merge(HyperLogLog.from_bytes(bytes(row.registers)))
+                updated.append(row)
+            estimate = sketch.count()
+            deltas[post_id] = max(estimate - row.estimate, 0)
+            row.registers = sketch.to_bytes()
+            row.estimate = estimate
+            row.updated_at = now
+
+        PostViewSketchModel.objects.bulk_create(created, ignore_conflicts=True)
+        if updated:
+            PostViewSketchModel.objects.bulk_update(updated, ['registers', 'estimate', 'updated_at'])
+        bump_post_counter_many('views_count', deltas)
+
+
+view_buffer = ViewBuffer()
+atexit.register(view_buffer.flush_quietly)
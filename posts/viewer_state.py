@@ -0,0 +1,143 @@
+from django.db.models import Q
+
+from posts.models import LikeModel, SaveModel, RepostModel, ReactionModel, ReplyModel
+from posts.comment_tree import replies_preview
+
+
+class ViewerState:
+    """
+    Which posts of a page the current user has liked, saved and reposted.
+
+    Built once per response with three ``post_id IN (...)`` queries and handed to
+    ``PostModelSerializer`` through the ``viewer_state`` context key, so the
+    ``*_by_current_user`` fields become set lookups instead of an EXISTS per post.
+    """
+
+    def __init__(self, liked=(), saved=(), reposted=()):
+        self.liked = frozenset(liked)
+        self.saved = frozenset(saved)
+        self.reposted = frozenset(reposted)
+
+    MODELS = {'liked': LikeModel, 'saved': SaveModel, 'reposted': RepostModel}
+
+    @classmethod
+    def for_posts(cls, user, post_ids, only=None):
+        """``only`` limits the lookups to some of ``liked``/``saved``/``reposted`` (sparse fieldsets)."""
+        if user is None or not user.is_authenticated:
+            return cls()
+
+        post_ids = {post_id for post_id in post_ids if post_id is not None}
+        if not post_ids:
+            return cls()
+
+        def _ids(model):
+            return model.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+
+        return cls(**{name: _ids(model) for name, model in cls.MODELS.items() if only is None or name in only})
+
+
+FLAG_FIELDS = {'liked': 'liked_by_current_user', 'saved': 'saved_by_current_user',
+               'reposted': 'reposted_by_current_user'}
+
+
+def viewer_flags(spec):
+    """The ``ViewerState`` lookups a post ``FieldSpec`` renders; None (no spec) for all of them."""
+    if spec is None:
+        return None
+    return {name for name, field in FLAG_FIELDS.items() if spec.includes(field)}
+
+
+class ViewerStateMixin:
+    """
+    Adds a ``ViewerState`` for the objects being serialized to the serializer context.
+
+    ``viewer_state_post_attr`` names the attribute holding the post id on each
+    object: ``'id'`` for post querysets, ``'post_id'`` for like/save rows.
+    """
+    viewer_state_post_attr = 'id'
+
+    def get_viewer_state(self, objects):
+        post_ids = [getattr(obj, self.viewer_state_post_attr) for obj in objects]
+        return ViewerState.for_posts(self.request.user, post_ids, only=self.get_viewer_flags())
+
+    def get_viewer_flags(self):
+        spec = self.get_field_spec() if hasattr(self, 'get_field_spec') else None
+        if spec is not None and self.viewer_state_post_attr == 'post_id':
+            # like/save rows: the flags live on the nested post
+            if not spec.expands('post'):
+                return set()
+            spec = spec.child('post')
+        return viewer_flags(spec)
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get('instance')
+        if instance is not None:
+            objects = instance if kwargs.get('many') else [instance]
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['viewer_state'] = self.get_viewer_state(objects)
+        return super().get_serializer(*args, **kwargs)
+
+
+class CommentViewerState:
+    """
+    The current user's likes/dislikes on a page of comments and their inline replies,
+    resolved with a single ``ReactionModel`` query. Passed to the comment serializers
+    through the ``comment_viewer_state`` context key.
+    """
+
+    def __init__(self, liked_comments=(), disliked_comments=(), liked_replies=(), disliked_replies=()):
+        self.liked_comments = frozenset(liked_comments)
+        self.disliked_comments = frozenset(disliked_comments)
+        self.liked_replies = frozenset(liked_replies)
+        self.disliked_replies = frozenset(disliked_replies)
+
+    @classmethod
+    def for_comments(cls, user, comment_ids=(), reply_ids=()):
+        if user is None or not user.is_authenticated:
+            return cls()
+
+        targets = Q()
+        if comment_ids:
+            targets |= Q(target_type=ReactionModel.TargetType.Comment, target_id__in=set(comment_ids))
+        if reply_ids:
+            targets |= Q(target_type=ReactionModel.TargetType.Reply, target_id__in=set(reply_ids))
+        if not targets:
+            return cls()
+
+        state = {'liked_comments': [], 'disliked_comments': [], 'liked_replies': [], 'disliked_replies': []}
+        rows = ReactionModel.objects.filter(targets, user=user).values_list('target_type', 'target_id', 'value')
+        for target_type, target_id, value in rows:
+            verb = 'liked' if value == ReactionModel.Value.Like else 'disliked'
+            noun = 'comments' if target_type == ReactionModel.TargetType.Comment else 'replies'
+            state[f'{verb}_{noun}'].append(target_id)
+        return cls(**state)
+
+    @classmethod
+    def for_page(cls, user, objects):
+        """State for a page of comments (including their inline replies) or of replies."""
+        comment_ids, reply_ids = [], []
+        for obj in objects:
+            if isinstance(obj, ReplyModel):
+                reply_ids.append(obj.id)
+            else:
+                comment_ids.append(obj.id)
+                reply_ids.extend(reply.id for reply in replies_preview(obj))
+        return cls.for_comments(user, comment_ids, reply_ids)
+
+
+class CommentViewerStateMixin:
+    """
+    Adds a ``CommentViewerState`` covering the comments (and their inline replies)
+    or replies being serialized to the serializer context.
+    """
+
+    def get_comment_viewer_state(self, objects):
+        return CommentViewerState.for_page(self.request.user, objects)
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get('instance')
+        if instance is not None:
+            objects = instance if kwargs.get('many') else [instance]
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['comment_viewer_state'] = self.get_comment_viewer_state(objects)
+        return super().get_serializer(*args, **kwargs)
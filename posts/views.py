@@ -1,17 +1,44 @@
+from django.conf import settings
+from django.core.files import File
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
+from django.db import transaction
+from django.utils import timezone
 from rest_framework.filters import SearchFilter
-from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_201_CREATED, HTTP_200_OK, HTTP_403_FORBIDDEN, HTTP_204_NO_CONTENT
-
-from posts.models import PostModel, HashtagModel, MusicModel, LikeModel, CommentModel, CommentLikeModel, \
-    CommentDislikeModel, ReplyModel, ReplyCommentLikeModel, ReplyCommentDislikeModel, NotificationModel, SaveModel, \
-    RepostModel
+from rest_framework.throttling import AnonRateThrottle
+from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_201_CREATED, HTTP_200_OK, HTTP_403_FORBIDDEN, HTTP_204_NO_CONTENT, \
+    HTTP_202_ACCEPTED
+
+from posts.models import PostModel, HashtagModel, MusicModel, LikeModel, CommentModel, ReplyModel, ReactionModel, \
+    NotificationModel, SaveModel, RepostModel, TrendingHashtagModel, UploadSessionModel
+from posts.autocomplete import autocomplete
+from posts.cards import PostCardMixin, rows_in_order
+from posts.comment_previews import load_comment_previews
+from posts.comment_tree import with_comment_tree
+from posts.conditional import conditional_get, post_validators
+from posts.counters import COUNTER_FIELDS, bump_post_counters, get_post_counter
+from posts.feeds import FollowingFeedPagination, fan_out_post
+from posts.fieldsets import FieldSpecMixin, includes, with_post_relations, with_post_row_relations
+from posts.notifications import mark_read, notify, unread_count
+from posts.ranking import rank_for_you
+from posts.profiling import stats as profiling_stats
+from posts.response_cache import cache_response, metrics as response_cache_metrics
+from posts.reactions import TARGET_MODELS, apply_reaction_deltas, remove_reaction, toggle_reaction
+from posts.search import FullTextSearchFilter, search_post_ids
+from posts.trending import get_trending
+from posts.uploads import ChunkError, discard, file_sha256, parse_content_range, temp_path, write_chunk
+from posts.view_buffer import view_buffer
+from posts.pagination import CommentCursorPagination, PostKeysetPagination, RankedFeedPagination, \
+    ReplyCursorPagination, NotificationPagination
+from posts.viewer_state import FLAG_FIELDS, ViewerState, ViewerStateMixin, CommentViewerState, CommentViewerStateMixin
 from posts.serializers import CommentLikeSerializer, PostModelSerializer, HashtagModelSerializer, MusicModelSerializer, \
     LikeModelSerializer, CommentModelSerializer, CommentDislikeSerializer, ReplyModelSerializer, \
-    ReplyCommentLikeModelSerializer, ReplyCommentDislikeModelSerializer, SaveModelSerializer, RepostModelSerializer
+    ReplyCommentLikeModelSerializer, ReplyCommentDislikeModelSerializer, SaveModelSerializer, RepostModelSerializer, \
+    NotificationModelSerializer, UploadSessionSerializer
+from users.models import UserModel
 
 
 class HashtagListView(viewsets.ModelViewSet):
@@ -22,6 +49,44 @@ class HashtagListView(viewsets.ModelViewSet):
     search_fields = ['name', ]
     filter_fields = ['name', ]
 
+    @cache_response(HashtagModel)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(HashtagModel)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], url_path='trending', url_name='trending')
+    def trending(self, request):
+        window = request.query_params.get('window', TrendingHashtagModel.Window.Day)
+        if window not in TrendingHashtagModel.Window.values:
+            return Response({'detail': f'window must be one of {TrendingHashtagModel.Window.values}'},
+                            status=HTTP_400_BAD_REQUEST)
+        return Response({'window': window, 'results': get_trending(window)}, status=HTTP_200_OK)
+
+
+class AutocompleteViewSet(viewsets.ViewSet):
+    """
+    Composer suggestions: ``?q=ca&type=hashtags,musics,users&limit=10``.
+    Served from the in-memory prefix index (posts.autocomplete), never from the database.
+    """
+    permission_classes = (AllowAny,)
+    kinds = ('hashtags', 'musics', 'users')
+
+    def list(self, request):
+        prefix = request.query_params.get('q', '').strip().lstrip('#@')
+        kinds = [kind for kind in request.query_params.get('type', ','.join(self.kinds)).split(',')
+                 if kind in self.kinds]
+        try:
+            limit = max(int(request.query_params.get('limit', 10)), 1)
+        except ValueError:
+            limit = 10
+
+        if not prefix or not kinds:
+            return Response({kind: [] for kind in kinds}, status=HTTP_200_OK)
+        return Response(autocomplete.search(prefix, kinds, limit), status=HTTP_200_OK)
+
 
 class MusicListView(viewsets.ModelViewSet):
     queryset = MusicModel.objects.all()
@@ -31,21 +96,70 @@ class MusicListView(viewsets.ModelViewSet):
     search_fields = ['singer', 'music_name']
     filter_fields = ['singer', 'music_name']
 
+    @cache_response(MusicModel)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(MusicModel)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(FieldSpecMixin, PostCardMixin, ViewerStateMixin, viewsets.ModelViewSet):
     queryset = PostModel.objects.all().order_by('-created_at')
     serializer_class = PostModelSerializer
 
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     search_fields = ['title', 'hashtags__name']
     filter_fields = ['hashtag', 'music', 'user']
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    pagination_class = PostKeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'partial_update'):
+            # serializer paths; lists render cards from their own lookups
+            queryset = with_post_relations(queryset, self.get_field_spec())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get('instance')
+        preview_limit = self._comments_preview_limit() if includes(self.get_field_spec(), 'comments_preview') else 0
+        if instance is not None and preview_limit:
+            objects = instance if kwargs.get('many') else [instance]
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['comments_preview'] = load_comment_previews([obj.id for obj in objects], preview_limit)
+        return super().get_serializer(*args, **kwargs)
+
+    def _comments_preview_limit(self):
+        try:
+            return max(int(self.request.query_params.get('comments_preview', 0)), 0)
+        except ValueError:
+            return 0
 
     # Create post
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        post = serializer.save(user=self.request.user)
+        fan_out_post(post)
+
+    def _merge_live_fields(self, request, data, *args, **kwargs):
+        """Counters and the viewer's like/save/repost flags, applied on top of the cached post."""
+        post_id = kwargs['pk']
+        counters = PostModel.objects.filter(pk=post_id).values('id', *COUNTER_FIELDS).first()
+        if counters is None:
+            return Response({'detail': 'Post topilmadi.'}, status=HTTP_404_NOT_FOUND)
+        data.update({name: value for name, value in counters.items() if name in data and name != 'id'})
+        flags = self.get_viewer_flags()
+        if flags is None or flags:
+            state = ViewerState.for_posts(request.user, [counters['id']], only=flags)
+            for name, field in FLAG_FIELDS.items():
+                if field in data:
+                    data[field] = counters['id'] in getattr(state, name)
 
     # Retrieve post
+    @conditional_get(post_validators, per_user=True)
+    @cache_response(PostModel, UserModel, MusicModel, HashtagModel, merge=_merge_live_fields,
+                    unless=lambda view, request: view._comments_preview_limit())
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
@@ -85,16 +199,55 @@ class PostViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
+    @action(detail=False, methods=['get'], url_path='following', url_name='following-feed',
+            permission_classes=[IsAuthenticated])
+    def following(self, request):
+        paginator = FollowingFeedPagination()
+        page = paginator.paginate_queryset(self.card_queryset(self.get_queryset()), request, view=self)
+        return paginator.get_paginated_response(self.render_cards(page))
+
+    @action(detail=False, methods=['get'], url_path='for_you', url_name='for-you-feed')
+    def for_you(self, request):
+        paginator = RankedFeedPagination()
+        page_ids = paginator.paginate_queryset(rank_for_you(request.user), request, view=self)
+        page = rows_in_order(self.card_queryset(self.get_queryset()), page_ids)
+        return paginator.get_paginated_response(self.render_cards(page))
+
+    @action(detail=False, methods=['get'], url_path='search', url_name='post-search')
+    def search(self, request):
+        """Posts matching ``q``, best BM25 rank first; at most the best ``MAX_RESULTS`` (500) of them."""
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'detail': 'q did not find'}, status=HTTP_400_BAD_REQUEST)
+
+        paginator = RankedFeedPagination()
+        page_ids = paginator.paginate_queryset(search_post_ids(text), request, view=self)
+        page = rows_in_order(self.card_queryset(self.get_queryset()), page_ids)
+        return paginator.get_paginated_response(self.render_cards(page))
+
+    @action(detail=True, methods=['get'], url_path='comments', url_name='post-comments')
+    def get_comments(self, request, pk=None):
+        post = self.get_object()
+        paginator = CommentCursorPagination()
+        page = paginator.paginate_queryset(with_comment_tree(post.comments.all()), request, view=self)
+        serializer = CommentModelSerializer(page, many=True, context={
+            **self.get_serializer_context(),
+            'comment_viewer_state': CommentViewerState.for_page(request.user, page),
+        })
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['get'], url_path='reposts', url_name='post-reposts')
     def get_reposts(self, request, pk=None):
         try:
             post = self.get_object()
-            reposts = post.reposts.all().order_by('-created_at')
+            paginator = PostKeysetPagination()
+            reposts = paginator.paginate_queryset(post.reposts.select_related('user'), request, view=self)
             serializer = RepostModelSerializer(reposts, many=True, context={'request': request})
 
             return Response({
                 'post_id': post.id,
-                'reposts_count': reposts.count(),
+                'reposts_count': post.reposts_count,
+                'next': paginator.get_next_link(),
                 'reposts': serializer.data
             }, status=status.HTTP_200_OK)
 
@@ -106,6 +259,7 @@ class PostViewSet(viewsets.ModelViewSet):
 
 
 class GenreListViewSet(viewsets.ViewSet):
+    @cache_response()
     def list(self, request):
         genres = [
             {"value": choice[0], "label": choice[1]}
@@ -114,10 +268,20 @@ class GenreListViewSet(viewsets.ViewSet):
         return Response(genres, status=status.HTTP_200_OK)
 
 
-class LikeViewSet(viewsets.ModelViewSet):
+class LikeViewSet(FieldSpecMixin, ViewerStateMixin, viewsets.ModelViewSet):
     queryset = LikeModel.objects.all()
     serializer_class = LikeModelSerializer
     permission_classes = (IsAuthenticated,)
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    viewer_state_post_attr = 'post_id'
+
+    def get_queryset(self):
+        return with_post_row_relations(super().get_queryset().filter(user=self.request.user), self.get_field_spec())
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            bump_post_counters(instance.post_id, likes_count=-1)
 
     def create(self, request, *args, **kwargs):
         user = request.user
@@ -130,24 +294,91 @@ class LikeViewSet(viewsets.ModelViewSet):
             like = LikeModel.objects.filter(post=post, user=user).first()
 
             if like:
-                like.delete()
-                NotificationModel.objects.filter(sender=request.user, receiver=post.user, post=post,
-                                                 notif_type=NotificationModel.NotifType.Like).delete()
+                with transaction.atomic():
+                    like.delete()
+                    bump_post_counters(post.id, likes_count=-1)
                 return Response({'liked': False, 'detail': 'Like is deleted'}, status=HTTP_200_OK)
             else:
-                LikeModel.objects.create(post=post, user=user)
-                NotificationModel.objects.create(sender=request.user, receiver=post.user, post=post,
-                                                 notif_type=NotificationModel.NotifType.Like)
+                with transaction.atomic():
+                    LikeModel.objects.create(post=post, user=user)
+                    bump_post_counters(post.id, likes_count=1)
+                    notify(NotificationModel.NotifType.Like, post.user_id, user.id, post_id=post.id)
 
                 return Response({'liked': True, 'detail': 'Like is created'}, status=HTTP_201_CREATED)
         except PostModel.DoesNotExist:
             return Response({'detail': 'post does not exist'}, status=HTTP_404_NOT_FOUND)
 
 
-class CommentView(viewsets.ModelViewSet):
+class ViewEventAnonThrottle(AnonRateThrottle):
+    """``VIEW_EVENTS_ANON_RATE`` batches per client IP; signed-in users are not throttled."""
+    scope = 'view_events'
+
+    def get_rate(self):
+        return settings.VIEW_EVENTS_ANON_RATE
+
+
+class ViewEventViewSet(viewsets.ViewSet):
+    """
+    Batched view ingestion: ``{"events": [{"post": 1}, {"post": 2}], "device_id": "..."}``.
+    Events are buffered in-process (posts.view_buffer) and written in bulk.
+
+    A signed-in view is unique per user. An anonymous one is unique per client IP and
+    ``device_id`` (user agent when absent); the device id is the client's word, so
+    anonymous batches are rate limited per IP.
+    """
+    permission_classes = (AllowAny,)
+    throttle_classes = (ViewEventAnonThrottle,)
+
+    def create(self, request):
+        events = request.data.get('events')
+        if not isinstance(events, list) or not events:
+            return Response({'detail': 'events did not find'}, status=HTTP_400_BAD_REQUEST)
+
+        user_id = request.user.id if request.user.is_authenticated else None
+        visitor = None
+        if user_id is None:
+            device = request.data.get('device_id') or request.META.get('HTTP_USER_AGENT', '')
+            visitor = '{}|{}'.format(ViewEventAnonThrottle().get_ident(request), device)
+
+        accepted = 0
+        for event in events[:settings.VIEW_BATCH_MAX_EVENTS]:
+            post_id = event.get('post') if isinstance(event, dict) else event
+            try:
+                post_id = int(post_id)
+            except (TypeError, ValueError):
+                continue
+            view_buffer.add(post_id, user_id=user_id, visitor=visitor)
+            accepted += 1
+
+        return Response({'accepted': accepted}, status=HTTP_202_ACCEPTED)
+
+
+class CommentView(CommentViewerStateMixin, viewsets.ModelViewSet):
     queryset = CommentModel.objects.all()
     serializer_class = CommentModelSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = CommentCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = with_comment_tree(queryset)
+        post_id = self.request.query_params.get('post')
+        if self.action == 'list' and post_id:
+            queryset = queryset.filter(post_id=post_id)
+        return queryset
+
+    @action(detail=True, methods=['get'], url_path='replies', url_name='replies')
+    def replies(self, request, pk=None):
+        """All replies of a comment, oldest first, continuing from a comment's ``replies_next`` cursor."""
+        comment = self.get_object()
+        paginator = ReplyCursorPagination()
+        page = paginator.paginate_queryset(comment.replies.select_related('user'), request, view=self)
+        serializer = ReplyModelSerializer(page, many=True, context={
+            **self.get_serializer_context(),
+            'comment_viewer_state': self.get_comment_viewer_state(page),
+        })
+        return paginator.get_paginated_response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         user = request.user
@@ -163,7 +394,10 @@ class CommentView(viewsets.ModelViewSet):
 
         text = request.data.get('text')
 
-        comment = CommentModel.objects.create(post=post, user=user, text=text)
+        with transaction.atomic():
+            comment = CommentModel.objects.create(post=post, user=user, text=text)
+            bump_post_counters(post.id, comments_count=1)
+            notify(NotificationModel.NotifType.Comment, post.user_id, user.id, post_id=post.id, comment_id=comment.id)
         serializer = self.get_serializer(comment)
         return Response(serializer.data, status=HTTP_201_CREATED)
 
@@ -188,88 +422,72 @@ class CommentView(viewsets.ModelViewSet):
         if instance.user != request.user and not request.user.is_staff:
             return Response({'detail': 'You can only delete your own comment'}, status=HTTP_403_FORBIDDEN)
 
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            bump_post_counters(instance.post_id, comments_count=-1)
         return Response({'detail': 'Comment deleted'}, status=HTTP_204_NO_CONTENT)
 
 
-class CommentLikeViewSet(viewsets.ModelViewSet):
-    queryset = CommentLikeModel.objects.all()
-    serializer_class = CommentLikeSerializer
+class ReactionToggleViewSet(viewsets.ModelViewSet):
+    """
+    Like/dislike endpoints for comments and replies, all backed by ``ReactionModel``.
+    ``POST {<target_field>: id}`` toggles the reaction through ``toggle_reaction`` and
+    returns the updated comment or reply; list/retrieve/delete work on reaction rows.
+    """
     permission_classes = (IsAuthenticated,)
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    target_type = None
+    value = None
+    target_field = None
+    target_serializer_class = None
+    missing_detail = None
+    not_found_detail = None
+
+    def get_queryset(self):
+        return (ReactionModel.objects.filter(target_type=self.target_type, value=self.value)
+                .select_related('user').order_by('-created_at', '-id'))
 
     def create(self, request, *args, **kwargs):
-        user = request.user
-        comment_id = request.data.get('comment')
-
-        if not comment_id:
-            return Response({'detail': 'Comment did not find'}, status=HTTP_400_BAD_REQUEST)
+        target_id = request.data.get(self.target_field)
+        if not target_id:
+            return Response({'detail': self.missing_detail}, status=HTTP_400_BAD_REQUEST)
 
+        model = TARGET_MODELS[self.target_type]
         try:
-            comment = CommentModel.objects.get(id=comment_id)
+            target = model.objects.select_related('user').get(id=target_id)
+        except model.DoesNotExist:
+            return Response({'detail': self.not_found_detail}, status=HTTP_404_NOT_FOUND)
 
-            # check existence
-            comment_like_qs = CommentLikeModel.objects.filter(comment=comment, user=user)
-            dislike_qs = CommentDislikeModel.objects.filter(comment=comment, user=user)
+        _, deltas = toggle_reaction(request.user, self.target_type, target.id, self.value)
+        apply_reaction_deltas(target, deltas)
 
-            if comment_like_qs.exists():
-                # already liked -> remove like (toggle off)
-                comment_like_qs.delete()
-                # serialize updated comment and return
-                serializer = CommentModelSerializer(comment, context={'request': request})
-                return Response(serializer.data, status=HTTP_200_OK)
-
-            # if disliked before -> remove dislike first, then create like
-            if dislike_qs.exists():
-                dislike_qs.delete()
+        serializer = self.target_serializer_class(target, context={
+            'request': request,
+            'comment_viewer_state': CommentViewerState.for_page(request.user, [target]),
+        })
+        return Response(serializer.data, status=HTTP_200_OK)
 
-            CommentLikeModel.objects.create(comment=comment, user=user)
+    def perform_destroy(self, instance):
+        remove_reaction(instance)
 
-            # serialize authoritative comment and return
-            serializer = CommentModelSerializer(comment, context={'request': request})
-            return Response(serializer.data, status=HTTP_200_OK)
 
-        except CommentModel.DoesNotExist:
-            return Response({'detail': 'Comment did not exist'}, status=HTTP_404_NOT_FOUND)
+class CommentLikeViewSet(ReactionToggleViewSet):
+    serializer_class = CommentLikeSerializer
+    target_type = ReactionModel.TargetType.Comment
+    value = ReactionModel.Value.Like
+    target_field = 'comment'
+    target_serializer_class = CommentModelSerializer
+    missing_detail = 'Comment did not find'
+    not_found_detail = 'Comment did not exist'
 
 
-class CommentDislikeViewSet(viewsets.ModelViewSet):
-    queryset = CommentDislikeModel.objects.all()
+class CommentDislikeViewSet(CommentLikeViewSet):
     serializer_class = CommentDislikeSerializer
-    permission_classes = (IsAuthenticated,)
-
-    def create(self, request, *args, **kwargs):
-        user = request.user
-        comment_id = request.data.get('comment')
-
-        if not comment_id:
-            return Response({'detail': 'Comment did not find'}, status=HTTP_400_BAD_REQUEST)
-
-        try:
-            comment = CommentModel.objects.get(id=comment_id)
-
-            dislike_qs = CommentDislikeModel.objects.filter(comment=comment, user=user)
-            like_qs = CommentLikeModel.objects.filter(comment=comment, user=user)
-
-            if dislike_qs.exists():
-                # already disliked -> remove dislike
-                dislike_qs.delete()
-                serializer = CommentModelSerializer(comment, context={'request': request})
-                return Response(serializer.data, status=HTTP_200_OK)
+    value = ReactionModel.Value.Dislike
 
-            # if liked before -> remove like first, then create dislike
-            if like_qs.exists():
-                like_qs.delete()
 
-            CommentDislikeModel.objects.create(comment=comment, user=user)
-            serializer = CommentModelSerializer(comment, context={'request': request})
-            return Response(serializer.data, status=HTTP_200_OK)
-
-        except CommentModel.DoesNotExist:
-            return Response({'detail': 'Comment did not exist'}, status=HTTP_404_NOT_FOUND)
-
-
-class ReplyCommentView(viewsets.ModelViewSet):
-    queryset = ReplyModel.objects.all()
+class ReplyCommentView(CommentViewerStateMixin, viewsets.ModelViewSet):
+    queryset = ReplyModel.objects.select_related('user')
     serializer_class = ReplyModelSerializer
     permission_classes = (IsAuthenticated,)
 
@@ -286,6 +504,8 @@ class ReplyCommentView(viewsets.ModelViewSet):
             comment = CommentModel.objects.get(id=comment_id)
             text = request.data.get('text')
             reply_comment = ReplyModel.objects.create(user=user, comment=comment, post=post, text=text)
+            notify(NotificationModel.NotifType.reply, comment.user_id, user.id, post_id=post.id,
+                   comment_id=comment.id, reply_id=reply_comment.id)
             serializer = self.get_serializer(reply_comment)
             return Response(serializer.data, status=HTTP_201_CREATED)
         except CommentModel.DoesNotExist:
@@ -312,74 +532,35 @@ class ReplyCommentView(viewsets.ModelViewSet):
         return Response({"detail":'Reply comment deleted'}, status=HTTP_204_NO_CONTENT)
 
 
-class ReplyCommentLikeView(viewsets.ModelViewSet):
-    queryset = ReplyCommentLikeModel.objects.all()
+class ReplyCommentLikeView(ReactionToggleViewSet):
     serializer_class = ReplyCommentLikeModelSerializer
-    permission_classes = (IsAuthenticated,)
-
-    def create(self, request, *args, **kwargs):
-        user = request.user
-        reply_comment_id = request.data.get('reply_comment')
-
-        if not reply_comment_id:
-            return Response({'detail':'Reply comment did not find'}, status=HTTP_400_BAD_REQUEST)
-        try:
-            reply_comment = ReplyModel.objects.get(id=reply_comment_id)
-
-            like_qs = ReplyCommentLikeModel.objects.filter(reply_comment=reply_comment, user=user)
-            dislike_qs = ReplyCommentDislikeModel.objects.filter(reply_comment=reply_comment, user=user)
-
-            if like_qs.exists():
-                like_qs.delete()
-                serializer = ReplyModelSerializer(reply_comment, context={'request': request})
-                return Response(serializer.data, status=HTTP_200_OK)
-
-            if dislike_qs.exists():
-                dislike_qs.delete()
+    target_type = ReactionModel.TargetType.Reply
+    value = ReactionModel.Value.Like
+    target_field = 'reply_comment'
+    target_serializer_class = ReplyModelSerializer
+    missing_detail = 'Reply comment did not find'
+    not_found_detail = 'reply comment did not exist'
 
-            ReplyCommentLikeModel.objects.create(reply_comment=reply_comment, user=user)
-            serializer = ReplyModelSerializer(reply_comment, context={'request': request})
-            return Response(serializer.data, status=HTTP_200_OK)
-        except ReplyModel.DoesNotExist:
-            return Response({'detail':'reply comment did not exist'}, status=HTTP_404_NOT_FOUND)
 
-
-class ReplyCommentDislikeView(viewsets.ModelViewSet):
-    queryset = ReplyCommentDislikeModel.objects.all()
+class ReplyCommentDislikeView(ReplyCommentLikeView):
     serializer_class = ReplyCommentDislikeModelSerializer
-    permission_classes = (IsAuthenticated,)
-
-    def create(self, request, *args, **kwargs):
-        user = request.user
-        reply_comment_id = request.data.get('reply_comment')
-
-        if not reply_comment_id:
-            return Response({'detail': 'Reply comment did not find'}, status=HTTP_400_BAD_REQUEST)
-        try:
-            reply_comment = ReplyModel.objects.get(id=reply_comment_id)
-
-            dislike_qs = ReplyCommentDislikeModel.objects.filter(reply_comment=reply_comment, user=user)
-            like_qs = ReplyCommentLikeModel.objects.filter(reply_comment=reply_comment, user=user)
-
-            if dislike_qs.exists():
-                dislike_qs.delete()
-                serializer = ReplyModelSerializer(reply_comment, context={'request': request})
-                return Response(serializer.data, status=HTTP_200_OK)
+    value = ReactionModel.Value.Dislike
 
-            if like_qs.exists():
-                like_qs.delete()
 
-            ReplyCommentDislikeModel.objects.create(reply_comment=reply_comment, user=user)
-            serializer = ReplyModelSerializer(reply_comment, context={'request': request})
-            return Response(serializer.data, status=HTTP_200_OK)
-        except ReplyModel.DoesNotExist:
-            return Response({'detail': 'reply comment did not exist'}, status=HTTP_404_NOT_FOUND)
-
-
-class SaveViewSet(viewsets.ModelViewSet):
+class SaveViewSet(FieldSpecMixin, ViewerStateMixin, viewsets.ModelViewSet):
     queryset = SaveModel.objects.all()
     serializer_class = SaveModelSerializer
     permission_classes = (IsAuthenticated,)
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    viewer_state_post_attr = 'post_id'
+
+    def get_queryset(self):
+        return with_post_row_relations(super().get_queryset().filter(user=self.request.user), self.get_field_spec())
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            bump_post_counters(instance.post_id, saves_count=-1)
 
     def create(self, request, *args, **kwargs):
         user = request.user
@@ -393,18 +574,22 @@ class SaveViewSet(viewsets.ModelViewSet):
             save = SaveModel.objects.filter(post=post_id, user=user).first()
 
             if save:
-                save.delete()
+                with transaction.atomic():
+                    save.delete()
+                    bump_post_counters(post.id, saves_count=-1)
                 return Response(
                     {
                         'saved':False,
-                        'saves_count':SaveModel.objects.filter(post=post).count(),
+                        'saves_count':get_post_counter(post.id, 'saves_count'),
                         'detail':'Post unsaved'}, status=HTTP_200_OK)
             else:
-                SaveModel.objects.create(post=post, user=user)
+                with transaction.atomic():
+                    SaveModel.objects.create(post=post, user=user)
+                    bump_post_counters(post.id, saves_count=1)
                 return Response(
                     {
                         'saved': True,
-                        'saves_count': SaveModel.objects.filter(post=post).count(),
+                        'saves_count': get_post_counter(post.id, 'saves_count'),
                         'detail': 'Post saved'},
                     status=HTTP_201_CREATED)
 
@@ -414,9 +599,18 @@ class SaveViewSet(viewsets.ModelViewSet):
 
 
 class RepostViewSet(viewsets.ModelViewSet):
-    queryset = RepostModel.objects.all()
+    queryset = RepostModel.objects.select_related('user', 'post')
     serializer_class = RepostModelSerializer
     permission_classes = (IsAuthenticated,)
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            bump_post_counters(instance.post_id, reposts_count=-1)
 
     def create(self, request, *args, **kwargs):
         user = request.user
@@ -430,22 +624,171 @@ class RepostViewSet(viewsets.ModelViewSet):
             repost = RepostModel.objects.filter(post=post, user=user).first()
 
             if repost:
-                repost.delete()
+                with transaction.atomic():
+                    repost.delete()
+                    bump_post_counters(post.id, reposts_count=-1)
                 return Response(
                     {
                         'reposted': False,
-                        'reposts_count': RepostModel.objects.filter(post=post).count(),
+                        'reposts_count': get_post_counter(post.id, 'reposts_count'),
                         'detail': 'Post unreposted'
                     }, status=HTTP_200_OK)
             else:
-                RepostModel.objects.create(post=post, user=user)
+                with transaction.atomic():
+                    RepostModel.objects.create(post=post, user=user)
+                    bump_post_counters(post.id, reposts_count=1)
                 return Response(
                     {
                         'reposted': True,
-                        'reposts_count': RepostModel.objects.filter(post=post).count(),
+                        'reposts_count': get_post_counter(post.id, 'reposts_count'),
                         'detail': 'Post reposted'
                     },
                     status=HTTP_201_CREATED)
 
         except PostModel.DoesNotExist:
             return Response({'detail': 'Post does not exist'}, status=HTTP_404_NOT_FOUND)
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The current user's grouped notifications, newest activity first (keyset paginated),
+    plus ``unread_count/`` (cached) and ``read/`` to mark some (``{"ids": [...]}``) or all as read.
+    """
+    serializer_class = NotificationModelSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        return NotificationModel.objects.filter(receiver=self.request.user).select_related('sender').defer('actor_ids')
+
+    @action(detail=False, methods=['get'], url_path='unread_count', url_name='unread-count')
+    def unread_count(self, request):
+        return Response({'unread': unread_count(request.user.id)}, status=HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='read', url_name='read')
+    def read(self, request):
+        ids = request.data.get('ids')
+        if ids is not None and not isinstance(ids, list):
+            return Response({'detail': 'ids must be a list'}, status=HTTP_400_BAD_REQUEST)
+        updated = mark_read(request.user.id, ids)
+        return Response({'updated': updated, 'unread': unread_count(request.user.id)}, status=HTTP_200_OK)
+
+
+class ProfilingStatsViewSet(viewsets.ViewSet):
+    """
+    Staff only: this process's rolling per-route request profiles (posts.profiling) and
+    response cache hit/miss counts. ``POST reset/`` clears both.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def list(self, request):
+        return Response({
+            'sample_rate': settings.PROFILING_SAMPLE_RATE,
+            'window_minutes': settings.PROFILING_WINDOW_MINUTES,
+            'routes': profiling_stats.snapshot(),
+            'response_cache': response_cache_metrics.snapshot(),
+        }, status=HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='reset', url_name='reset')
+    def reset(self, request):
+        profiling_stats.reset()
+        response_cache_metrics.reset()
+        return Response(status=HTTP_204_NO_CONTENT)
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Resumable video upload:
+
+    1. ``POST /posts/uploads/`` ``{filename, size, sha256}`` opens a session.
+    2. ``PUT /posts/uploads/{id}/chunk/`` with a raw body and ``Content-Range: bytes a-b/size``,
+       repeated; ``GET /posts/uploads/{id}/`` tells where to resume after a dropped connection.
+    3. ``POST /posts/uploads/{id}/finalize/`` with the post fields (title, description, ...)
+       checks the sha256 and creates the post from the uploaded file.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return UploadSessionModel.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def destroy(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.status == UploadSessionModel.Status.Finalizing:
+            # the finalize request is still reading the file
+            return Response({'detail': 'Upload is being finalized'}, status=status.HTTP_409_CONFLICT)
+        self.perform_destroy(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def perform_destroy(self, instance):
+        discard(instance)
+        instance.delete()
+
+    @action(detail=True, methods=['put'], url_path='chunk', url_name='chunk')
+    def chunk(self, request, pk=None):
+        session = self.get_object()
+        if session.status != UploadSessionModel.Status.Uploading:
+            return Response({'detail': 'Upload is already finalized'}, status=status.HTTP_409_CONFLICT)
+        try:
+            start, length = parse_content_range(request.headers.get('Content-Range'), session.size)
+            try:
+                content_length = int(request.headers.get('Content-Length') or 0)
+            except ValueError:
+                raise ChunkError('Content-Length must be a number', HTTP_400_BAD_REQUEST)
+            if content_length != length:
+                raise ChunkError('Content-Length does not match Content-Range', HTTP_400_BAD_REQUEST)
+            offset = write_chunk(session, request.stream, start, length)
+        except ChunkError as error:
+            return Response({'detail': error.detail, 'offset': session.offset}, status=error.status)
+        return Response({'offset': offset, 'size': session.size}, status=HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='finalize', url_name='finalize')
+    def finalize(self, request, pk=None):
+        session = self.get_object()
+        context = self.get_serializer_context()
+        if session.status == UploadSessionModel.Status.Uploading and session.offset != session.size:
+            return Response({'detail': 'Upload is not complete', 'offset': session.offset},
+                            status=status.HTTP_409_CONFLICT)
+
+        # claim the session: of two finalize requests (e.g. a retry after a timeout) only one
+        # hashes the file and creates the post, the other answers with that post
+        claimed = UploadSessionModel.objects.filter(
+            pk=session.pk, status=UploadSessionModel.Status.Uploading, offset=session.size,
+        ).update(status=UploadSessionModel.Status.Finalizing, updated_at=timezone.now())
+        if not claimed:
+            session.refresh_from_db()
+            if session.status == UploadSessionModel.Status.Complete:
+                return Response(PostModelSerializer(session.post, context=context).data, status=HTTP_200_OK)
+            return Response({'detail': 'Upload is being finalized, retry later'}, status=status.HTTP_409_CONFLICT)
+
+        try:
+            path = temp_path(session)
+            if file_sha256(path) != session.sha256:
+                # start over: the bytes on disk are not the file the client announced
+                discard(session)
+                UploadSessionModel.objects.filter(pk=session.pk).update(
+                    offset=0, status=UploadSessionModel.Status.Uploading)
+                return Response({'detail': 'sha256 mismatch, upload again', 'offset': 0},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+            data = request.data.copy()
+            with open(path, 'rb') as fh:
+                data['post'] = File(fh, name=session.filename)
+                serializer = PostModelSerializer(data=data, context=context)
+                serializer.is_valid(raise_exception=True)
+                with transaction.atomic():
+                    post = serializer.save(user=request.user)
+                    UploadSessionModel.objects.filter(pk=session.pk).update(
+                        status=UploadSessionModel.Status.Complete, post=post)
+        except BaseException:
+            # invalid post fields or a crash: release the claim so the client can finalize again
+            UploadSessionModel.objects.filter(pk=session.pk, status=UploadSessionModel.Status.Finalizing).update(
+                status=UploadSessionModel.Status.Uploading)
+            raise
+        discard(session)
+        fan_out_post(post)
+        return Response(PostModelSerializer(post, context=context).data, status=HTTP_201_CREATED)
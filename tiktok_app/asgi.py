@@ -2,6 +2,8 @@
 ASGI config for tiktok_app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the live push endpoint
+(``posts.live``, ``/ws/live/``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tiktok_app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after the app registry is ready
+from posts.autocomplete import autocomplete  # noqa: E402
+from posts.live import websocket_application  # noqa: E402
+
+autocomplete.warm_up()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
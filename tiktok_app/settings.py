@@ -19,6 +19,7 @@ INSTALLED_APPS = [
 
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'drf_yasg',
     'corsheaders',
 
@@ -27,6 +28,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'posts.profiling.ProfilingMiddleware',
+    'posts.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -137,3 +140,103 @@ CORS_ALLOW_HEADERS = [
     "x-csrftoken",
     "x-requested-with",
 ]
+
+# Background tasks (posts.background): worker threads, or inline when eager.
+BACKGROUND_TASK_WORKERS = 4
+BACKGROUND_TASKS_EAGER = False
+
+# Following feed (posts.feeds)
+# Up to FEED_FANOUT_SYNC_LIMIT followers the timeline rows are written inside the
+# request; above it they are written by a background task. Accounts with more than
+# FEED_FANOUT_CELEBRITY_THRESHOLD followers are not fanned out at all, their posts
+# are merged into followers' feeds at read time.
+FEED_FANOUT_SYNC_LIMIT = 1000
+FEED_FANOUT_CELEBRITY_THRESHOLD = 50000
+FEED_FANOUT_CHUNK_SIZE = 1000
+FEED_FOLLOW_BACKFILL = 50
+
+# "For You" feed (posts.ranking)
+FOR_YOU_WINDOW_DAYS = 30
+FOR_YOU_GRAVITY = 1.5
+FOR_YOU_CANDIDATES = 500
+FOR_YOU_AFFINITY_TIMEOUT = 60 * 60
+FOR_YOU_GENRE_WEIGHT = 1.0
+FOR_YOU_HASHTAG_WEIGHT = 0.5
+
+# View ingestion (posts.view_buffer): events are buffered in-process and flushed
+# when VIEW_BUFFER_MAX_EVENTS accumulate or every VIEW_BUFFER_FLUSH_INTERVAL seconds.
+VIEW_BUFFER_MAX_EVENTS = 1000
+VIEW_BUFFER_FLUSH_INTERVAL = 5
+VIEW_BATCH_MAX_EVENTS = 100
+# Anonymous view batches accepted per client IP (DRF throttle rate).
+VIEW_EVENTS_ANON_RATE = '120/min'
+
+# Autocomplete (posts.autocomplete): per-process prefix index rebuild interval, seconds.
+AUTOCOMPLETE_REBUILD_INTERVAL = 600
+
+# Notifications (posts.notifications): events are buffered in-process and folded into
+# one notification per (receiver, post, type) created within NOTIFICATION_GROUP_WINDOW seconds.
+NOTIFICATION_GROUP_WINDOW = 24 * 60 * 60
+NOTIFICATION_BUFFER_MAX_EVENTS = 500
+NOTIFICATION_FLUSH_INTERVAL = 2
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 5 * 60
+
+# Live push (posts.live, WebSocket /ws/live/ under ASGI). LIVE_BROKER is any class with
+# subscribe/unsubscribe/publish; the default only reaches sockets in the same process.
+LIVE_BROKER = 'posts.broker.InProcessBroker'
+LIVE_TICK_SECONDS = 1.0
+LIVE_MAX_WATCHED_POSTS = 100
+
+# Resumable uploads (posts.uploads): chunk files live under MEDIA_ROOT/UPLOAD_TEMP_DIR
+# until finalize; sessions idle for UPLOAD_SESSION_TTL seconds are expired.
+UPLOAD_TEMP_DIR = 'uploads/tmp'
+UPLOAD_CHUNK_MAX_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_SIZE = 1024 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+
+# Media variants (posts.media, run by `manage.py process_media`): bounding-box sizes
+# per kind, output format served by the API, and the optional ffmpeg used for poster frames.
+MEDIA_VARIANT_SIZES = {
+    'avatar': {'thumb': 96, 'medium': 320},
+    'music_cover': {'thumb': 128, 'medium': 512},
+    'post': {'small': 360, 'large': 720},
+}
+MEDIA_VARIANT_FORMAT = 'webp'
+MEDIA_WEBP_QUALITY = 80
+MEDIA_JPEG_QUALITY = 82
+MEDIA_FFMPEG_BINARY = 'ffmpeg'
+MEDIA_POSTER_OFFSET = 1.0
+MEDIA_WORKERS = 2
+MEDIA_JOB_MAX_ATTEMPTS = 3
+# seconds a claimed job may stay RUNNING before it is queued again (must exceed a --batch-size batch)
+MEDIA_JOB_LEASE = 30 * 60
+
+# Media serving (posts.serving): stored names never change content, so responses are
+# cacheable for a year. MEDIA_ACCEL_MODE = 'x-accel-redirect' (nginx, internal location
+# at MEDIA_ACCEL_PREFIX) or 'x-sendfile' hands the bytes to the front proxy.
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+MEDIA_ACCEL_MODE = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Response cache (posts.response_cache): entries are keyed by per-model version counters
+# bumped on save/delete, so the timeout only bounds memory. Use a cache shared by all
+# workers (Redis/Memcached) in production, otherwise other processes keep old versions.
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_TIMEOUT = 10 * 60
+
+# Request profiling (posts.profiling): a PROFILING_SAMPLE_RATE fraction of requests feed the
+# per-route histograms of the last PROFILING_WINDOW_MINUTES at /posts/stats/ (staff only).
+# Requests sent with "X-Profile: <PROFILING_TOKEN>" (or "X-Profile: 1" under DEBUG) are always
+# profiled and get their SQL/serializer/render timings back in Server-Timing.
+PROFILING_ENABLED = True
+PROFILING_SAMPLE_RATE = 0.01
+PROFILING_WINDOW_MINUTES = 15
+PROFILING_TOKEN = None
+
+# Prometheus metrics (posts.metrics) at /metrics: request latency/status per viewset action,
+# SQL timings, response cache hits and created likes/posts/comments/follows. With several
+# worker processes set the PROMETHEUS_MULTIPROC_DIR environment variable to a shared, empty
+# directory. Scrapers send "Authorization: Bearer <METRICS_TOKEN>"; with no token set the
+# endpoint answers 404 (open under DEBUG).
+METRICS_ENABLED = True
+METRICS_TOKEN = None
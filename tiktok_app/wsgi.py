@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tiktok_app.settings')
 
 application = get_wsgi_application()
+
+# imported after the app registry is ready
+from posts.autocomplete import autocomplete  # noqa: E402
+
+autocomplete.warm_up()
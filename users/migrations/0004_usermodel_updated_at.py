@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_usermodel_avatar_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usermodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -6,6 +6,9 @@ from django.db import models
 class UserModel(AbstractUser):
     bio = models.CharField(max_length=255, null=True, blank=True)
     avatar = models.ImageField(upload_to='user/avatars/', null=True, blank=True)
+    # resized copies written by the process_media worker (posts.media)
+    avatar_variants = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def followers_count(self):
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 
+from posts.fieldsets import SparseFieldsetMixin
+from posts.media import variant_url
 from users.models import Follow
 
 User = get_user_model()
@@ -35,11 +37,19 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
-class UserModelSerializer(serializers.ModelSerializer):
+class UserModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'last_name', 'first_name', 'bio', 'avatar')
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # nested in feeds and comments: the thumbnail instead of the original upload
+        thumb = variant_url(instance.avatar_variants, 'thumb', self.context.get('request'))
+        if thumb and 'avatar' in data:
+            data['avatar'] = thumb
+        return data
+
 
 
 class LoginSerializer(serializers.Serializer):
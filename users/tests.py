@@ -1,3 +1,113 @@
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from posts.models import TimelineModel, NotificationModel
+from posts.tests import QueryBudgetTestCase
+from users.models import Follow, UserModel
+
+
+class UserQueryBudgetTests(QueryBudgetTestCase):
+    def test_user_list(self):
+        self.assertQueryBudget(2, '/users/')
+
+    def test_user_detail(self):
+        self.assertQueryBudget(2, lambda data: f'/users/{data.post.user_id}/')
+
+    def test_user_posts(self):
+        self.assertQueryBudget(7, lambda data: f'/users/{data.post.user_id}/posts/', page_size=('page_size', 1))
+
+    def test_user_reposts(self):
+        self.assertQueryBudget(1, lambda data: f'/users/{data.viewer.id}/reposts/', page_size=('page_size', 2))
+
+    def test_me(self):
+        self.assertQueryBudget(11, '/users/me/')
+
+    def test_me_sparse(self):
+        self.assertQueryBudget(3, '/users/me/?fields=id,username,posts&expand=')
+
+    def test_me_update(self):
+        self.assertQueryBudget(2, '/users/me/', method='put', data={'username': 'viewer', 'bio': 'still watching'})
+
+    def test_follow_toggle(self):
+        def unfollowed(data):
+            Follow.objects.filter(follower=data.viewer, following=data.post.user).delete()
+            TimelineModel.objects.filter(user=data.viewer, post__user=data.post.user).delete()
+            NotificationModel.objects.filter(receiver=data.post.user).delete()
+
+        self.assertQueryBudget(13, lambda data: f'/users/follow/{data.post.user_id}/', method='post', setup=unfollowed)
+
+    def test_user_create(self):
+        self.assertQueryBudget(2, '/users/', method='post',
+                               data=lambda data: {'username': f'new{data.units}', 'password': 'secret'})
+
+
+class AuthQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data.viewer.set_password('x')
+        self.data.viewer.save(update_fields=['password'])
+
+    def test_login(self):
+        # the user, then the new refresh token recorded as outstanding (token_blacklist)
+        self.assertQueryBudget(2, '/users/login/', method='post', data={'username': 'viewer', 'password': 'x'})
+
+    def test_token_refresh(self):
+        # the blacklist lookup, then the user
+        self.assertQueryBudget(2, '/users/token/refresh/', method='post',
+                               data=lambda data: {'refresh': str(RefreshToken.for_user(data.viewer))})
+
+    def test_logout(self):
+        # blacklist and user lookups, then the outstanding token and get_or_create of its blacklist row
+        self.assertQueryBudget(7, '/users/logout/', method='post',
+                               data=lambda data: {'refresh': str(RefreshToken.for_user(data.viewer))})
+
+
+class LogoutTests(TestCase):
+    def test_logged_out_refresh_token_is_rejected(self):
+        user = UserModel.objects.create_user('me')
+        client = APIClient()
+        client.force_authenticate(user)
+        refresh = str(RefreshToken.for_user(user))
+
+        self.assertEqual(client.post('/users/logout/', {'refresh': refresh}, format='json').status_code, 205)
+        self.assertEqual(client.post('/users/token/refresh/', {'refresh': refresh}, format='json').status_code, 401)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user('me')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_me_etag(self):
+        etag = self.client.get('/users/me/')['ETag']
+        self.assertEqual(self.client.get('/users/me/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Follow.objects.create(follower=UserModel.objects.create_user('fan'), following=self.user)
+        response = self.client.get('/users/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['follower_count'], 1)
+
+    def test_me_follow_is_not_hidden_by_if_modified_since(self):
+        response = self.client.get('/users/me/')
+        self.assertNotIn('Last-Modified', response)
+        Follow.objects.create(follower=UserModel.objects.create_user('fan'), following=self.user)
+
+        response = self.client.get('/users/me/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['follower_count'], 1)
 
-# Create your tests here.
+    def test_user_detail_last_modified(self):
+        UserModel.objects.filter(pk=self.user.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        response = self.client.get(f'/users/{self.user.pk}/')
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(f'/users/{self.user.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
@@ -3,6 +3,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     UserListCreateView,
     UserDetailView,
+    UserPostsView,
+    UserRepostsView,
     LoginView,
     CurrentUserView,
     FollowToggleView,
@@ -15,6 +17,8 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('', UserListCreateView.as_view(), name='user_list'),
     path('<int:pk>/', UserDetailView.as_view(), name='user_detail'),
+    path('<int:pk>/posts/', UserPostsView.as_view(), name='user_posts'),
+    path('<int:pk>/reposts/', UserRepostsView.as_view(), name='user_reposts'),
     path('me/', CurrentUserView.as_view(), name='user_me'),
     path('follow/<int:user_id>/', FollowToggleView.as_view(), name='follow_toggle'),
 ]
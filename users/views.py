@@ -1,7 +1,7 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import views, status, permissions
 from rest_framework.filters import SearchFilter
-from rest_framework.generics import ListCreateAPIView, RetrieveAPIView, CreateAPIView, DestroyAPIView
+from rest_framework.generics import ListCreateAPIView, RetrieveAPIView, CreateAPIView, DestroyAPIView, ListAPIView
 from django.contrib.auth import get_user_model, authenticate, login
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
@@ -10,8 +10,16 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
 
-from posts.models import PostModel
-from posts.serializers import PostModelSerializer
+from posts.cards import PostCardMixin, PostCardRenderer, card_columns
+from posts.conditional import conditional_get, current_user_validators, user_validators
+from posts.fieldsets import FieldSpec, FieldSpecMixin, child_spec, expands, includes
+from posts.feeds import backfill_timeline, remove_from_timeline
+from posts.models import PostModel, RepostModel, NotificationModel
+from posts.notifications import notify
+from posts.pagination import PostKeysetPagination
+from posts.response_cache import cache_response
+from posts.serializers import PostModelSerializer, RepostModelSerializer
+from posts.viewer_state import ViewerState, viewer_flags
 from .models import Follow
 from .serializers import UserSerializer, LoginSerializer, FollowSerializer, UserModelSerializer
 
@@ -51,25 +59,59 @@ class UserDetailView(RetrieveAPIView):
     lookup_field = 'pk'
     permission_classes = (AllowAny,)
 
+    @conditional_get(user_validators)
+    @cache_response(User)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class UserPostsView(FieldSpecMixin, PostCardMixin, ListAPIView):
+    serializer_class = PostModelSerializer
+    pagination_class = PostKeysetPagination
+    permission_classes = (AllowAny,)
+
+    def get_queryset(self):
+        return PostModel.objects.filter(user_id=self.kwargs['pk'])
+
+
+class UserRepostsView(ListAPIView):
+    serializer_class = RepostModelSerializer
+    pagination_class = PostKeysetPagination
+    permission_classes = (AllowAny,)
+
+    def get_queryset(self):
+        return RepostModel.objects.filter(user_id=self.kwargs['pk']).select_related('user', 'post')
+
 
 class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_get(current_user_validators, per_user=True)
     def get(self, request):
+        spec = FieldSpec.from_request(request)
+        user = request.user
+        # built lazily so that ?fields= skips the COUNTs and the posts query it does not need
+        profile = {
+            "id": lambda: user.id,
+            "username": lambda: user.username,
+            "first_name": lambda: getattr(user, "first_name", ""),
+            "last_name": lambda: getattr(user, "last_name", ""),
+            "avatar": lambda: request.build_absolute_uri(user.avatar.url) if user.avatar else None,
+            "bio": lambda: getattr(user, "bio", ""),
+            "follower_count": lambda: user.followers_count,
+            "following_count": lambda: user.following_count,
+            "posts": lambda: self.get_post_cards(request, spec),
+        }
+        return Response({key: value() for key, value in profile.items() if includes(spec, key)})
+
+    def get_post_cards(self, request, spec):
         posts = PostModel.objects.filter(user=request.user)
-        post_serializer = PostModelSerializer(posts, many=True)
-
-        return Response({
-            "id": request.user.id,
-            "username": request.user.username,
-            "first_name": getattr(request.user, "first_name", ""),
-            "last_name": getattr(request.user, "last_name", ""),
-            "avatar": request.build_absolute_uri(request.user.avatar.url) if request.user.avatar else None,
-            "bio": getattr(request.user, "bio", ""),
-            "follower_count": request.user.followers_count,
-            "following_count": request.user.following_count,
-            "posts": post_serializer.data,
-        })
+        if not expands(spec, 'posts'):
+            return list(posts.values_list('id', flat=True))
+        post_spec = child_spec(spec, 'posts')
+        posts = list(posts.values(*card_columns(post_spec)))
+        viewer_state = ViewerState.for_posts(request.user, [post['id'] for post in posts], only=viewer_flags(post_spec))
+        return PostCardRenderer(viewer_state=viewer_state, spec=post_spec).render(posts)
 
     def put(self, request):
         serializer = UserModelSerializer(request.user, data=request.data)
@@ -107,6 +149,7 @@ class FollowToggleView(APIView):
 
         if follow_obj:
             follow_obj.delete()
+            remove_from_timeline(request.user.id, following.id)
             return Response(
                 {"detail": f"{request.user.username} unfollowed {following.username}"},
                 status=status.HTTP_204_NO_CONTENT
@@ -116,6 +159,8 @@ class FollowToggleView(APIView):
                 follower=request.user,
                 following=following
             )
+            backfill_timeline(request.user.id, following.id)
+            notify(NotificationModel.NotifType.Follow, following.id, request.user.id)
             return Response(
                 {"detail": f"{request.user.username} now following {following.username}"},
                 status=status.HTTP_201_CREATED